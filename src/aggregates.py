@@ -0,0 +1,223 @@
+import sqlite3
+import argparse
+from pathlib import Path
+
+from database_schema import AGGREGATE_TABLES
+
+# Measure column -> how one group of games adds to it. rating_sum only covers rated
+# games (RAWG uses 0 for "no rating"), so rating_sum / rated_games is the average.
+MEASURES = {
+    'games': "COUNT(*)",
+    'rated_games': "COUNT(CASE WHEN g.rating > 0 THEN 1 END)",
+    'rating_sum': "TOTAL(CASE WHEN g.rating > 0 THEN g.rating END)",
+    'ratings_count_sum': "TOTAL(COALESCE(g.ratings_count, 0))",
+    'metacritic_games': "COUNT(g.metacritic)",
+    'metacritic_sum': "TOTAL(g.metacritic)"
+}
+
+# Rollup table -> (key columns, key expressions, rows grouped, measures kept)
+AGGREGATES = {
+    'agg_year': (
+        ['release_year'], ['COALESCE(g.release_year, 0)'],
+        "games g",
+        list(MEASURES)
+    ),
+    'agg_genre_year': (
+        ['genre_id', 'release_year'], ['gg.genre_id', 'COALESCE(g.release_year, 0)'],
+        "games g JOIN game_genres gg ON gg.game_id = g.id",
+        list(MEASURES)
+    ),
+    'agg_platform_year': (
+        ['platform_id', 'release_year'], ['gp.platform_id', 'COALESCE(g.release_year, 0)'],
+        "games g JOIN game_platforms gp ON gp.game_id = g.id",
+        list(MEASURES)
+    ),
+    'agg_store': (
+        ['store_id'], ['gs.store_id'],
+        "games g JOIN game_stores gs ON gs.game_id = g.id",
+        ['games', 'rated_games', 'rating_sum', 'ratings_count_sum']
+    ),
+    'agg_genre_platform': (
+        ['genre_id', 'platform_id'], ['gg.genre_id', 'gp.platform_id'],
+        "games g JOIN game_genres gg ON gg.game_id = g.id JOIN game_platforms gp ON gp.game_id = g.id",
+        ['games', 'rated_games', 'rating_sum', 'ratings_count_sum']
+    )
+}
+
+
+def contribution_sql(table, sign, game_ids_sql=None):
+    """Upsert that adds (sign=1) or subtracts (sign=-1) the given games' share of a rollup"""
+    keys, key_exprs, source, measures = AGGREGATES[table]
+    where = f"WHERE g.id IN ({game_ids_sql})" if game_ids_sql else ""
+    values = ', '.join(key_exprs + [f"{sign} * {MEASURES[measure]}" for measure in measures])
+    updates = ', '.join(f"{measure} = {measure} + excluded.{measure}" for measure in measures)
+    return f"""
+        INSERT INTO {table} ({', '.join(keys + measures)})
+        SELECT {values} FROM {source} {where}
+        GROUP BY {', '.join(key_exprs)}
+        ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}
+    """
+
+
+def create_aggregate_tables(conn):
+    for table_sql in AGGREGATE_TABLES.values():
+        conn.execute(table_sql)
+
+
+def rebuild_aggregates(conn):
+    """Recompute every rollup from scratch (after a full load)"""
+    create_aggregate_tables(conn)
+    for table in AGGREGATES:
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(contribution_sql(table, 1))
+
+
+def remove_aggregate_contributions(conn, game_ids_sql):
+    """Take the selected games out of every rollup; run before those games change"""
+    create_aggregate_tables(conn)
+    for table in AGGREGATES:
+        conn.execute(contribution_sql(table, -1, game_ids_sql))
+        conn.execute(f"DELETE FROM {table} WHERE games = 0")
+
+
+def add_aggregate_contributions(conn, game_ids_sql):
+    """Add the selected games' current rows to every rollup"""
+    for table in AGGREGATES:
+        conn.execute(contribution_sql(table, 1, game_ids_sql))
+
+
+class GameStats:
+    """Dashboard queries answered from the rollup tables instead of the game tables
+
+    Each query reads a number of rows bounded by genres x platforms x years, no
+    matter how many games are loaded.
+    """
+
+    def __init__(self, db_path="../db/games.db"):
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+
+    def _rows(self, sql, params=()):
+        return [dict(row) for row in self.conn.execute(sql, params).fetchall()]
+
+    def overview(self):
+        """Total games, average rating and average metacritic score"""
+        return self._rows("""
+            SELECT SUM(games) AS games,
+                   SUM(rating_sum) / NULLIF(SUM(rated_games), 0) AS avg_rating,
+                   SUM(metacritic_sum) / NULLIF(SUM(metacritic_games), 0) AS avg_metacritic
+            FROM agg_year
+        """)[0]
+
+    def releases_per_year(self, platform_id=None, genre_id=None):
+        """Games released per year, optionally for one platform or one genre"""
+        if platform_id is not None:
+            return self._rows("""
+                SELECT release_year, games, rating_sum / NULLIF(rated_games, 0) AS avg_rating
+                FROM agg_platform_year WHERE platform_id = ? AND release_year > 0
+                ORDER BY release_year
+            """, (platform_id,))
+        if genre_id is not None:
+            return self._rows("""
+                SELECT release_year, games, rating_sum / NULLIF(rated_games, 0) AS avg_rating
+                FROM agg_genre_year WHERE genre_id = ? AND release_year > 0
+                ORDER BY release_year
+            """, (genre_id,))
+        return self._rows("""
+            SELECT release_year, games, rating_sum / NULLIF(rated_games, 0) AS avg_rating
+            FROM agg_year WHERE release_year > 0
+            ORDER BY release_year
+        """)
+
+    def genres(self, min_games=1, start_year=None, end_year=None):
+        """Per-genre game counts and average rating, best-rated first"""
+        return self._rows("""
+            SELECT a.genre_id, ge.name AS genre, SUM(a.games) AS games,
+                   SUM(a.rating_sum) / NULLIF(SUM(a.rated_games), 0) AS avg_rating
+            FROM agg_genre_year a LEFT JOIN genres ge ON ge.id = a.genre_id
+            WHERE (? IS NULL OR a.release_year >= ?) AND (? IS NULL OR a.release_year <= ?)
+            GROUP BY a.genre_id
+            HAVING SUM(a.games) >= ?
+            ORDER BY avg_rating DESC
+        """, (start_year, start_year, end_year, end_year, min_games))
+
+    def genre_trend(self, start_year=None, end_year=None):
+        """Games per genre per year, for genre popularity over time"""
+        return self._rows("""
+            SELECT a.release_year, ge.name AS genre, a.games,
+                   a.rating_sum / NULLIF(a.rated_games, 0) AS avg_rating
+            FROM agg_genre_year a LEFT JOIN genres ge ON ge.id = a.genre_id
+            WHERE a.release_year > 0
+              AND (? IS NULL OR a.release_year >= ?) AND (? IS NULL OR a.release_year <= ?)
+            ORDER BY a.release_year, a.games DESC
+        """, (start_year, start_year, end_year, end_year))
+
+    def platforms(self, min_games=1):
+        """Per-platform game counts (market share) and average rating, best-rated first"""
+        return self._rows("""
+            SELECT a.platform_id, p.name AS platform, SUM(a.games) AS games,
+                   SUM(a.rating_sum) / NULLIF(SUM(a.rated_games), 0) AS avg_rating
+            FROM agg_platform_year a LEFT JOIN platforms p ON p.id = a.platform_id
+            GROUP BY a.platform_id
+            HAVING SUM(a.games) >= ?
+            ORDER BY avg_rating DESC
+        """, (min_games,))
+
+    def top_stores(self, limit=10):
+        """Stores carrying the most games"""
+        return self._rows("""
+            SELECT a.store_id, s.name AS store, a.games,
+                   a.rating_sum / NULLIF(a.rated_games, 0) AS avg_rating
+            FROM agg_store a LEFT JOIN stores s ON s.id = a.store_id
+            ORDER BY a.games DESC
+            LIMIT ?
+        """, (limit,))
+
+    def top_combinations(self, limit=10, min_games=5):
+        """Best-rated genre + platform combinations with at least min_games games"""
+        return self._rows("""
+            SELECT ge.name AS genre, p.name AS platform, a.games,
+                   a.rating_sum / NULLIF(a.rated_games, 0) AS avg_rating
+            FROM agg_genre_platform a
+            LEFT JOIN genres ge ON ge.id = a.genre_id
+            LEFT JOIN platforms p ON p.id = a.platform_id
+            WHERE a.games >= ?
+            ORDER BY avg_rating DESC
+            LIMIT ?
+        """, (min_games, limit))
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard numbers from the materialized rollup tables")
+    parser.add_argument("--db", default="../db/games.db", help="SQLite database to read")
+    args = parser.parse_args()
+
+    stats = GameStats(args.db)
+    overview = stats.overview()
+    print(f"Games: {overview['games']} | Avg rating: {overview['avg_rating'] or 0:.2f} | "
+          f"Avg metacritic: {overview['avg_metacritic'] or 0:.1f}")
+
+    print("\n=== RELEASES PER YEAR ===")
+    for row in stats.releases_per_year():
+        print(f"{row['release_year']}: {row['games']} games")
+
+    print("\n=== GENRES BY AVERAGE RATING ===")
+    for row in stats.genres():
+        print(f"- {row['genre']}: {row['games']} games, avg {row['avg_rating'] or 0:.2f}")
+
+    print("\n=== PLATFORMS ===")
+    for row in stats.platforms():
+        print(f"- {row['platform']}: {row['games']} games, avg {row['avg_rating'] or 0:.2f}")
+
+    print("\n=== TOP STORES ===")
+    for row in stats.top_stores():
+        print(f"- {row['store']}: {row['games']} games")
+
+    print("\n=== BEST GENRE + PLATFORM COMBINATIONS ===")
+    for row in stats.top_combinations():
+        print(f"- {row['genre']} on {row['platform']}: {row['games']} games, avg {row['avg_rating'] or 0:.2f}")
+    stats.close()
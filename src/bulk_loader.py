@@ -0,0 +1,117 @@
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+BATCH_SIZE = 10000  # Rows bound per executemany() call
+
+# Connection settings for the duration of a bulk load into a staging file. The load
+# runs in a single transaction that can be rolled back, so the rollback journal can
+# live in memory and there is no need to fsync between statements. A crash mid-commit
+# can corrupt the file, which only costs the staging copy; loads into the live
+# database keep SQLite's defaults.
+LOAD_PRAGMAS = {
+    'journal_mode': 'MEMORY',
+    'synchronous': 'OFF',
+    'temp_store': 'MEMORY',
+    'cache_size': -200000,  # KiB, i.e. ~200 MB of page cache
+    'threads': 4  # Helper threads for the sorter behind CREATE INDEX
+}
+
+# Conflict clauses accepted by insert_rows()
+CONFLICT_CLAUSES = {
+    None: 'INSERT',
+    'replace': 'INSERT OR REPLACE',
+    'ignore': 'INSERT OR IGNORE'
+}
+
+
+def frame_rows(df, columns=None):
+    """Rows of a DataFrame as tuples of plain Python values, with NaN/NA as None"""
+    if columns is not None:
+        df = df[columns]
+    # object dtype turns numpy scalars into Python ones that sqlite3 can bind
+    df = df.astype(object)
+    df = df.where(pd.notnull(df), None)
+    return df.itertuples(index=False, name=None)
+
+
+class BulkLoader:
+    """Prepared, batched inserts into an existing schema inside one transaction"""
+
+    def __init__(self, conn, batch_size=BATCH_SIZE):
+        self.conn = conn
+        # Autocommit mode: transactions are opened and closed explicitly below
+        self.conn.isolation_level = None
+        self.batch_size = batch_size
+        self.timings = []
+
+    def pragma(self, name, value=None):
+        if value is None:
+            return self.conn.execute(f"PRAGMA {name}").fetchone()[0]
+        return self.conn.execute(f"PRAGMA {name} = {value}").fetchone()
+
+    @contextmanager
+    def tuned(self, pragmas=LOAD_PRAGMAS):
+        """Apply load PRAGMAs and put the previous values back afterwards"""
+        previous = {name: self.pragma(name) for name in pragmas}
+        for name, value in pragmas.items():
+            self.pragma(name, value)
+        try:
+            yield
+        finally:
+            for name, value in previous.items():
+                self.pragma(name, value)
+
+    @contextmanager
+    def phase(self, name):
+        """Time a step of the load; the results end up in self.timings"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.append((name, time.perf_counter() - start))
+
+    def timing_report(self):
+        total = sum(seconds for _, seconds in self.timings)
+        lines = [f"  {name:<24} {seconds:8.3f}s" for name, seconds in self.timings]
+        lines.append(f"  {'total':<24} {total:8.3f}s")
+        return '\n'.join(lines)
+
+    @contextmanager
+    def transaction(self):
+        """Everything inside becomes visible at once, or not at all"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        with self.phase('commit'):
+            self.conn.execute("COMMIT")
+
+    def clear(self, tables):
+        for table in tables:
+            self.conn.execute(f"DELETE FROM {table}")
+
+    def insert_rows(self, table, columns, rows, conflict=None):
+        """Insert an iterable of tuples in batches through one prepared statement"""
+        placeholders = ', '.join('?' for _ in columns)
+        sql = f"{CONFLICT_CLAUSES[conflict]} INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.conn.executemany(sql, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self.conn.executemany(sql, batch)
+            count += len(batch)
+        return count
+
+    def insert_frame(self, table, df, columns, source_columns=None, conflict=None):
+        """Insert a DataFrame, optionally renaming source_columns to the table's columns"""
+        return self.insert_rows(table, columns, frame_rows(df, source_columns or columns), conflict)
@@ -0,0 +1,212 @@
+import re
+import time
+import sqlite3
+import argparse
+from pathlib import Path
+
+from database_schema import (COMPACT_DIMENSION_TABLES, COMPACT_CATEGORIES, COMPACT_GAMES_SQL,
+                             COMPACT_GAMES_SELECT, COMPACT_GAMES_VIEW_SQL, COMPACT_INDEXES)
+from db_publish import staging_path, discard_staging, validate_database, publish_database
+
+# Wide analytic query used to compare the two layouts; it reads every games row
+SCAN_QUERY = """
+    SELECT rating_category, popularity_category, COUNT(*), AVG(rating), AVG(playtime)
+    FROM games
+    GROUP BY rating_category, popularity_category
+"""
+
+# The same query written against the compact layout: group on the integer keys and
+# join the names onto the handful of result rows, not onto every game as the view does
+CODED_SCAN_QUERY = """
+    SELECT rc.name, pc.name, s.games, s.avg_rating, s.avg_playtime
+    FROM (
+        SELECT rating_category_id, popularity_category_id, COUNT(*) AS games,
+               AVG(rating) AS avg_rating, AVG(playtime) AS avg_playtime
+        FROM games_compact
+        GROUP BY rating_category_id, popularity_category_id
+    ) s
+    LEFT JOIN rating_categories rc ON rc.id = s.rating_category_id
+    LEFT JOIN popularity_categories pc ON pc.id = s.popularity_category_id
+"""
+
+
+def build_compact_games(conn):
+    """Replace the games table with games_compact plus dimension tables and a games view
+
+    Returns the number of games whose text columns did not map onto a dimension row
+    (0 for a consistent database).
+    """
+    for table_sql in COMPACT_DIMENSION_TABLES.values():
+        conn.execute(table_sql)
+    for table, names in COMPACT_CATEGORIES.items():
+        conn.executemany(f"INSERT OR IGNORE INTO {table} (id, name) VALUES (?, ?)",
+                         list(enumerate(names, 1)))
+    conn.execute("""
+        INSERT OR IGNORE INTO esrb_ratings (name, slug)
+        SELECT DISTINCT esrb_rating, esrb_rating_slug FROM games
+        WHERE esrb_rating IS NOT NULL
+        ORDER BY esrb_rating
+    """)
+
+    conn.execute(COMPACT_GAMES_SQL)
+    conn.execute("""
+        INSERT INTO games_compact
+        SELECT g.id, g.name, g.slug, g.released, g.rating, g.rating_top, g.ratings_count,
+               g.metacritic, g.playtime, g.suggestions_count, g.updated, g.background_image,
+               g.reviews_count, g.added, g.tba, g.release_year, g.release_month, g.release_day,
+               rc.id, pc.id, er.id, g.genres_count, g.platforms_count, g.stores_count, ge.id, p.id
+        FROM games g
+        LEFT JOIN rating_categories rc ON rc.name = g.rating_category
+        LEFT JOIN popularity_categories pc ON pc.name = g.popularity_category
+        LEFT JOIN esrb_ratings er ON er.name = g.esrb_rating AND er.slug IS g.esrb_rating_slug
+        LEFT JOIN genres ge ON ge.name = g.primary_genre
+        LEFT JOIN platforms p ON p.name = g.primary_platform
+        ORDER BY g.id
+    """)
+
+    # Every game must come back unchanged through the view's query
+    lost = conn.execute(f"""
+        SELECT COUNT(*) FROM (SELECT * FROM games EXCEPT {COMPACT_GAMES_SELECT})
+    """).fetchone()[0]
+
+    # A foreign key cannot point at a view, so child tables move over to games_compact
+    retarget_foreign_keys(conn, 'games', 'games_compact')
+    conn.execute("DROP TABLE games")
+    conn.execute(COMPACT_GAMES_VIEW_SQL)
+
+    for index_sql in COMPACT_INDEXES.values():
+        conn.execute(index_sql)
+    return lost
+
+
+def retarget_foreign_keys(conn, old_parent, new_parent):
+    """Recreate every table with a foreign key to old_parent so that it references new_parent
+
+    SQLite cannot change a foreign key in place: each child table is renamed aside,
+    created again from its own CREATE statement with the new parent, refilled, and
+    given back its indexes and triggers.
+    """
+    reference = re.compile(rf'REFERENCES\s+["`\[]?{old_parent}["`\]]?\s*\(', re.IGNORECASE)
+    tables = [name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    children = [table for table in tables
+                if any(fk[2] == old_parent for fk in conn.execute(f"PRAGMA foreign_key_list({table})"))]
+
+    # Legacy mode keeps the renames below from rewriting references in other tables
+    conn.execute("PRAGMA legacy_alter_table = ON")
+    try:
+        for table in children:
+            table_sql = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone()[0]
+            extras = [sql for (sql,) in conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') AND tbl_name = ? AND sql IS NOT NULL",
+                (table,)
+            )]
+
+            conn.execute(f"ALTER TABLE {table} RENAME TO {table}_retarget")
+            conn.execute(reference.sub(f"REFERENCES {new_parent}(", table_sql))
+            conn.execute(f"INSERT INTO {table} SELECT * FROM {table}_retarget")
+            conn.execute(f"DROP TABLE {table}_retarget")
+            for sql in extras:
+                conn.execute(sql)
+    finally:
+        conn.execute("PRAGMA legacy_alter_table = OFF")
+    return children
+
+
+def table_pages(conn, table):
+    """Pages used by a table and its indexes"""
+    return conn.execute("""
+        SELECT COUNT(*) FROM dbstat
+        WHERE name = ? OR name IN (SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?)
+    """, (table, table)).fetchone()[0]
+
+
+def time_query(db_path, query, repeats=3):
+    """Best-of-N time for a query in milliseconds"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        conn.execute(query).fetchall()
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            conn.execute(query).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        return min(timings)
+    finally:
+        conn.close()
+
+
+class CompactDatabaseBuilder:
+    """Build the integer-coded variant of a loaded database as a separate, read-only file
+
+    The loaders keep writing the regular layout; rebuild the compact file after each load.
+    """
+
+    def __init__(self, db_path="../db/games.db", output_path="../db/games_compact.db"):
+        self.db_path = Path(db_path)
+        self.output_path = Path(output_path)
+
+    def build(self):
+        if not self.db_path.exists():
+            print(f"❌ Database not found: {self.db_path}")
+            return False
+
+        staging = staging_path(self.output_path)
+        discard_staging(self.output_path)
+        source = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        conn = sqlite3.connect(staging)
+        try:
+            source.backup(conn)
+            conn.execute("PRAGMA journal_mode = DELETE")
+            with conn:
+                lost = build_compact_games(conn)
+            if not lost:
+                conn.execute("ANALYZE")
+                conn.execute("VACUUM")
+        finally:
+            conn.close()
+            source.close()
+
+        if lost:
+            print(f"❌ {lost} games did not survive the conversion; keeping the previous build")
+            discard_staging(self.output_path)
+            return False
+
+        problems = validate_database(staging)
+        if problems:
+            for problem in problems:
+                print(f"❌ {problem}")
+            discard_staging(self.output_path)
+            return False
+
+        publish_database(staging, self.output_path)
+        print(f"✓ Compact database published to {self.output_path}")
+        return True
+
+    def report(self):
+        """Size of the games data and the time of a full-table analytic query, before and after"""
+        source = sqlite3.connect(self.db_path)
+        compact = sqlite3.connect(self.output_path)
+        try:
+            pages = (table_pages(source, 'games'), table_pages(compact, 'games_compact'))
+        finally:
+            source.close()
+            compact.close()
+
+        print("\n=== COMPACT LAYOUT ===")
+        print(f"games pages (with indexes): {pages[0]:,} -> {pages[1]:,} ({pages[1] / pages[0]:.0%})")
+        print(f"category scan, text columns:    {time_query(self.db_path, SCAN_QUERY):8.1f} ms")
+        print(f"category scan, coded columns:   {time_query(self.output_path, CODED_SCAN_QUERY):8.1f} ms")
+        print(f"category scan, through the view: {time_query(self.output_path, SCAN_QUERY):7.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a copy of the database with integer-coded category columns")
+    parser.add_argument("--db", default="../db/games.db", help="Loaded database to convert")
+    parser.add_argument("--output", default="../db/games_compact.db", help="Compact database to write")
+    args = parser.parse_args()
+
+    builder = CompactDatabaseBuilder(args.db, args.output)
+    if builder.build():
+        builder.report()
@@ -1,6 +1,213 @@
 import sqlite3
 from pathlib import Path
 
+# Secondary index name -> CREATE statement
+INDEXES = {
+    'idx_games_rating': "CREATE INDEX IF NOT EXISTS idx_games_rating ON games(rating)",
+    'idx_games_release_year': "CREATE INDEX IF NOT EXISTS idx_games_release_year ON games(release_year)",
+    'idx_games_ratings_count': "CREATE INDEX IF NOT EXISTS idx_games_ratings_count ON games(ratings_count)",
+    'idx_games_metacritic': "CREATE INDEX IF NOT EXISTS idx_games_metacritic ON games(metacritic)",
+    'idx_games_rating_category': "CREATE INDEX IF NOT EXISTS idx_games_rating_category ON games(rating_category)",
+    'idx_games_popularity_category': "CREATE INDEX IF NOT EXISTS idx_games_popularity_category ON games(popularity_category)",
+    'idx_game_genres_game_id': "CREATE INDEX IF NOT EXISTS idx_game_genres_game_id ON game_genres(game_id)",
+    'idx_game_genres_genre_id': "CREATE INDEX IF NOT EXISTS idx_game_genres_genre_id ON game_genres(genre_id)",
+    'idx_game_platforms_game_id': "CREATE INDEX IF NOT EXISTS idx_game_platforms_game_id ON game_platforms(game_id)",
+    'idx_game_platforms_platform_id': "CREATE INDEX IF NOT EXISTS idx_game_platforms_platform_id ON game_platforms(platform_id)",
+    'idx_game_stores_game_id': "CREATE INDEX IF NOT EXISTS idx_game_stores_game_id ON game_stores(game_id)",
+    'idx_game_stores_store_id': "CREATE INDEX IF NOT EXISTS idx_game_stores_store_id ON game_stores(store_id)",
+    'idx_game_tags_game_id': "CREATE INDEX IF NOT EXISTS idx_game_tags_game_id ON game_tags(game_id)",
+    'idx_game_tags_tag_id': "CREATE INDEX IF NOT EXISTS idx_game_tags_tag_id ON game_tags(tag_id)",
+    'idx_ratings_detail_game_id': "CREATE INDEX IF NOT EXISTS idx_ratings_detail_game_id ON game_ratings_detail(game_id)"
+}
+
+# Full-text index over each game's searchable text. The genre, platform and tag
+# columns hold the names of everything the game is linked to. Rows are keyed by a
+# popularity-ordered rowid (see game_search.py), game_id points back at games.id.
+SEARCH_INDEX_SQL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS games_fts USING fts5(
+        name, slug, genres, platforms, tags, game_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+"""
+
+# Materialized rollups maintained by the loaders (see aggregates.py). Every table keeps
+# counts and sums rather than averages, so a game's contribution can be added or
+# subtracted on its own. release_year 0 collects games without a release date.
+AGGREGATE_TABLES = {
+    'agg_year': '''
+        CREATE TABLE IF NOT EXISTS agg_year (
+            release_year INTEGER PRIMARY KEY,
+            games INTEGER NOT NULL,
+            rated_games INTEGER NOT NULL,
+            rating_sum REAL NOT NULL,
+            ratings_count_sum INTEGER NOT NULL,
+            metacritic_games INTEGER NOT NULL,
+            metacritic_sum INTEGER NOT NULL
+        )
+    ''',
+    'agg_genre_year': '''
+        CREATE TABLE IF NOT EXISTS agg_genre_year (
+            genre_id INTEGER NOT NULL,
+            release_year INTEGER NOT NULL,
+            games INTEGER NOT NULL,
+            rated_games INTEGER NOT NULL,
+            rating_sum REAL NOT NULL,
+            ratings_count_sum INTEGER NOT NULL,
+            metacritic_games INTEGER NOT NULL,
+            metacritic_sum INTEGER NOT NULL,
+            PRIMARY KEY (genre_id, release_year)
+        )
+    ''',
+    'agg_platform_year': '''
+        CREATE TABLE IF NOT EXISTS agg_platform_year (
+            platform_id INTEGER NOT NULL,
+            release_year INTEGER NOT NULL,
+            games INTEGER NOT NULL,
+            rated_games INTEGER NOT NULL,
+            rating_sum REAL NOT NULL,
+            ratings_count_sum INTEGER NOT NULL,
+            metacritic_games INTEGER NOT NULL,
+            metacritic_sum INTEGER NOT NULL,
+            PRIMARY KEY (platform_id, release_year)
+        )
+    ''',
+    'agg_store': '''
+        CREATE TABLE IF NOT EXISTS agg_store (
+            store_id INTEGER PRIMARY KEY,
+            games INTEGER NOT NULL,
+            rated_games INTEGER NOT NULL,
+            rating_sum REAL NOT NULL,
+            ratings_count_sum INTEGER NOT NULL
+        )
+    ''',
+    'agg_genre_platform': '''
+        CREATE TABLE IF NOT EXISTS agg_genre_platform (
+            genre_id INTEGER NOT NULL,
+            platform_id INTEGER NOT NULL,
+            games INTEGER NOT NULL,
+            rated_games INTEGER NOT NULL,
+            rating_sum REAL NOT NULL,
+            ratings_count_sum INTEGER NOT NULL,
+            PRIMARY KEY (genre_id, platform_id)
+        )
+    '''
+}
+
+# Compact variant (see compact_db.py): games_compact keeps the categorical columns of
+# games as small integer keys into dimension tables, and a games view joins the
+# text back in under the original column names. Category ids follow their rank.
+COMPACT_DIMENSION_TABLES = {
+    'rating_categories': '''
+        CREATE TABLE IF NOT EXISTS rating_categories (
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL
+        )
+    ''',
+    'popularity_categories': '''
+        CREATE TABLE IF NOT EXISTS popularity_categories (
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL
+        )
+    ''',
+    'esrb_ratings': '''
+        CREATE TABLE IF NOT EXISTS esrb_ratings (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            slug TEXT,
+            UNIQUE(name, slug)
+        )
+    '''
+}
+
+COMPACT_CATEGORIES = {
+    'rating_categories': ['Excellent', 'Great', 'Good', 'Average', 'Poor'],
+    'popularity_categories': ['Very Popular', 'Popular', 'Moderately Popular', 'Niche']
+}
+
+COMPACT_GAMES_SQL = '''
+    CREATE TABLE IF NOT EXISTS games_compact (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        slug TEXT UNIQUE,
+        released DATE,
+        rating REAL,
+        rating_top INTEGER,
+        ratings_count INTEGER,
+        metacritic INTEGER,
+        playtime INTEGER,
+        suggestions_count INTEGER,
+        updated DATETIME,
+        background_image TEXT,
+        reviews_count INTEGER,
+        added INTEGER,
+        tba BOOLEAN,
+        release_year INTEGER,
+        release_month INTEGER,
+        release_day INTEGER,
+        rating_category_id INTEGER REFERENCES rating_categories(id),
+        popularity_category_id INTEGER REFERENCES popularity_categories(id),
+        esrb_rating_id INTEGER REFERENCES esrb_ratings(id),
+        genres_count INTEGER DEFAULT 0,
+        platforms_count INTEGER DEFAULT 0,
+        stores_count INTEGER DEFAULT 0,
+        primary_genre_id INTEGER REFERENCES genres(id),
+        primary_platform_id INTEGER REFERENCES platforms(id)
+    )
+'''
+
+# Same columns, in the same order, as the games table
+COMPACT_GAMES_SELECT = '''
+    SELECT g.id, g.name, g.slug, g.released, g.rating, g.rating_top, g.ratings_count,
+           g.metacritic, g.playtime, g.suggestions_count, g.updated, g.background_image,
+           g.reviews_count, g.added, g.tba, g.release_year, g.release_month, g.release_day,
+           rc.name AS rating_category, pc.name AS popularity_category,
+           er.name AS esrb_rating, er.slug AS esrb_rating_slug,
+           g.genres_count, g.platforms_count, g.stores_count,
+           ge.name AS primary_genre, ge.slug AS primary_genre_slug,
+           p.name AS primary_platform, p.slug AS primary_platform_slug
+    FROM games_compact g
+    LEFT JOIN rating_categories rc ON rc.id = g.rating_category_id
+    LEFT JOIN popularity_categories pc ON pc.id = g.popularity_category_id
+    LEFT JOIN esrb_ratings er ON er.id = g.esrb_rating_id
+    LEFT JOIN genres ge ON ge.id = g.primary_genre_id
+    LEFT JOIN platforms p ON p.id = g.primary_platform_id
+'''
+
+COMPACT_GAMES_VIEW_SQL = "CREATE VIEW IF NOT EXISTS games AS" + COMPACT_GAMES_SELECT
+
+# The games entries of INDEXES, on the coded columns
+COMPACT_INDEXES = {
+    'idx_games_compact_rating': "CREATE INDEX IF NOT EXISTS idx_games_compact_rating ON games_compact(rating)",
+    'idx_games_compact_release_year': "CREATE INDEX IF NOT EXISTS idx_games_compact_release_year ON games_compact(release_year)",
+    'idx_games_compact_ratings_count': "CREATE INDEX IF NOT EXISTS idx_games_compact_ratings_count ON games_compact(ratings_count)",
+    'idx_games_compact_metacritic': "CREATE INDEX IF NOT EXISTS idx_games_compact_metacritic ON games_compact(metacritic)",
+    'idx_games_compact_rating_category': "CREATE INDEX IF NOT EXISTS idx_games_compact_rating_category ON games_compact(rating_category_id)",
+    'idx_games_compact_popularity_category': "CREATE INDEX IF NOT EXISTS idx_games_compact_popularity_category ON games_compact(popularity_category_id)"
+}
+
+# Output of the clustering stage (see game_clusters.py), rewritten on every run
+CLUSTER_TABLES = {
+    'clusters': '''
+        CREATE TABLE IF NOT EXISTS clusters (
+            id INTEGER PRIMARY KEY,
+            games INTEGER NOT NULL,
+            avg_similarity REAL,
+            top_features TEXT
+        )
+    ''',
+    'game_clusters': '''
+        CREATE TABLE IF NOT EXISTS game_clusters (
+            game_id INTEGER PRIMARY KEY,
+            cluster_id INTEGER NOT NULL,
+            similarity REAL,
+            FOREIGN KEY (game_id) REFERENCES games(id) ON DELETE CASCADE,
+            FOREIGN KEY (cluster_id) REFERENCES clusters(id)
+        )
+    ''',
+    'idx_game_clusters_cluster_id': "CREATE INDEX IF NOT EXISTS idx_game_clusters_cluster_id ON game_clusters(cluster_id)"
+}
+
 class GameDatabaseSchema:
     def __init__(self, db_path="../db/games.db"):
         self.db_path = Path(db_path)
@@ -150,6 +357,12 @@ class GameDatabaseSchema:
         # Create indexes for better performance
         self.create_indexes(cursor)
         
+        # Full-text search over names, slugs, genres, platforms and tags
+        self.create_search_index(cursor)
+        
+        # Summary tables for dashboard queries
+        self.create_aggregate_tables(cursor)
+        
         conn.commit()
         conn.close()
         
@@ -158,27 +371,23 @@ class GameDatabaseSchema:
     
     def create_indexes(self, cursor):
         """Create indexes for better query performance"""
-        indexes = [
-            "CREATE INDEX IF NOT EXISTS idx_games_rating ON games(rating)",
-            "CREATE INDEX IF NOT EXISTS idx_games_release_year ON games(release_year)",
-            "CREATE INDEX IF NOT EXISTS idx_games_ratings_count ON games(ratings_count)",
-            "CREATE INDEX IF NOT EXISTS idx_games_metacritic ON games(metacritic)",
-            "CREATE INDEX IF NOT EXISTS idx_games_rating_category ON games(rating_category)",
-            "CREATE INDEX IF NOT EXISTS idx_games_popularity_category ON games(popularity_category)",
-            "CREATE INDEX IF NOT EXISTS idx_game_genres_game_id ON game_genres(game_id)",
-            "CREATE INDEX IF NOT EXISTS idx_game_genres_genre_id ON game_genres(genre_id)",
-            "CREATE INDEX IF NOT EXISTS idx_game_platforms_game_id ON game_platforms(game_id)",
-            "CREATE INDEX IF NOT EXISTS idx_game_platforms_platform_id ON game_platforms(platform_id)",
-            "CREATE INDEX IF NOT EXISTS idx_game_stores_game_id ON game_stores(game_id)",
-            "CREATE INDEX IF NOT EXISTS idx_game_stores_store_id ON game_stores(store_id)",
-            "CREATE INDEX IF NOT EXISTS idx_game_tags_game_id ON game_tags(game_id)",
-            "CREATE INDEX IF NOT EXISTS idx_game_tags_tag_id ON game_tags(tag_id)",
-            "CREATE INDEX IF NOT EXISTS idx_ratings_detail_game_id ON game_ratings_detail(game_id)"
-        ]
-        
-        for index_sql in indexes:
+        for index_sql in INDEXES.values():
             cursor.execute(index_sql)
     
+    def create_search_index(self, cursor):
+        """Create the FTS5 table behind game search (filled by the loaders)"""
+        cursor.execute(SEARCH_INDEX_SQL)
+    
+    def create_aggregate_tables(self, cursor):
+        """Create the materialized rollup tables (filled by the loaders)"""
+        for table_sql in AGGREGATE_TABLES.values():
+            cursor.execute(table_sql)
+    
+    def drop_indexes(self, cursor):
+        """Drop the secondary indexes, e.g. before a bulk load (PRIMARY KEY/UNIQUE ones stay)"""
+        for index_name in INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {index_name}")
+    
     def show_schema_info(self):
         """Display information about the created schema"""
         conn = sqlite3.connect(self.db_path)
@@ -217,7 +426,8 @@ class GameDatabaseSchema:
             'game_tags', 'game_ratings_detail'
         ]
         
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        # In the compact variant games is a view over games_compact
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")
         existing_tables = [row[0] for row in cursor.fetchall()]
         
         missing_tables = set(required_tables) - set(existing_tables)
@@ -0,0 +1,126 @@
+import os
+import sqlite3
+from pathlib import Path
+
+from database_schema import GameDatabaseSchema
+
+# Child table -> column pointing at games.id; a published build may not have orphans
+GAME_CHILD_TABLES = {
+    'game_genres': 'game_id',
+    'game_platforms': 'game_id',
+    'game_stores': 'game_id',
+    'game_tags': 'game_id',
+    'game_ratings_detail': 'game_id'
+}
+
+
+def staging_path(db_path):
+    """Staging file next to the live database, so publishing is a same-filesystem rename"""
+    db_path = Path(db_path)
+    return db_path.with_name(f"{db_path.name}.staging")
+
+
+def stage_database(db_path):
+    """Copy the live database into a fresh staging file with the SQLite backup API
+
+    The backup reads a consistent snapshot while readers keep using the live file.
+    """
+    db_path = Path(db_path)
+    staging = staging_path(db_path)
+    discard_staging(db_path)
+
+    source = sqlite3.connect(db_path)
+    target = sqlite3.connect(staging)
+    try:
+        source.backup(target)
+        # Published files use a rollback journal: -wal/-shm files belong to a file *name*,
+        # so a WAL database could not be swapped underneath open connections
+        target.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        target.close()
+        source.close()
+    return staging
+
+
+def discard_staging(db_path):
+    staging = staging_path(db_path)
+    for path in (staging, staging.with_name(staging.name + '-journal')):
+        if path.exists():
+            path.unlink()
+
+
+def validate_database(path):
+    """Problems that should stop a build from being published (empty list = OK)"""
+    problems = []
+    conn = sqlite3.connect(path)
+
+    try:
+        result = conn.execute("PRAGMA quick_check").fetchone()[0]
+        if result != 'ok':
+            problems.append(f"quick_check: {result}")
+
+        if not GameDatabaseSchema(path).validate_schema():
+            problems.append("schema is missing tables")
+            return problems
+
+        games = conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+        if games == 0:
+            problems.append("games table is empty")
+
+        for table, column in GAME_CHILD_TABLES.items():
+            orphans = conn.execute(f"""
+                SELECT COUNT(*) FROM {table} c
+                LEFT JOIN games g ON c.{column} = g.id
+                WHERE g.id IS NULL
+            """).fetchone()[0]
+            if orphans:
+                problems.append(f"{orphans} rows in {table} point at missing games")
+
+        # Also catches foreign keys that name a parent table which no longer exists
+        violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+        if violations:
+            tables = sorted({row[0] for row in violations})
+            problems.append(f"{len(violations)} foreign key violations in {', '.join(tables)}")
+
+        has_search = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'games_fts'"
+        ).fetchone()[0]
+        if has_search:
+            indexed = conn.execute("SELECT COUNT(*) FROM games_fts").fetchone()[0]
+            if indexed != games:
+                problems.append(f"search index has {indexed} games, games table has {games}")
+
+        has_rollups = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'agg_year'"
+        ).fetchone()[0]
+        if has_rollups:
+            summarized = conn.execute("SELECT COALESCE(SUM(games), 0) FROM agg_year").fetchone()[0]
+            if summarized != games:
+                problems.append(f"summary tables cover {summarized} games, games table has {games}")
+    finally:
+        conn.close()
+
+    return problems
+
+
+def publish_database(staging, db_path):
+    """Atomically replace the live database with a finished staging build
+
+    New connections see the new build immediately. Connections that are already
+    open keep reading the previous file until they reconnect, so no reader ever
+    sees a half-loaded database or waits on the load's locks.
+    """
+    staging = Path(staging)
+    db_path = Path(db_path)
+
+    with open(staging, 'rb') as f:
+        os.fsync(f.fileno())
+    os.chmod(staging, 0o644)
+    os.replace(staging, db_path)
+
+    # Make the rename itself durable
+    dir_fd = os.open(db_path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
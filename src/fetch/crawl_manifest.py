@@ -0,0 +1,160 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+class CrawlManifest:
+    """Per-page record of a crawl: a JSON snapshot plus an append-only journal
+
+    Every record is appended to the journal as one JSON line, so recording costs
+    the same however large the crawl gets. checkpoint() makes the lines written so
+    far durable; the snapshot is only rewritten when the journal is compacted on load.
+    """
+
+    def __init__(self, path, fresh=False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.journal_path = self.path.with_name(self.path.name + '.journal')
+        self.entries = {}
+        self._journal = None
+        self._lock = threading.Lock()
+        if fresh:
+            # Forget the previous crawl straight away, so every page is fetched again
+            self._compact()
+            print(f"✓ Started a fresh crawl manifest: {self.path}")
+        else:
+            self.load()
+
+    def load(self):
+        """Read the snapshot and replay the journal, starting empty if there is neither"""
+        try:
+            if self.path.exists():
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get('entries', {})
+        except Exception as e:
+            print(f"✗ Could not read crawl manifest {self.path}: {e} - starting fresh")
+            self.entries = {}
+
+        journal_lines = 0
+        if self.journal_path.exists():
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash; its page is simply fetched again
+                        continue
+                    self.entries[record['key']] = record['entry']
+                    journal_lines += 1
+
+        if self.entries or journal_lines:
+            print(f"✓ Loaded crawl manifest: {len(self.entries)} entries")
+        # Fold a journal full of superseded lines (retries, re-fetches) into the snapshot
+        if journal_lines > 2 * len(self.entries):
+            self._compact()
+
+    def is_complete(self, key, output_file):
+        """A page counts as done only if its file is still on disk with the recorded size"""
+        entry = self.entries.get(str(key))
+        if not entry or entry.get('status') != 'done':
+            return False
+
+        output_file = Path(output_file)
+        return output_file.exists() and output_file.stat().st_size == entry.get('file_bytes', entry.get('bytes'))
+
+    def completed_file(self, key, raw_dir):
+        """File holding a completed page, or None if the page still has to be fetched"""
+        entry = self.entries.get(str(key))
+        if not entry or entry.get('status') != 'done' or not entry.get('file'):
+            return None
+
+        output_file = Path(raw_dir) / entry['file']
+        return output_file if self.is_complete(key, output_file) else None
+
+    def record_success(self, key, output_file, payload, attempts=1, file_bytes=None, fetched_at=None):
+        """Record a page whose bytes were written to output_file
+
+        When several pages share one (compressed) segment file, file_bytes is the
+        size of that file and payload is just this page's share of it.
+        """
+        self._record(key, {
+            'status': 'done',
+            'file': Path(output_file).name,
+            'bytes': len(payload),
+            'file_bytes': len(payload) if file_bytes is None else file_bytes,
+            'checksum': hashlib.sha256(payload).hexdigest(),
+            'fetched_at': fetched_at or datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'attempts': attempts
+        })
+
+    def record_failure(self, key, error, attempts):
+        """Record a page that could not be fetched so the next run retries it"""
+        self._record(key, {
+            'status': 'failed',
+            'error': str(error),
+            'fetched_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'attempts': attempts
+        })
+
+    def _record(self, key, entry):
+        line = json.dumps({'key': str(key), 'entry': entry}, ensure_ascii=False) + '\n'
+        with self._lock:
+            self.entries[str(key)] = entry
+            if self._journal is None:
+                self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            self._journal.write(line)
+
+    def checkpoint(self):
+        """Make every record so far durable"""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.flush()
+                os.fsync(self._journal.fileno())
+
+    def close(self):
+        self.checkpoint()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def _compact(self):
+        """Write all entries to the snapshot and start an empty journal"""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            write_atomic(self.path, json.dumps({'entries': self.entries}, ensure_ascii=False).encode('utf-8'))
+            # Replaying what is already in the snapshot is harmless, so a crash
+            # between the two steps loses nothing
+            if self.journal_path.exists():
+                self.journal_path.unlink()
+
+    def summary(self):
+        """Count entries by status"""
+        counts = {}
+        for entry in self.entries.values():
+            counts[entry.get('status')] = counts.get(entry.get('status'), 0) + 1
+        return counts
+
+
+def write_atomic(path, payload):
+    """Write bytes to path via temp file + rename"""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates files as 0600; give pages normal data file permissions
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,153 @@
+import os
+import math
+import json
+import sqlite3
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+
+from crawl_manifest import write_atomic
+from fetch_games import RAWGFetcher, BASE_URL, PAGE_SIZE, CONCURRENCY, REQUESTS_PER_SECOND
+
+DB_PATH = Path("../../db/games.db")
+DELTA_DIR = Path("../../data/delta")
+
+
+def read_high_water_mark(db_path=DB_PATH):
+    """Latest `updated` timestamp already stored in the games table"""
+    db_path = Path(db_path)
+    if not db_path.exists():
+        return None
+
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute("SELECT MAX(updated) FROM games").fetchone()
+        return row[0] if row else None
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+
+
+class DeltaFetcher:
+    """Fetch only games changed since the database's high-water mark into a delta batch"""
+
+    def __init__(self, api_key, db_path=DB_PATH, delta_dir=DELTA_DIR, base_url=BASE_URL,
+                 page_size=PAGE_SIZE, concurrency=CONCURRENCY, requests_per_second=REQUESTS_PER_SECOND):
+        self.api_key = api_key
+        self.db_path = Path(db_path)
+        self.delta_dir = Path(delta_dir)
+        self.base_url = base_url
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.requests_per_second = requests_per_second
+
+    def batch_info_path(self, batch_id):
+        return self.delta_dir / batch_id / "batch_info.json"
+
+    def load_batch_info(self, batch_id):
+        with open(self.batch_info_path(batch_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_batch_info(self, info):
+        path = self.batch_info_path(info['batch_id'])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, json.dumps(info, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    def new_batch(self):
+        """Describe a new batch covering everything updated since the high-water mark"""
+        high_water_mark = read_high_water_mark(self.db_path)
+        if not high_water_mark:
+            raise ValueError(f"No games.updated values in {self.db_path} - run a full fetch and load first.")
+
+        now = datetime.now(timezone.utc)
+        info = {
+            'batch_id': now.strftime('%Y%m%dT%H%M%SZ'),
+            'high_water_mark': high_water_mark,
+            # The date filter is day-granular, so the last loaded day is fetched again;
+            # re-applying those games is harmless
+            'since': high_water_mark[:10],
+            'until': now.strftime('%Y-%m-%d'),
+            'status': 'fetching',
+            'created_at': now.isoformat(timespec='seconds')
+        }
+        self.save_batch_info(info)
+        return info
+
+    def run(self, batch_id=None):
+        """Fetch a new batch, or resume an unfinished one"""
+        info = self.load_batch_info(batch_id) if batch_id else self.new_batch()
+        batch_dir = self.delta_dir / info['batch_id']
+        print(f"Delta batch {info['batch_id']}: games updated {info['since']}..{info['until']}")
+
+        fetcher = RAWGFetcher(
+            self.api_key,
+            base_url=self.base_url,
+            output_dir=batch_dir / "raw",
+            cache_path=self.delta_dir / "cache" / "http_cache.db",
+            page_size=self.page_size,
+            concurrency=self.concurrency,
+            requests_per_second=self.requests_per_second,
+            filters={
+                "updated": f"{info['since']},{info['until']}",
+                "ordering": "-updated"
+            }
+        )
+
+        try:
+            # The first page tells us how many changed games there are
+            games_count = info.get('games_count')
+            if games_count is None:
+                first_page = fetcher.fetch_page(1)
+                fetcher.save_page(1, first_page)
+                games_count = first_page.get('count', len(first_page.get('results', [])))
+                info['games_count'] = games_count
+                self.save_batch_info(info)
+
+            num_pages = max(1, math.ceil(games_count / self.page_size))
+            print(f"{games_count} changed games across {num_pages} pages")
+
+            fetcher.run_concurrent(num_pages)
+        finally:
+            fetcher.close()
+
+        complete = all(fetcher.is_page_done(page) for page in range(1, num_pages + 1))
+        info.update({
+            'pages': num_pages,
+            'status': 'fetched' if complete else 'fetching'
+        })
+        self.save_batch_info(info)
+
+        if complete:
+            print(f"✓ Delta batch ready: {batch_dir / 'raw'}")
+        else:
+            print(f"✗ Delta batch incomplete - resume with --batch {info['batch_id']}")
+        return info
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fetch games updated since the last load")
+    parser.add_argument("--batch", default=None, help="Resume an unfinished delta batch")
+    parser.add_argument("--db", default=str(DB_PATH), help="Database holding the high-water mark")
+    parser.add_argument("--delta-dir", default=str(DELTA_DIR), help="Where delta batches are written")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Pages in flight")
+    parser.add_argument("--rps", type=float, default=REQUESTS_PER_SECOND, help="Requests-per-second budget")
+    parser.add_argument("--base-url", default=BASE_URL, help="API endpoint (point at a local stub for testing)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    API_KEY = os.getenv("RAWG_API_KEY")
+    if not API_KEY:
+        raise ValueError("RAWG_API_KEY is not set in the .env file.")
+
+    args = parse_args()
+    delta = DeltaFetcher(
+        API_KEY,
+        db_path=args.db,
+        delta_dir=args.delta_dir,
+        base_url=args.base_url,
+        concurrency=args.concurrency,
+        requests_per_second=args.rps
+    )
+    delta.run(args.batch)
@@ -0,0 +1,125 @@
+import os
+import sys
+import asyncio
+import argparse
+from pathlib import Path
+
+from fetch_games import RAWGFetcher, BASE_URL, OUTPUT_DIR, CONCURRENCY, REQUESTS_PER_SECOND, COMPRESSION
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from raw_store import iter_raw_games
+
+DETAILS_DIR = Path("../../data/raw_details")
+DETAILS_MANIFEST_PATH = Path("../../data/manifests/game_details.json")
+DETAIL_SEGMENT_SIZE = 500  # Responses per segment; detail responses are much smaller than list pages
+
+# Endpoint name -> URL suffix under /games/{id}
+DETAIL_ENDPOINTS = {
+    "details": "",
+    "screenshots": "/screenshots",
+    "additions": "/additions"
+}
+
+
+def read_game_ids(raw_dir=OUTPUT_DIR):
+    """Distinct game ids in the raw store, in the order they were crawled"""
+    seen = set()
+    game_ids = []
+    for game in iter_raw_games(raw_dir):
+        game_id = game.get('id')
+        if game_id is not None and game_id not in seen:
+            seen.add(game_id)
+            game_ids.append(game_id)
+    return game_ids
+
+
+class DetailFetcher(RAWGFetcher):
+    """Per-game detail endpoints, fetched through the same pool, cache and manifest as list pages
+
+    Manifest keys look like "3498:screenshots". Each stored record wraps one
+    response: {"game_id": ..., "endpoint": ..., "data": {...}}.
+    """
+
+    segment_prefix = "details"
+
+    def __init__(self, api_key, endpoints=tuple(DETAIL_ENDPOINTS), output_dir=DETAILS_DIR,
+                 manifest_path=DETAILS_MANIFEST_PATH, segment_pages=DETAIL_SEGMENT_SIZE, **kwargs):
+        super().__init__(api_key, output_dir=output_dir, manifest_path=manifest_path,
+                         segment_pages=segment_pages, **kwargs)
+        unknown = set(endpoints) - set(DETAIL_ENDPOINTS)
+        if unknown:
+            raise ValueError(f"Unknown detail endpoints: {sorted(unknown)}")
+        self.endpoints = list(endpoints)
+
+    @staticmethod
+    def split_key(key):
+        game_id, endpoint = key.split(":", 1)
+        return int(game_id), endpoint
+
+    def request_for(self, key):
+        game_id, endpoint = self.split_key(key)
+        params = {"key": self.api_key}
+        if endpoint != "details":
+            params["page_size"] = self.page_size
+        return f"{self.base_url.rstrip('/')}/{game_id}{DETAIL_ENDPOINTS[endpoint]}", params
+
+    def records(self, key, data):
+        game_id, endpoint = self.split_key(key)
+        return [{"game_id": game_id, "endpoint": endpoint, "data": data}]
+
+    def describe(self, key):
+        game_id, endpoint = self.split_key(key)
+        return f"{endpoint} for game {game_id}"
+
+    def page_file(self, key):
+        game_id, endpoint = self.split_key(key)
+        return self.output_dir / f"game_{game_id}_{endpoint}.json"
+
+    def keys_for(self, game_ids):
+        return [f"{game_id}:{endpoint}" for game_id in game_ids for endpoint in self.endpoints]
+
+    def run(self, game_ids):
+        """Fetch every endpoint for every game that is not already in the manifest"""
+        keys = self.pending(self.keys_for(game_ids))
+        print(f"{len(keys)} detail requests to make for {len(game_ids)} games")
+        return asyncio.run(self.fetch_keys_async(keys))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fetch per-game detail endpoints for games in the raw store")
+    parser.add_argument("--raw-dir", default=str(OUTPUT_DIR), help="Raw store the game ids are read from")
+    parser.add_argument("--output-dir", default=str(DETAILS_DIR), help="Where detail segments are written")
+    parser.add_argument("--manifest", default=str(DETAILS_MANIFEST_PATH), help="Manifest used to resume runs")
+    parser.add_argument("--endpoints", nargs="+", choices=list(DETAIL_ENDPOINTS), default=list(DETAIL_ENDPOINTS),
+                        help="Detail endpoints to fetch")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Requests in flight")
+    parser.add_argument("--rps", type=float, default=REQUESTS_PER_SECOND, help="Requests-per-second budget")
+    parser.add_argument("--compression", choices=["gzip", "zstd", "none"], default=COMPRESSION,
+                        help="Compression of NDJSON segments")
+    parser.add_argument("--base-url", default=BASE_URL, help="API endpoint (point at a local stub for testing)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    API_KEY = os.getenv("RAWG_API_KEY")
+    if not API_KEY:
+        raise ValueError("RAWG_API_KEY is not set in the .env file.")
+
+    args = parse_args()
+    game_ids = read_game_ids(args.raw_dir)
+    fetcher = DetailFetcher(
+        API_KEY,
+        endpoints=args.endpoints,
+        output_dir=args.output_dir,
+        manifest_path=args.manifest,
+        base_url=args.base_url,
+        concurrency=args.concurrency,
+        requests_per_second=args.rps,
+        compression=args.compression
+    )
+
+    try:
+        fetched = fetcher.run(game_ids)
+        print(f"Fetched {fetched} detail responses, manifest status: {fetcher.manifest.summary()}")
+    finally:
+        fetcher.close()
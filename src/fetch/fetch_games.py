@@ -1,46 +1,422 @@
 import os
+import sys
+import argparse
+import asyncio
+import random
 import requests
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from datetime import datetime, timezone
 from time import sleep
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
+from crawl_manifest import CrawlManifest, write_atomic
+from rate_limiter import TokenBucket
+from response_cache import ResponseCache, CACHE_TTL
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from raw_store import RawSegmentWriter, segment_path, raw_files
+
 # Load API key from .env file
 load_dotenv()
-API_KEY = os.getenv("RAWG_API_KEY")
-if not API_KEY:
-    raise ValueError("RAWG_API_KEY is not set in the .env file.")
 
-BASE_URL = "https://api.rawg.io/api/games"
+BASE_URL = os.getenv("RAWG_BASE_URL", "https://api.rawg.io/api/games")
 OUTPUT_DIR = Path("../../data/raw")
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 # Parameters
 NUM_PAGES = 10  # Change this to fetch more pages
 PAGE_SIZE = 40
+CONCURRENCY = 8  # Pages kept in flight in concurrent mode
+REQUESTS_PER_SECOND = 1.0  # Be polite to API server
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0  # Seconds; doubled on every retry
+RAW_FORMAT = "ndjson"  # "ndjson" segments, or "json" for one pretty-printed file per page
+COMPRESSION = "gzip"  # "gzip", "zstd" (needs zstandard) or "none"
+SEGMENT_PAGES = 25  # Pages per NDJSON segment file
+
+
+class RAWGFetcher:
+    segment_prefix = "games"  # Raw segment file names start with this
+
+    def __init__(self, api_key, base_url=BASE_URL, output_dir=OUTPUT_DIR, page_size=PAGE_SIZE,
+                 concurrency=CONCURRENCY, requests_per_second=REQUESTS_PER_SECOND,
+                 manifest_path=None, max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE, filters=None,
+                 raw_format=RAW_FORMAT, compression=COMPRESSION, segment_pages=SEGMENT_PAGES,
+                 cache_path=None, cache_ttl=CACHE_TTL, use_cache=True, fresh=False):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.page_size = page_size
+        self.concurrency = max(1, concurrency)
+        self.filters = filters or {}
+
+        # One keep-alive session whose connection pool matches the number of workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # Burst of one second's budget: a full pool must not fire more than --rps at once
+        self.rate_limiter = TokenBucket(requests_per_second, burst=max(1, int(requests_per_second)))
+
+        # The manifest lives next to the raw directory unless told otherwise
+        if manifest_path is None:
+            manifest_path = self.output_dir.parent / "manifests" / "games_pages.json"
+        self.manifest = CrawlManifest(manifest_path, fresh=fresh)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+
+        # HTTP responses are cached next to the raw directory too
+        self.cache = None
+        if use_cache:
+            if cache_path is None:
+                cache_path = self.output_dir.parent / "cache" / "http_cache.db"
+            self.cache = ResponseCache(cache_path, ttl=cache_ttl)
+
+        if raw_format not in ("ndjson", "json"):
+            raise ValueError(f"Unknown raw format: {raw_format}")
+        self.raw_format = raw_format
+        self.compression = None if compression in (None, "none") else compression
+        self.segment_pages = max(1, segment_pages)
+
+        # Pages are buffered into the open segment and only enter the manifest once
+        # the segment has been closed and renamed into place
+        self.run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        self._segment_lock = threading.Lock()
+        self._segment_writer = None
+        self._segment_count = 0
+        self._segment_buffer = []
+
+    def build_params(self, page):
+        """Query parameters for a single /games page"""
+        params = {
+            "key": self.api_key,
+            "page": page,
+            "page_size": self.page_size,
+            "dates": "2000-01-01,2024-12-31",
+            "ordering": "-rating"
+        }
+        # Extra filters (e.g. the delta fetch's `updated` range) override the defaults
+        params.update(self.filters)
+        return params
+
+    def request_for(self, page):
+        """URL and query parameters of the request behind one manifest key"""
+        return self.base_url, self.build_params(page)
+
+    def records(self, page, data):
+        """Records of one response that go into the raw store"""
+        return data.get("results", [])
+
+    def describe(self, page):
+        return f"page {page}"
+
+    def page_file(self, page):
+        return self.output_dir / f"games_page_{page}.json"
+
+    def _cached(self, page):
+        """Page data from the response cache if it is still fresh, without any request"""
+        if self.cache is None:
+            return None
+        url, params = self.request_for(page)
+        cached = self.cache.fresh(url, params)
+        return cached.json() if cached is not None else None
+
+    def _get(self, page):
+        url, params = self.request_for(page)
+        if self.cache is None:
+            response = self.session.get(url, params=params, timeout=30)
+            response.raise_for_status()
+            return response.json()
+
+        # Stale entries are revalidated: an unchanged page costs a 304 instead of a download
+        cached = self.cache.lookup(url, params)
+        response = self.session.get(url, params=params, timeout=30,
+                                    headers=self.cache.conditional_headers(cached))
+        if response.status_code == 304 and cached is not None:
+            return self.cache.revalidated(url, params, cached, response).json()
 
-for page in range(1, NUM_PAGES + 1):
-    params = {
-        "key": API_KEY,
-        "page": page,
-        "page_size": PAGE_SIZE,
-        "dates": "2000-01-01,2024-12-31",
-        "ordering": "-rating"
-    }
-    try:
-        print(f"Fetching page {page}...")
-        response = requests.get(BASE_URL, params=params)
         response.raise_for_status()
-        data = response.json()
+        self.cache.store(url, params, response)
+        return response.json()
+
+    def fetch_page(self, page):
+        """Fetch one page, waiting for the rate limiter unless the cache can answer"""
+        data = self._cached(page)
+        if data is not None:
+            return data
+
+        self.rate_limiter.acquire()
+        return self._get(page)
+
+    def save_page(self, page, data, attempts=1):
+        """Write one page of results to the raw data directory and record it in the manifest"""
+        if self.raw_format == "json":
+            output_file = self.page_file(page)
+            payload = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+            write_atomic(output_file, payload)
+            self.manifest.record_success(page, output_file, payload, attempts=attempts)
+            self.manifest.checkpoint()
+            return output_file
+
+        with self._segment_lock:
+            if self._segment_writer is None:
+                self._segment_count += 1
+                stem = f"{self.segment_prefix}_{self.run_id}_{self._segment_count:04d}"
+                self._segment_writer = RawSegmentWriter(
+                    segment_path(self.output_dir, stem, self.compression), compression=self.compression
+                )
+
+            payload = self._segment_writer.write_many(self.records(page, data))
+            fetched_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            self._segment_buffer.append((page, payload, attempts, fetched_at))
+            output_file = self._segment_writer.path
+
+            if len(self._segment_buffer) >= self.segment_pages:
+                self._close_segment()
+
+        return output_file
+
+    def _close_segment(self):
+        # Caller holds _segment_lock
+        if self._segment_writer is None:
+            return
+
+        output_file = self._segment_writer.close()
+        file_bytes = output_file.stat().st_size
+        for page, payload, attempts, fetched_at in self._segment_buffer:
+            self.manifest.record_success(page, output_file, payload, attempts=attempts,
+                                         file_bytes=file_bytes, fetched_at=fetched_at)
+        # One durable checkpoint per closed segment
+        self.manifest.checkpoint()
 
-        output_file = OUTPUT_DIR / f"games_page_{page}.json"
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        self._segment_writer = None
+        self._segment_buffer = []
 
-        print(f"Saved: {output_file}")
+    def flush(self):
+        """Close the open segment and checkpoint the manifest"""
+        with self._segment_lock:
+            self._close_segment()
+        self.manifest.checkpoint()
 
-        sleep(1)  # Be polite to API server
+    def prune_stale_files(self):
+        """Delete raw files no completed manifest entry points to
 
-    except Exception as e:
-        print(f"Error on page {page}: {e}")
-        break
+        Segment names are unique per run, so a fresh crawl (or one whose manifest
+        was lost) leaves the previous crawl's files behind; every game in them
+        would otherwise reach the transformer twice. Called only after a run in
+        which every page succeeded, so the new files cover what is removed.
+        """
+        live = {entry['file'] for entry in self.manifest.entries.values()
+                if entry.get('status') == 'done' and entry.get('file')}
+        stale = [path for path in raw_files(self.output_dir) if path.name not in live]
+        for path in stale:
+            path.unlink()
+        if stale:
+            print(f"Removed {len(stale)} raw files left over from an earlier crawl")
+        return stale
+
+    def is_page_done(self, page):
+        """Whether a page is safely on disk or waiting in the open segment"""
+        with self._segment_lock:
+            if any(buffered[0] == page for buffered in self._segment_buffer):
+                return True
+        return self.manifest.completed_file(page, self.output_dir) is not None
+
+    def pending(self, keys):
+        """Keys that are missing, failed or no longer match the manifest"""
+        keys = list(keys)
+        pending = [key for key in keys if not self.is_page_done(key)]
+        skipped = len(keys) - len(pending)
+        if skipped:
+            print(f"Skipping {skipped} already completed")
+        return pending
+
+    def pending_pages(self, num_pages):
+        return self.pending(range(1, num_pages + 1))
+
+    def backoff_delay(self, attempt):
+        """Exponential backoff with jitter for the given retry number"""
+        return self.backoff_base * (2 ** (attempt - 1)) * (0.5 + random.random())
+
+    @staticmethod
+    def is_retryable(error):
+        # Client errors (bad key, page past the end of the catalogue) won't fix themselves
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            status = error.response.status_code
+            return status == 429 or status >= 500
+        return True
+
+    def error_text(self, error):
+        """Error message with the API key masked, safe to print and store"""
+        text = str(error)
+        return text.replace(self.api_key, "***") if self.api_key else text
+
+    def fetch_and_save_page(self, page):
+        """Fetch and save one page, retrying transient errors with backoff"""
+        for attempt in range(1, self.max_retries + 2):
+            try:
+                data = self.fetch_page(page)
+                return self.save_page(page, data, attempts=attempt)
+            except Exception as e:
+                if attempt > self.max_retries or not self.is_retryable(e):
+                    self.manifest.record_failure(page, self.error_text(e), attempt)
+                    raise
+                delay = self.backoff_delay(attempt)
+                print(f"Retrying {self.describe(page)} in {delay:.1f}s ({self.error_text(e)})")
+                sleep(delay)
+
+    def run_sequential(self, num_pages=NUM_PAGES):
+        """Fetch pages one by one, stopping at the first page that keeps failing"""
+        fetched = 0
+        failed = False
+
+        try:
+            for page in self.pending_pages(num_pages):
+                try:
+                    print(f"Fetching page {page}...")
+                    output_file = self.fetch_and_save_page(page)
+                    print(f"Saved page {page}: {output_file}")
+                    fetched += 1
+
+                except Exception as e:
+                    print(f"Error on page {page}: {self.error_text(e)}")
+                    failed = True
+                    break
+        finally:
+            self.flush()
+
+        if not failed:
+            self.prune_stale_files()
+        return fetched
+
+    async def _fetch_and_save(self, page, executor):
+        loop = asyncio.get_running_loop()
+
+        for attempt in range(1, self.max_retries + 2):
+            try:
+                data = await loop.run_in_executor(executor, self._cached, page)
+                if data is None:
+                    await self.rate_limiter.acquire_async()
+                    data = await loop.run_in_executor(executor, self._get, page)
+                output_file = await loop.run_in_executor(executor, self.save_page, page, data, attempt)
+                print(f"Saved {self.describe(page)}: {output_file}")
+                return True
+            except Exception as e:
+                error = e
+
+            if attempt > self.max_retries or not self.is_retryable(error):
+                print(f"Error on {self.describe(page)}: {self.error_text(error)}")
+                self.manifest.record_failure(page, self.error_text(error), attempt)
+                return False
+
+            delay = self.backoff_delay(attempt)
+            print(f"Retrying {self.describe(page)} in {delay:.1f}s ({self.error_text(error)})")
+            await asyncio.sleep(delay)
+
+    async def fetch_keys_async(self, keys):
+        """Fetch keys through a fixed pool of `concurrency` workers"""
+        queue = asyncio.Queue()
+        for key in keys:
+            queue.put_nowait(key)
+        failed = []
+
+        async def worker(executor):
+            fetched = 0
+            while True:
+                try:
+                    key = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return fetched
+                if await self._fetch_and_save(key, executor):
+                    fetched += 1
+                else:
+                    failed.append(key)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                results = await asyncio.gather(*(worker(executor) for _ in range(self.concurrency)))
+        finally:
+            self.flush()
+
+        if failed:
+            print(f"Failed: {sorted(failed)} - re-run to retry them")
+        else:
+            self.prune_stale_files()
+        return sum(results)
+
+    async def run_concurrent_async(self, num_pages=NUM_PAGES):
+        """Fetch pages with up to `concurrency` requests in flight"""
+        return await self.fetch_keys_async(self.pending_pages(num_pages))
+
+    def run_concurrent(self, num_pages=NUM_PAGES):
+        """Blocking wrapper around run_concurrent_async"""
+        return asyncio.run(self.run_concurrent_async(num_pages))
+
+    def close(self):
+        self.flush()
+        self.manifest.close()
+        self.session.close()
+        if self.cache is not None:
+            print(self.cache.report())
+            self.cache.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fetch game pages from the RAWG API")
+    parser.add_argument("--pages", type=int, default=NUM_PAGES, help="Number of pages to fetch")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE, help="Games per page")
+    parser.add_argument("--concurrent", action="store_true", help="Keep several pages in flight at once")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Pages in flight in concurrent mode")
+    parser.add_argument("--rps", type=float, default=REQUESTS_PER_SECOND, help="Requests-per-second budget")
+    parser.add_argument("--base-url", default=BASE_URL, help="API endpoint (point at a local stub for testing)")
+    parser.add_argument("--output-dir", default=str(OUTPUT_DIR), help="Where raw pages are written")
+    parser.add_argument("--manifest", default=None, help="Crawl manifest used to resume runs")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Start a new crawl instead of resuming: every page is fetched again")
+    parser.add_argument("--max-retries", type=int, default=MAX_RETRIES, help="Retries per page on transient errors")
+    parser.add_argument("--format", choices=["ndjson", "json"], default=RAW_FORMAT, help="Raw storage format")
+    parser.add_argument("--compression", choices=["gzip", "zstd", "none"], default=COMPRESSION,
+                        help="Compression of NDJSON segments")
+    parser.add_argument("--segment-pages", type=int, default=SEGMENT_PAGES, help="Pages per NDJSON segment")
+    parser.add_argument("--cache-ttl", type=float, default=CACHE_TTL,
+                        help="Seconds a cached response is reused before it is revalidated")
+    parser.add_argument("--no-cache", action="store_true", help="Always download pages in full")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    API_KEY = os.getenv("RAWG_API_KEY")
+    if not API_KEY:
+        raise ValueError("RAWG_API_KEY is not set in the .env file.")
+
+    args = parse_args()
+    fetcher = RAWGFetcher(
+        API_KEY,
+        base_url=args.base_url,
+        output_dir=args.output_dir,
+        page_size=args.page_size,
+        concurrency=args.concurrency,
+        requests_per_second=args.rps,
+        manifest_path=args.manifest,
+        max_retries=args.max_retries,
+        raw_format=args.format,
+        compression=args.compression,
+        segment_pages=args.segment_pages,
+        cache_ttl=args.cache_ttl,
+        use_cache=not args.no_cache,
+        fresh=args.fresh
+    )
+
+    try:
+        if args.concurrent:
+            fetched = fetcher.run_concurrent(args.pages)
+        else:
+            fetched = fetcher.run_sequential(args.pages)
+        print(f"Fetched {fetched} pages, manifest status: {fetcher.manifest.summary()}")
+    finally:
+        fetcher.close()
@@ -0,0 +1,42 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """Token-bucket rate limiter shared by all fetch workers"""
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0 requests per second")
+
+        self.rate = float(rate)
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take one token and return how long the caller has to wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+            # Tokens may go negative: every caller gets its own slot in the queue
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        """Block the current thread until a request may be sent"""
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """Wait on the event loop until a request may be sent"""
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
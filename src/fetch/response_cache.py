@@ -0,0 +1,133 @@
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+
+CACHE_TTL = 6 * 60 * 60  # Seconds a cached response is served without asking the API
+
+# Query parameters that must never end up in a cache key (or on disk)
+SECRET_PARAMS = {"key"}
+
+
+class CachedResponse:
+    def __init__(self, body, etag, last_modified, stored_at):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+    def is_fresh(self, ttl):
+        return time.time() - self.stored_at < ttl
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class ResponseCache:
+    """Persistent HTTP response cache with TTLs and ETag/Last-Modified revalidation"""
+
+    def __init__(self, path, ttl=CACHE_TTL):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.stats = {
+            'hits': 0,           # Served from disk without a request
+            'revalidated': 0,    # Server answered 304 Not Modified
+            'misses': 0,         # Full download
+            'bytes_saved': 0     # Response bytes we did not have to download
+        }
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                cache_key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                body BLOB NOT NULL
+            )
+        ''')
+        self._conn.commit()
+
+    @staticmethod
+    def cache_key(url, params):
+        """Stable key for a request, ignoring the API key"""
+        public_params = sorted((k, str(v)) for k, v in (params or {}).items() if k not in SECRET_PARAMS)
+        return hashlib.sha256(json.dumps([url, public_params]).encode('utf-8')).hexdigest()
+
+    def lookup(self, url, params):
+        """Cached response for a request, fresh or stale, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses WHERE cache_key = ?",
+                (self.cache_key(url, params),)
+            ).fetchone()
+
+        if row is None:
+            return None
+        body, etag, last_modified, stored_at = row
+        return CachedResponse(zlib.decompress(body), etag, last_modified, stored_at)
+
+    def fresh(self, url, params):
+        """Cached response if it is still within its TTL, counting it as a hit"""
+        cached = self.lookup(url, params)
+        if cached is None or not cached.is_fresh(self.ttl):
+            return None
+
+        self._count('hits', len(cached.body))
+        return cached
+
+    @staticmethod
+    def conditional_headers(cached):
+        """Headers that let the server answer 304 if our copy is still current"""
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+        return headers
+
+    def store(self, url, params, response):
+        """Save a 200 response"""
+        self._count('misses')
+        self._save(url, params, response.content,
+                   response.headers.get('ETag'), response.headers.get('Last-Modified'))
+
+    def revalidated(self, url, params, cached, response):
+        """Our copy is still current: restart its TTL and return it"""
+        self._count('revalidated', len(cached.body))
+        self._save(url, params, cached.body,
+                   response.headers.get('ETag', cached.etag),
+                   response.headers.get('Last-Modified', cached.last_modified))
+        return cached
+
+    def _save(self, url, params, body, etag, last_modified):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (self.cache_key(url, params), url, etag, last_modified, time.time(), zlib.compress(body))
+            )
+            self._conn.commit()
+
+    def _count(self, stat, bytes_saved=0):
+        with self._lock:
+            self.stats[stat] += 1
+            self.stats['bytes_saved'] += bytes_saved
+
+    def report(self):
+        """One-line summary of cache effectiveness"""
+        stats = self.stats
+        requests_made = stats['revalidated'] + stats['misses']
+        return (f"Cache: {stats['hits']} hits, {stats['revalidated']} revalidated (304), "
+                f"{stats['misses']} misses, {requests_made} requests sent, "
+                f"{stats['bytes_saved'] / 1024:.1f} KiB not downloaded")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,255 @@
+import json
+import asyncio
+import argparse
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+from query_service import QueryService
+
+WORKERS = 8  # Threads running database calls; also the size of the connection pool
+PER_PAGE = 20
+MAX_PER_PAGE = 100
+IDLE_TIMEOUT = 30  # Seconds a keep-alive connection may sit between requests
+MAX_HEADERS = 100
+
+LIST_COLUMNS = """
+    g.id, g.name, g.slug, g.released, g.rating, g.ratings_count, g.metacritic,
+    g.primary_genre, g.primary_platform
+"""
+
+DETAIL_QUERIES = {
+    'genres': """
+        SELECT ge.id, ge.name, ge.slug FROM game_genres gg
+        JOIN genres ge ON ge.id = gg.genre_id WHERE gg.game_id = ? ORDER BY ge.name
+    """,
+    'platforms': """
+        SELECT p.id, p.name, p.slug FROM game_platforms gp
+        JOIN platforms p ON p.id = gp.platform_id WHERE gp.game_id = ? ORDER BY p.name
+    """,
+    'stores': """
+        SELECT s.id, s.name, s.slug FROM game_stores gs
+        JOIN stores s ON s.id = gs.store_id WHERE gs.game_id = ? ORDER BY s.name
+    """,
+    'tags': """
+        SELECT t.id, t.name, t.slug, t.language FROM game_tags gt
+        JOIN tags t ON t.id = gt.tag_id AND t.language IS gt.tag_language
+        WHERE gt.game_id = ? ORDER BY t.name
+    """,
+    'ratings': """
+        SELECT rating_id, rating_title, rating_count, rating_percent FROM game_ratings_detail
+        WHERE game_id = ? ORDER BY rating_id
+    """
+}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+class NotFound(LookupError):
+    pass
+
+
+def int_param(params, name, default, minimum=None, maximum=None):
+    value = params.get(name, [None])[0]
+    if value in (None, ''):
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer")
+    if minimum is not None and value < minimum:
+        raise BadRequest(f"{name} must be at least {minimum}")
+    return min(value, maximum) if maximum is not None else value
+
+
+def parse_cursor(value):
+    """Keyset cursor "rating:id" -> (rating, id)"""
+    try:
+        rating, game_id = value.split(':')
+        return float(rating), int(game_id)
+    except ValueError:
+        raise BadRequest("after must look like <rating>:<id>")
+
+
+class GameAPI:
+    """Read-only JSON API over the games database
+
+    GET /games               best-rated first; filters genre, platform (name or slug), year
+                             page/per_page for numbered pages, or after=<rating>:<id>
+                             (the next_after of the previous page) for keyset pages
+    GET /games/<id>          one game with its genres, platforms, stores, tags and ratings
+    GET /search?q=...        ranked full-text search (limit, exact=1 for whole words)
+
+    Requests are parsed on the event loop; every database call runs on a worker
+    thread, through the cached, pooled QueryService.
+    """
+
+    def __init__(self, db_path="../db/games.db", workers=WORKERS):
+        self.service = QueryService(db_path, pool_size=workers)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='game-api')
+
+    def list_games(self, params):
+        per_page = int_param(params, 'per_page', PER_PAGE, 1, MAX_PER_PAGE)
+        conditions = ["g.rating IS NOT NULL"]
+        args = []
+
+        genre = params.get('genre', [None])[0]
+        if genre:
+            conditions.append("""g.id IN (SELECT gg.game_id FROM genres ge
+                JOIN game_genres gg ON gg.genre_id = ge.id WHERE ge.slug = ? OR ge.name = ?)""")
+            args += [genre, genre]
+        platform = params.get('platform', [None])[0]
+        if platform:
+            conditions.append("""g.id IN (SELECT gp.game_id FROM platforms p
+                JOIN game_platforms gp ON gp.platform_id = p.id WHERE p.slug = ? OR p.name = ?)""")
+            args += [platform, platform]
+        year = int_param(params, 'year', None)
+        if year is not None:
+            conditions.append("g.release_year = ?")
+            args.append(year)
+
+        result = {'per_page': per_page}
+        after = params.get('after', [None])[0]
+        if after:
+            # Keyset page: seek straight past the last game of the previous page,
+            # so page 1000 costs the same as page 1
+            rating, game_id = parse_cursor(after)
+            conditions.append("(g.rating, g.id) < (?, ?)")
+            args += [rating, game_id]
+            offset = 0
+        else:
+            page = int_param(params, 'page', 1, 1)
+            offset = (page - 1) * per_page
+            where = ' AND '.join(conditions)
+            result['page'] = page
+            result['total'] = self.service.query(f"SELECT COUNT(*) AS total FROM games g WHERE {where}",
+                                                 args)[0]['total']
+
+        where = ' AND '.join(conditions)
+        games = self.service.query(f"""
+            SELECT {LIST_COLUMNS} FROM games g
+            WHERE {where}
+            ORDER BY g.rating DESC, g.id DESC
+            LIMIT ? OFFSET ?
+        """, args + [per_page, offset])
+
+        result['games'] = games
+        result['next_after'] = (f"{games[-1]['rating']}:{games[-1]['id']}"
+                                if len(games) == per_page else None)
+        return result
+
+    def game_detail(self, game_id):
+        rows = self.service.query("SELECT * FROM games WHERE id = ?", (game_id,))
+        if not rows:
+            raise NotFound(f"game {game_id} not found")
+        game = rows[0]
+        for key, sql in DETAIL_QUERIES.items():
+            game[key] = self.service.query(sql, (game_id,))
+        return game
+
+    def search(self, params):
+        text = params.get('q', [''])[0].strip()
+        if not text:
+            raise BadRequest("q is required")
+        limit = int_param(params, 'limit', PER_PAGE, 1, MAX_PER_PAGE)
+        exact = params.get('exact', ['0'])[0] in ('1', 'true')
+        return {'query': text, 'games': self.service.search(text, limit, prefix=not exact)}
+
+    def dispatch(self, method, target):
+        """(status, JSON body) for one request; runs on a worker thread"""
+        url = urlsplit(target)
+        params = parse_qs(url.query)
+        parts = [part for part in url.path.split('/') if part]
+
+        try:
+            if method not in ('GET', 'HEAD'):
+                status, payload = HTTPStatus.METHOD_NOT_ALLOWED, {'error': f"{method} not allowed"}
+            elif parts == ['games']:
+                status, payload = HTTPStatus.OK, self.list_games(params)
+            elif len(parts) == 2 and parts[0] == 'games':
+                if not parts[1].isdigit():
+                    raise NotFound(f"game {parts[1]} not found")
+                status, payload = HTTPStatus.OK, self.game_detail(int(parts[1]))
+            elif parts == ['search']:
+                status, payload = HTTPStatus.OK, self.search(params)
+            else:
+                raise NotFound(f"no route for {url.path}")
+        except BadRequest as e:
+            status, payload = HTTPStatus.BAD_REQUEST, {'error': str(e)}
+        except NotFound as e:
+            status, payload = HTTPStatus.NOT_FOUND, {'error': str(e)}
+        except Exception as e:
+            print(f"❌ {method} {target}: {e}")
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'internal error'}
+
+        return status, json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one connection until the client closes it or goes idle"""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+
+                headers = {}
+                for _ in range(MAX_HEADERS):
+                    line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+
+                status, body = await loop.run_in_executor(self.executor, self.dispatch, method, target)
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1')
+                )
+                if method != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+        print(f"✓ Serving games API on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown()
+        self.service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read-only HTTP API over the games database")
+    parser.add_argument("--db", default="../db/games.db", help="SQLite database to serve")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Threads running database calls")
+    args = parser.parse_args()
+
+    api = GameAPI(args.db, args.workers)
+    try:
+        asyncio.run(api.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.close()
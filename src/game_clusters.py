@@ -0,0 +1,245 @@
+import os
+import time
+import sqlite3
+import argparse
+import numpy as np
+import scipy.sparse as sp
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from bulk_loader import BulkLoader
+from database_schema import CLUSTER_TABLES
+from recommender import FeatureSpace
+
+CLUSTERS = 40
+CHUNK_SIZE = 20000  # Games read from the database per chunk
+BATCH_SIZE = 2048  # Games per k-means update
+EPOCHS = 3
+TOP_FEATURES = 5  # Strongest centroid features stored as a cluster's description
+SEED = 42
+
+
+def chunk_ranges(conn, chunk_size):
+    """Inclusive (first id, last id) ranges of chunk_size games each"""
+    starts = [row[0] for row in conn.execute("""
+        SELECT id FROM (SELECT id, ROW_NUMBER() OVER (ORDER BY id) - 1 AS position FROM games)
+        WHERE position % ? = 0
+        ORDER BY id
+    """, (chunk_size,))]
+    if not starts:
+        return []
+    last_id = conn.execute("SELECT MAX(id) FROM games").fetchone()[0]
+    return [(first, next_first - 1) for first, next_first in zip(starts, starts[1:])] + [(starts[-1], last_id)]
+
+
+def _chunk_features(job):
+    """Feature rows of one id range; runs in a worker process"""
+    db_path, space_arrays, id_range = job
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return FeatureSpace.from_arrays(space_arrays).transform(conn, id_range=id_range)
+    finally:
+        conn.close()
+
+
+def _assign_chunk(job):
+    """(game ids, cluster ids, similarities) for one id range; runs in a worker process"""
+    db_path, space_arrays, id_range, centroids = job
+    ids, matrix = _chunk_features((db_path, space_arrays, id_range))
+    similarities = np.asarray(matrix @ centroids.T)
+    labels = similarities.argmax(axis=1)
+    return ids, labels, similarities[np.arange(len(labels)), labels]
+
+
+def run_jobs(function, jobs, workers):
+    """Yield function(job) in job order; at most 2 x workers results are held at once"""
+    if workers == 1:
+        for job in jobs:
+            yield function(job)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for job in jobs:
+            pending.append(executor.submit(function, job))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class GameClusterer:
+    """Mini-batch spherical k-means over game feature rows streamed from the database
+
+    Games are read in id-range chunks (built in worker processes), so memory is
+    bounded by the chunk size rather than the catalogue. Every mini-batch moves
+    each centroid toward the mean of the games assigned to it, with a step that
+    shrinks as the centroid absorbs more games. The final assignments go into
+    game_clusters, and a short description of every cluster into clusters.
+    """
+
+    def __init__(self, db_path="../db/games.db", clusters=CLUSTERS, chunk_size=CHUNK_SIZE,
+                 batch_size=BATCH_SIZE, epochs=EPOCHS, workers=1):
+        self.db_path = db_path
+        self.clusters = clusters
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.epochs = epochs
+        self.workers = workers
+        self.rng = np.random.default_rng(SEED)
+
+    def chunk_jobs(self, ranges):
+        return [(self.db_path, self.space_arrays, id_range) for id_range in ranges]
+
+    def update(self, centroids, counts, batch):
+        """One mini-batch step; centroids stay unit length"""
+        labels = np.asarray((batch @ centroids.T).argmax(axis=1)).ravel()
+        members = sp.csr_matrix((np.ones(len(labels)), (labels, np.arange(len(labels)))),
+                                shape=(len(centroids), len(labels)))
+        sums = np.asarray((members @ batch).todense())
+        batch_counts = np.bincount(labels, minlength=len(centroids))
+
+        counts += batch_counts
+        moved = batch_counts > 0
+        # Running mean: c += (sum - n * c) / total_count
+        centroids[moved] += (sums[moved] - batch_counts[moved, None] * centroids[moved]) / counts[moved, None]
+        norms = np.linalg.norm(centroids[moved], axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        centroids[moved] /= norms
+
+    def seed_centroids(self, conn, ranges):
+        """Feature rows of distinct random games, drawn from the whole catalogue
+
+        Returns fewer than self.clusters rows when there are not that many distinct games.
+        """
+        games = conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+        # A few candidates per cluster, so games with identical features can be skipped
+        positions = np.sort(self.rng.choice(games, min(games, 4 * self.clusters), replace=False))
+        # Every chunk but the last holds exactly chunk_size games
+        game_ids = [conn.execute("SELECT id FROM games WHERE id BETWEEN ? AND ? ORDER BY id LIMIT 1 OFFSET ?",
+                                 ranges[position // self.chunk_size] + (int(position % self.chunk_size),)
+                                 ).fetchone()[0]
+                    for position in positions.tolist()]
+
+        _, matrix = FeatureSpace.from_arrays(self.space_arrays).transform(conn, game_ids)
+        rows = matrix.toarray()
+        rows = rows[rows.any(axis=1)]
+        _, first = np.unique(rows, axis=0, return_index=True)
+        distinct = rows[np.sort(first)]
+        return distinct[self.rng.permutation(len(distinct))[:self.clusters]]
+
+    def fit(self, ranges, centroids):
+        counts = np.zeros(len(centroids))
+        for epoch in range(self.epochs):
+            start = time.perf_counter()
+            order = self.rng.permutation(len(ranges))
+            for ids, matrix in run_jobs(_chunk_features, self.chunk_jobs([ranges[i] for i in order]), self.workers):
+                rows = self.rng.permutation(matrix.shape[0])
+                for batch_start in range(0, len(rows), self.batch_size):
+                    self.update(centroids, counts, matrix[rows[batch_start:batch_start + self.batch_size]])
+
+            # Clusters nothing was assigned to restart from random games
+            if epoch < self.epochs - 1 and (counts == 0).any():
+                empty = np.flatnonzero(counts == 0)
+                ids, matrix = _chunk_features(self.chunk_jobs([ranges[self.rng.integers(len(ranges))]])[0])
+                seeds = self.rng.choice(matrix.shape[0], min(len(empty), matrix.shape[0]), replace=False)
+                centroids[empty[:len(seeds)]] = matrix[seeds].toarray()
+            print(f"✓ Epoch {epoch + 1}/{self.epochs}: {time.perf_counter() - start:.1f}s")
+        return centroids
+
+    def describe(self, centroids):
+        """Names of each centroid's strongest features"""
+        names = self.space_arrays['feature_names']
+        top = np.argsort(-centroids, axis=1)[:, :TOP_FEATURES]
+        return [', '.join(str(names[i]) for i in row if centroids[cluster, i] > 0)
+                for cluster, row in enumerate(top)]
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self.space_arrays = FeatureSpace.fit(conn).arrays()
+            ranges = chunk_ranges(conn, self.chunk_size)
+            seeds = self.seed_centroids(conn, ranges) if ranges else None
+        finally:
+            conn.close()
+        if not ranges:
+            print("❌ No games to cluster")
+            return False
+        if len(seeds) == 0:
+            print("❌ No game has any genre, tag, platform or rating features to cluster on")
+            return False
+        if len(seeds) < self.clusters:
+            print(f"⚠️  Only {len(seeds)} distinct games to start clusters from; "
+                  f"clustering into {len(seeds)} instead of {self.clusters}")
+            self.clusters = len(seeds)
+
+        print(f"Clustering into {self.clusters} clusters: {len(ranges)} chunks, {self.workers} workers...")
+        centroids = self.fit(ranges, seeds).astype(np.float32)
+
+        # Assignments are computed before the write transaction opens: worker processes
+        # cannot read the database while it is locked for writing. Only three numbers
+        # per game are kept, not their feature rows.
+        start = time.perf_counter()
+        jobs = [job + (centroids,) for job in self.chunk_jobs(ranges)]
+        chunks = list(run_jobs(_assign_chunk, jobs, self.workers))
+        ids, labels, similarities = (np.concatenate(arrays) for arrays in zip(*chunks))
+        sizes = np.bincount(labels, minlength=len(centroids))
+        similarity_sums = np.bincount(labels, weights=similarities, minlength=len(centroids))
+        averages = np.divide(similarity_sums, sizes, out=np.zeros(len(sizes)), where=sizes > 0)
+        print(f"✓ Assigned {len(ids):,} games: {time.perf_counter() - start:.1f}s")
+
+        conn = sqlite3.connect(self.db_path)
+        bulk = BulkLoader(conn)
+        try:
+            # Analysts see either the previous clustering or the complete new one
+            with bulk.transaction():
+                for table_sql in CLUSTER_TABLES.values():
+                    conn.execute(table_sql)
+                bulk.clear(['game_clusters', 'clusters'])
+                with bulk.phase('clusters'):
+                    bulk.insert_rows('clusters', ['id', 'games', 'avg_similarity', 'top_features'],
+                                     zip(range(len(centroids)), sizes.tolist(), averages.tolist(),
+                                         self.describe(centroids)))
+                with bulk.phase('game_clusters'):
+                    bulk.insert_rows('game_clusters', ['game_id', 'cluster_id', 'similarity'],
+                                     zip(ids.tolist(), labels.tolist(), similarities.tolist()))
+        except Exception as e:
+            print(f"ERROR writing clusters, previous clusters kept: {e}")
+            return False
+        finally:
+            conn.close()
+
+        print(f"✓ {int(sizes.sum()):,} games assigned to {int((sizes > 0).sum())} clusters "
+              f"(mean similarity to centroid {similarity_sums.sum() / max(sizes.sum(), 1):.3f})")
+        if (sizes == 0).any():
+            print(f"⚠️  {int((sizes == 0).sum())} of {len(sizes)} clusters ended up without games")
+        print(bulk.timing_report())
+        return True
+
+
+def print_clusters(db_path, limit=10):
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        print("\n=== LARGEST CLUSTERS ===")
+        for cluster_id, games, similarity, features in conn.execute(
+                "SELECT id, games, avg_similarity, top_features FROM clusters ORDER BY games DESC LIMIT ?", (limit,)):
+            print(f"- #{cluster_id}: {games} games (similarity {similarity:.2f}) | {features}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cluster games by genre, tag, platform and rating features")
+    parser.add_argument("--db", default="../db/games.db", help="SQLite database to read and write")
+    parser.add_argument("--clusters", type=int, default=CLUSTERS, help="Number of clusters")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Games read per chunk")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Games per k-means update")
+    parser.add_argument("--epochs", type=int, default=EPOCHS, help="Passes over all games")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes building feature chunks (0 = one per CPU core)")
+    args = parser.parse_args()
+
+    clusterer = GameClusterer(args.db, args.clusters, args.chunk_size, args.batch_size, args.epochs,
+                              args.workers or os.cpu_count() or 1)
+    if clusterer.run():
+        print_clusters(args.db)
@@ -0,0 +1,147 @@
+import re
+import sqlite3
+import argparse
+from pathlib import Path
+
+from database_schema import SEARCH_INDEX_SQL
+
+# bm25 weights for the games_fts columns: name, slug, genres, platforms, tags, game_id
+COLUMN_WEIGHTS = (10.0, 5.0, 2.0, 1.0, 1.0, 0.0)
+
+# Matches that get a full relevance score. Broader queries ("the", "ga*") are first
+# narrowed to their most-rated matches, so a lookup costs the same at any table size.
+CANDIDATE_LIMIT = 1000
+
+# games_fts rowid for a game: most-rated games get the smallest rowids, and the
+# game id in the low 32 bits keeps rowids unique. FTS5 returns matches in rowid
+# order, so "the first N matches" are the N most-rated ones.
+SEARCH_ROWID_SQL = "(((16777215 - min(coalesce(g.ratings_count, 0), 16777215)) << 32) + g.id)"
+
+# Each game's searchable text, built from the games table and its junction tables
+SEARCH_ROWS_SQL = f"""
+    SELECT {SEARCH_ROWID_SQL}, g.name, g.slug,
+        (SELECT group_concat(ge.name, ' ') FROM game_genres gg
+            JOIN genres ge ON ge.id = gg.genre_id WHERE gg.game_id = g.id),
+        (SELECT group_concat(p.name, ' ') FROM game_platforms gp
+            JOIN platforms p ON p.id = gp.platform_id WHERE gp.game_id = g.id),
+        (SELECT group_concat(t.name, ' ') FROM game_tags gt
+            JOIN tags t ON t.id = gt.tag_id WHERE gt.game_id = g.id),
+        g.id
+    FROM games g
+"""
+
+SEARCH_COLUMNS = "rowid, name, slug, genres, platforms, tags, game_id"
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+MIN_PREFIX_LENGTH = 2
+
+
+def rebuild_search_index(conn):
+    """Refill games_fts from scratch (after a full load); returns the number of games indexed"""
+    conn.execute(SEARCH_INDEX_SQL)
+    conn.execute("DELETE FROM games_fts")
+    # In rowid order, so FTS5 appends to its doclists instead of merging out-of-order rows
+    conn.execute(f"INSERT INTO games_fts ({SEARCH_COLUMNS}) {SEARCH_ROWS_SQL} ORDER BY 1")
+    # Merge the freshly written segments so queries touch one b-tree
+    conn.execute("INSERT INTO games_fts (games_fts) VALUES ('optimize')")
+    return conn.execute("SELECT COUNT(*) FROM games_fts").fetchone()[0]
+
+
+def remove_from_search_index(conn, game_ids_sql):
+    """Drop the games selected by game_ids_sql (a SELECT returning ids) from games_fts
+
+    Must run before those games are updated: their rowids come from the stored rows.
+    """
+    conn.execute(SEARCH_INDEX_SQL)
+    conn.execute(f"""
+        DELETE FROM games_fts WHERE rowid IN (
+            SELECT {SEARCH_ROWID_SQL} FROM games g WHERE g.id IN ({game_ids_sql})
+        )
+    """)
+
+
+def add_to_search_index(conn, game_ids_sql):
+    """Index the current rows of the games selected by game_ids_sql; returns how many"""
+    conn.execute(f"INSERT INTO games_fts ({SEARCH_COLUMNS}) {SEARCH_ROWS_SQL} WHERE g.id IN ({game_ids_sql})")
+    return conn.execute(f"SELECT COUNT(*) FROM games WHERE id IN ({game_ids_sql})").fetchone()[0]
+
+
+def match_expression(query, prefix=True):
+    """Turn free text into an FTS5 MATCH expression that cannot contain query syntax
+
+    Every word becomes a quoted phrase, so input like 'C++' or 'a"b' is safe;
+    with prefix=True each word also matches longer words starting with it.
+    Single characters stay whole words: as prefixes they would match most of
+    the vocabulary, and games_fts only keeps prefix indexes for 2-3 characters.
+    """
+    tokens = TOKEN_PATTERN.findall(query)
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' if prefix and len(token) >= MIN_PREFIX_LENGTH else f'"{token}"'
+                    for token in tokens)
+
+
+def search_games(conn, query, limit=20, prefix=True, candidate_limit=CANDIDATE_LIMIT):
+    """Best matches for a query: name hits first, then slug, genre, platform and tag hits
+
+    A game named exactly like the query always comes first; relevance ties go
+    to the more-rated game.
+    """
+    expression = match_expression(query, prefix)
+    if expression is None:
+        return []
+
+    # Rowid of the candidate_limit-th most-rated match; None if there are fewer matches
+    cutoff = conn.execute(
+        "SELECT rowid FROM games_fts WHERE games_fts MATCH ? ORDER BY rowid LIMIT 1 OFFSET ?",
+        (expression, candidate_limit - 1)
+    ).fetchone()
+    bound = "AND rowid <= ?" if cutoff else ""
+    params = [query.strip(), expression] + ([cutoff[0]] if cutoff else []) + [limit]
+
+    weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+    rows = conn.execute(f"""
+        SELECT g.id, g.name, g.slug, g.released, g.rating, g.ratings_count,
+               g.primary_genre, g.primary_platform, hits.score
+        FROM (
+            SELECT rowid AS search_rowid, game_id, bm25(games_fts, {weights}) AS score,
+                   name = ? COLLATE NOCASE AS exact
+            FROM games_fts
+            WHERE games_fts MATCH ? {bound}
+            ORDER BY exact DESC, score, rowid
+            LIMIT ?
+        ) hits
+        JOIN games g ON g.id = hits.game_id
+        ORDER BY hits.exact DESC, hits.score, hits.search_rowid
+    """, params).fetchall()
+    return [dict(row) for row in rows]
+
+
+class GameSearch:
+    """Ranked full-text game search over games_fts"""
+
+    def __init__(self, db_path="../db/games.db", candidate_limit=CANDIDATE_LIMIT):
+        self.db_path = Path(db_path)
+        self.candidate_limit = candidate_limit
+        self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+
+    def search(self, query, limit=20, prefix=True):
+        """Best matches for a query (see search_games)"""
+        return search_games(self.conn, query, limit, prefix, self.candidate_limit)
+
+    def close(self):
+        self.conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search games by name, slug, genre, platform or tag")
+    parser.add_argument("query", help="Words to search for; each word also matches as a prefix")
+    parser.add_argument("--db", default="../db/games.db", help="SQLite database to search")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum number of results")
+    parser.add_argument("--exact", action="store_true", help="Match whole words only")
+    args = parser.parse_args()
+
+    search = GameSearch(args.db)
+    for game in search.search(args.query, args.limit, prefix=not args.exact):
+        print(f"- {game['name']} ({game['released']}) | Rating: {game['rating']} | {game['primary_genre']}")
+    search.close()
@@ -0,0 +1,313 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+WORKLOAD_PATH = Path("index_workload.sql")
+REPEATS = 5  # Timed runs per query; the median is reported
+MIN_SPEEDUP = 1.2  # A candidate has to make its query at least this much faster
+MAX_INDEX_COLUMNS = 6
+
+RANGE_OPERATORS = {'>', '<', '>=', '<=', 'BETWEEN', 'IS NOT NULL', 'LIKE'}
+EQUALITY_OPERATORS = {'=', '==', 'IN', 'IS', 'IS NULL'}
+
+TABLE_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|JOIN\b|LEFT\b|INNER\b|CROSS\b|GROUP\b|ORDER\b|LIMIT\b)(\w+))?",
+                           re.IGNORECASE)
+COLUMN_PATTERN = re.compile(r"\b(?:(\w+)\.)?(\w+)\b")
+TERM_PATTERN = re.compile(
+    r"^\(?\s*(?:(\w+)\.)?(\w+)\s*(IS NOT NULL|IS NULL|BETWEEN|LIKE|IN|IS|==|>=|<=|=|>|<)\s*(.*?)\)?\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+LITERAL_PATTERN = re.compile(r"^(-?\d+(\.\d+)?|'[^']*')$")
+
+
+def read_workload(path):
+    """Queries from a workload file: ';'-separated, '--' comments ignored"""
+    text = Path(path).read_text(encoding='utf-8')
+    text = re.sub(r"--[^\n]*", "", text)
+    return [' '.join(query.split()) for query in text.split(';') if query.strip()]
+
+
+def clause(query, start, ends):
+    """Text of one clause, e.g. clause(q, 'WHERE', ['GROUP BY', 'ORDER BY', 'LIMIT'])"""
+    match = re.search(rf"\b{start}\b(.*)", query, re.IGNORECASE | re.DOTALL)
+    if not match:
+        return ''
+    text = match.group(1)
+    for end in ends:
+        text = re.split(rf"\b{end}\b", text, flags=re.IGNORECASE)[0]
+    return text.strip()
+
+
+class QueryShape:
+    """Which columns of which tables a query filters, joins, sorts and reads"""
+
+    def __init__(self, query, schema_columns):
+        self.query = query
+        self.aliases = {}
+        for table, alias in TABLE_PATTERN.findall(query):
+            if table in schema_columns:
+                self.aliases[table] = table
+                if alias:
+                    self.aliases[alias] = table
+        self.tables = sorted(set(self.aliases.values()))
+        self.schema_columns = schema_columns
+
+        self.equality = {table: [] for table in self.tables}
+        self.ranges = {table: [] for table in self.tables}
+        self.partial_terms = {table: [] for table in self.tables}
+        self.order = {table: [] for table in self.tables}
+        self.referenced = {table: [] for table in self.tables}
+
+        for qualifier, column in COLUMN_PATTERN.findall(query):
+            table = self.resolve(qualifier, column)
+            if table and column not in self.referenced[table]:
+                self.referenced[table].append(column)
+
+        where = clause(query, 'WHERE', ['GROUP BY', 'ORDER BY', 'LIMIT', 'HAVING'])
+        join_terms = re.findall(r"\bON\b(.*?)(?=\bJOIN\b|\bWHERE\b|\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|$)",
+                                query, re.IGNORECASE | re.DOTALL)
+        for text in [where] + join_terms:
+            for term in re.split(r"\bAND\b", text, flags=re.IGNORECASE):
+                self.add_term(term.strip())
+
+        order_text = clause(query, 'ORDER BY', ['LIMIT']) or clause(query, 'GROUP BY', ['HAVING', 'ORDER BY', 'LIMIT'])
+        for item in order_text.split(','):
+            match = COLUMN_PATTERN.match(item.strip())
+            if match:
+                table = self.resolve(*match.groups())
+                if table:
+                    self.order[table].append(match.group(2))
+
+    def resolve(self, qualifier, column):
+        """Table a (possibly unqualified) column reference belongs to"""
+        if qualifier:
+            table = self.aliases.get(qualifier)
+            return table if table and column in self.schema_columns[table] else None
+        owners = [table for table in self.tables if column in self.schema_columns[table]]
+        return owners[0] if len(owners) == 1 else None
+
+    def add_term(self, term):
+        match = TERM_PATTERN.match(term)
+        if not match:
+            return
+        qualifier, column, operator, operand = match.groups()
+        table = self.resolve(qualifier, column)
+        if not table:
+            return
+        operator = ' '.join(operator.upper().split())
+
+        if operator in EQUALITY_OPERATORS:
+            if column not in self.equality[table]:
+                self.equality[table].append(column)
+        elif operator in RANGE_OPERATORS and column not in self.ranges[table]:
+            self.ranges[table].append(column)
+
+        # NULL checks and constant ranges can become the WHERE of a partial index. Equality
+        # with a literal is left out: an index for one genre or platform fits only that value.
+        if operator in ('IS NOT NULL', 'IS NULL') or (
+                operator in RANGE_OPERATORS and LITERAL_PATTERN.match(operand.strip())):
+            self.partial_terms[table].append(f"{column} {operator} {operand.strip()}".strip())
+
+        # The other side of a join condition is an equality lookup on its own table
+        other = COLUMN_PATTERN.fullmatch(operand.strip())
+        if operator in ('=', '==') and other:
+            other_table = self.resolve(*other.groups())
+            if other_table and other.group(2) not in self.equality[other_table]:
+                self.equality[other_table].append(other.group(2))
+
+    def candidates(self):
+        """(table, columns, where) index proposals: composite, covering and partial"""
+        proposals = []
+        for table in self.tables:
+            equality = self.equality[table]
+            ranges = self.ranges[table]
+            order = [column for column in self.order[table] if column not in equality]
+
+            leading = []
+            if equality or order or ranges:
+                leading.append(equality + (order or ranges[:1]))
+                if order and ranges and ranges[0] not in order:
+                    leading.append(equality + ranges[:1])
+
+            for columns in leading:
+                proposals.append((table, columns, None))
+                covering = columns + [column for column in self.referenced[table] if column not in columns]
+                if covering != columns:
+                    proposals.append((table, covering, None))
+                for term in self.partial_terms[table]:
+                    proposals.append((table, columns, term))
+                    proposals.append((table, covering, term))
+
+        unique = []
+        for table, columns, where in proposals:
+            columns = list(dict.fromkeys(columns))[:MAX_INDEX_COLUMNS]
+            if columns and (table, columns, where) not in unique:
+                unique.append((table, columns, where))
+        return unique
+
+
+def index_sql(table, columns, where=None):
+    """CREATE INDEX statement with a stable name derived from its definition"""
+    definition = f"{table}({', '.join(columns)})" + (f" WHERE {where}" if where else "")
+    digest = hashlib.sha1(definition.encode('utf-8')).hexdigest()[:8]
+    kind = 'part' if where else 'cov' if len(columns) > 2 else 'comp'
+    name = f"adv_{table}_{'_'.join(columns)[:40]}_{kind}_{digest}"
+    return name, f"CREATE INDEX IF NOT EXISTS {name} ON {definition}"
+
+
+class IndexAdvisor:
+    """Replay a query workload, try candidate indexes on a scratch copy and report the winners"""
+
+    def __init__(self, db_path="../db/games.db", workload_path=WORKLOAD_PATH, repeats=REPEATS,
+                 min_speedup=MIN_SPEEDUP):
+        self.db_path = Path(db_path)
+        self.queries = read_workload(workload_path)
+        self.repeats = repeats
+        self.min_speedup = min_speedup
+
+        # Candidates are created and dropped on a scratch copy, never on the live database
+        fd, self.scratch_path = tempfile.mkstemp(suffix='.db', prefix='index_advisor_')
+        os.close(fd)
+        live = sqlite3.connect(self.db_path)
+        self.conn = sqlite3.connect(self.scratch_path)
+        live.backup(self.conn)
+        live.close()
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
+
+        self.schema_columns = {
+            table: {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            for (table,) in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        }
+
+    def plan(self, query):
+        return [row[3] for row in self.conn.execute(f"EXPLAIN QUERY PLAN {query}")]
+
+    def time_query(self, query):
+        """Median wall time in milliseconds over `repeats` runs, after one warm-up run"""
+        self.conn.execute(query).fetchall()
+        timings = []
+        for _ in range(self.repeats):
+            start = time.perf_counter()
+            self.conn.execute(query).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def existing_indexes(self, table):
+        """Column lists of the indexes a table already has"""
+        existing = []
+        for row in self.conn.execute(f"PRAGMA index_list({table})"):
+            existing.append([info[2] for info in self.conn.execute(f"PRAGMA index_info({row[1]})")])
+        return existing
+
+    def try_index(self, query, baseline, table, columns, where):
+        """Speedup a candidate gives a query, or None if the planner does not use it"""
+        name, sql = index_sql(table, columns, where)
+        self.conn.execute(sql)
+        self.conn.execute(f"ANALYZE {name}")
+        try:
+            if not any(name in step for step in self.plan(query)):
+                return None
+            return baseline / max(self.time_query(query), 1e-6)
+        finally:
+            self.conn.execute(f"DROP INDEX {name}")
+
+    def recommend(self):
+        """Best candidate per query, deduplicated across the workload"""
+        chosen = {}
+        self.baselines = []
+        for query in self.queries:
+            baseline = self.time_query(query)
+            plan = self.plan(query)
+            self.baselines.append((query, baseline, plan))
+
+            best = None
+            shape = QueryShape(query, self.schema_columns)
+            for table, columns, where in shape.candidates():
+                if where is None and columns in self.existing_indexes(table):
+                    continue
+                speedup = self.try_index(query, baseline, table, columns, where)
+                if speedup and speedup >= self.min_speedup and (best is None or speedup > best[0]):
+                    best = (speedup, table, columns, where)
+
+            if best:
+                name, sql = index_sql(*best[1:])
+                chosen[name] = sql
+        return chosen
+
+    def report(self, chosen):
+        """Apply the recommendations to the scratch copy and compare every query before/after"""
+        for sql in chosen.values():
+            self.conn.execute(sql)
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
+
+        results = []
+        for query, before_ms, before_plan in self.baselines:
+            results.append({
+                'query': query,
+                'before_ms': before_ms,
+                'after_ms': self.time_query(query),
+                'before_plan': before_plan,
+                'after_plan': self.plan(query)
+            })
+        return results
+
+    def apply(self, chosen):
+        """Create the recommended indexes in the live database"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                for sql in chosen.values():
+                    conn.execute(sql)
+                conn.execute("ANALYZE")
+        finally:
+            conn.close()
+
+    def close(self):
+        self.conn.close()
+        os.remove(self.scratch_path)
+
+
+def print_report(chosen, results):
+    print("\n=== RECOMMENDED INDEXES ===")
+    if not chosen:
+        print("✓ No index would speed up this workload")
+    for sql in chosen.values():
+        print(f"{sql};")
+
+    print("\n=== BEFORE / AFTER ===")
+    for i, result in enumerate(results, 1):
+        speedup = result['before_ms'] / max(result['after_ms'], 1e-6)
+        print(f"\nQ{i}: {result['query'][:100]}")
+        print(f"  {result['before_ms']:8.2f} ms -> {result['after_ms']:8.2f} ms  ({speedup:.1f}x)")
+        print(f"  before: {'; '.join(result['before_plan'])}")
+        print(f"  after:  {'; '.join(result['after_plan'])}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Propose composite, covering and partial indexes for a query workload")
+    parser.add_argument("--db", default="../db/games.db", help="SQLite database to analyze")
+    parser.add_argument("--workload", default=str(WORKLOAD_PATH), help="';'-separated SQL queries to replay")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="Timed runs per query")
+    parser.add_argument("--min-speedup", type=float, default=MIN_SPEEDUP,
+                        help="Only recommend indexes that make a query at least this much faster")
+    parser.add_argument("--apply", action="store_true", help="Create the recommended indexes in the database")
+    args = parser.parse_args()
+
+    advisor = IndexAdvisor(args.db, args.workload, args.repeats, args.min_speedup)
+    try:
+        print(f"Replaying {len(advisor.queries)} queries against a scratch copy of {args.db}...")
+        chosen = advisor.recommend()
+        print_report(chosen, advisor.report(chosen))
+        if args.apply and chosen:
+            advisor.apply(chosen)
+            print(f"\n✓ Created {len(chosen)} indexes in {args.db}")
+    finally:
+        advisor.close()
@@ -0,0 +1,33 @@
+-- Typical analysis queries, replayed by index_advisor.py. Separate queries with ';'.
+
+-- Best-rated games in one genre
+SELECT g.name, g.rating FROM games g
+JOIN game_genres gg ON gg.game_id = g.id
+WHERE gg.genre_id = 4 AND g.rating > 4
+ORDER BY g.rating DESC LIMIT 20;
+
+-- Best-rated games of one year and genre
+SELECT name, rating, metacritic FROM games
+WHERE release_year = 2015 AND primary_genre = 'Action'
+ORDER BY rating DESC LIMIT 20;
+
+-- Most-rated games on one platform
+SELECT g.name, g.ratings_count FROM game_platforms gp
+JOIN games g ON g.id = gp.game_id
+WHERE gp.platform_id = 4
+ORDER BY g.ratings_count DESC LIMIT 20;
+
+-- Rating vs metacritic
+SELECT name, metacritic, rating FROM games
+WHERE metacritic IS NOT NULL
+ORDER BY metacritic DESC LIMIT 50;
+
+-- Popular, excellent games
+SELECT name, slug, ratings_count FROM games
+WHERE rating_category = 'Excellent' AND popularity_category = 'Very Popular'
+ORDER BY ratings_count DESC LIMIT 50;
+
+-- Average rating per release year
+SELECT release_year, COUNT(*), AVG(rating) FROM games
+WHERE rating > 0
+GROUP BY release_year;
@@ -1,124 +1,309 @@
-import pandas as pd
+import sys
 import sqlite3
+import argparse
 from pathlib import Path
 
+from table_io import read_table
+from bulk_loader import BulkLoader, BATCH_SIZE, LOAD_PRAGMAS
+from database_schema import GameDatabaseSchema
+from game_search import rebuild_search_index, remove_from_search_index, add_to_search_index
+from aggregates import rebuild_aggregates, remove_aggregate_contributions, add_aggregate_contributions
+from db_publish import stage_database, discard_staging, validate_database, publish_database
+from similarity_index import update_similarity_index
+
+sys.path.append(str(Path(__file__).resolve().parent / "transform"))
+from transform_games import OUTPUT_COLUMNS
+
+# Tables emptied before a full load, children before the tables they reference
+LOAD_TABLES = [
+    'game_ratings_detail', 'game_tags', 'game_stores', 'game_platforms', 'game_genres',
+    'games', 'tags', 'stores', 'platforms', 'genres'
+]
+
+# Clustering output (game_clusters.py) describes the catalogue it was computed on. A
+# full load empties it along with the data, when the tables exist, so no cluster row
+# points at a game that is gone; re-run game_clusters.py afterwards
+CLUSTER_OUTPUT_TABLES = ['game_clusters', 'clusters']
+
+GAME_COLUMNS = OUTPUT_COLUMNS['games']
+
+# Database table -> (transformed table, its columns in the database table's column order)
+TABLE_SOURCES = {
+    'genres': ('genres_lookup', ['genre_id', 'genre_name', 'genre_slug']),
+    'platforms': ('platforms_lookup', ['platform_id', 'platform_name', 'platform_slug']),
+    'stores': ('stores_lookup', ['store_id', 'store_name', 'store_slug']),
+    'tags': ('game_tags', ['tag_id', 'tag_name', 'tag_slug', 'tag_language', 'tag_games_count']),
+    'games': ('games', GAME_COLUMNS),
+    'game_genres': ('game_genres', ['game_id', 'genre_id']),
+    'game_platforms': ('game_platforms', ['game_id', 'platform_id']),
+    'game_stores': ('game_stores', ['game_id', 'store_id']),
+    'game_tags': ('game_tags', ['game_id', 'tag_id', 'tag_language']),
+    'game_ratings_detail': ('game_ratings_detail',
+                            ['game_id', 'rating_id', 'rating_title', 'rating_count', 'rating_percent'])
+}
+
+# Database columns where they differ from the transformed table's names
+TABLE_COLUMNS = {
+    'genres': ['id', 'name', 'slug'],
+    'platforms': ['id', 'name', 'slug'],
+    'stores': ['id', 'name', 'slug'],
+    'tags': ['id', 'name', 'slug', 'language', 'games_count']
+}
+
+LOOKUP_TABLES = ['genres', 'platforms', 'stores', 'tags']
+
+# Per-game child table -> columns that identify one of its rows
+CHILD_KEYS = {
+    'game_genres': ['game_id', 'genre_id'],
+    'game_platforms': ['game_id', 'platform_id'],
+    'game_stores': ['game_id', 'store_id'],
+    'game_tags': ['game_id', 'tag_id', 'tag_language'],
+    'game_ratings_detail': ['game_id', 'rating_id']
+}
+
+
+# How a full load resolves rows seen twice: games and lookups keep their last
+# version, duplicate junction rows are dropped
+FULL_LOAD_CONFLICTS = {
+    'genres': 'replace', 'platforms': 'replace', 'stores': 'replace', 'tags': 'replace',
+    'games': 'replace',
+    'game_genres': 'ignore', 'game_platforms': 'ignore', 'game_stores': 'ignore', 'game_tags': 'ignore',
+    'game_ratings_detail': 'replace'
+}
+
+
+def table_columns(table):
+    return TABLE_COLUMNS.get(table, TABLE_SOURCES[table][1])
+
+
+def source_rows(table, df):
+    """The rows of a transformed table (as a DataFrame) that go into a database table"""
+    df = df[TABLE_SOURCES[table][1]]
+    if table == 'tags':
+        return df.drop_duplicates()
+    if table in CHILD_KEYS:
+        return df.dropna()
+    return df
+
+
+def insert_source_rows(bulk, table, df, conflict=None, into=None):
+    return bulk.insert_frame(into or table, df, table_columns(table), TABLE_SOURCES[table][1], conflict)
+
+
+def clear_load_tables(bulk):
+    """Empty everything a full load replaces, plus any clustering output; returns the cluster tables cleared"""
+    existing = {row[0] for row in bulk.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    cluster_tables = [table for table in CLUSTER_OUTPUT_TABLES if table in existing]
+    bulk.clear(cluster_tables + LOAD_TABLES)
+    if cluster_tables:
+        print("⚠️  Cleared clusters from the previous catalogue; re-run game_clusters.py")
+    return cluster_tables
+
+
 class CSVToDatabaseLoader:
-    def __init__(self):
+    def __init__(self, db_path="../db/games.db", csv_dir="../data/transformed", batch_size=BATCH_SIZE):
         # Paths relative to src/ directory
-        self.db_path = Path("../db/games.db")
-        self.csv_dir = Path("../data/transformed")
-        
+        self.db_path = Path(db_path)
+        self.csv_dir = Path(csv_dir) if csv_dir else None
+        self.batch_size = batch_size
+        self.check_paths()
+    
+    def check_paths(self):
+        """Report where the loader reads from and whether those paths exist"""
         print(f"Looking for database at: {self.db_path.absolute()}")
-        print(f"Looking for CSV files at: {self.csv_dir.absolute()}")
+        print(f"Looking for transformed tables (CSV or Parquet) at: {self.csv_dir.absolute()}")
         
         if not self.db_path.exists():
             print("ERROR: Database not found. Run database_schema.py first.")
             return
         
         if not self.csv_dir.exists():
-            print("ERROR: Transformed CSV directory not found. Run transform_to_csv.py first.")
+            print("ERROR: Transformed data directory not found. Run transform_to_csv.py first.")
             return
         
         print("✓ All paths found")
     
-    def load_lookup_tables(self):
+    def read_source(self, table):
+        """Rows for one database table from the transformed tables"""
+        source, columns = TABLE_SOURCES[table]
+        return source_rows(table, read_table(self.csv_dir, source, columns=columns))
+    
+    def load_table(self, bulk, table, conflict=None, into=None):
+        """Insert one table's transformed rows into the database table (or into another table)"""
+        return insert_source_rows(bulk, table, self.read_source(table), conflict, into)
+    
+    def load_lookup_tables(self, bulk):
         """Load reference/lookup tables first"""
-        conn = sqlite3.connect(self.db_path)
+        for table in ['genres', 'platforms', 'stores']:
+            count = self.load_table(bulk, table, FULL_LOAD_CONFLICTS[table])
+            print(f"✓ {table}: {count} records")
         
-        try:
-            # Load genres
-            genres_df = pd.read_csv(self.csv_dir / 'genres_lookup.csv')
-            genres_df.to_sql('genres', conn, if_exists='replace', index=False)
-            print(f"✓ genres: {len(genres_df)} records")
-            
-            # Load platforms
-            platforms_df = pd.read_csv(self.csv_dir / 'platforms_lookup.csv')
-            platforms_df.to_sql('platforms', conn, if_exists='replace', index=False)
-            print(f"✓ platforms: {len(platforms_df)} records")
-            
-            # Load stores
-            stores_df = pd.read_csv(self.csv_dir / 'stores_lookup.csv')
-            stores_df.to_sql('stores', conn, if_exists='replace', index=False)
-            print(f"✓ stores: {len(stores_df)} records")
-            
-            # Load tags (from game_tags.csv, get unique tags)
-            tags_df = pd.read_csv(self.csv_dir / 'game_tags.csv')
-            unique_tags = tags_df[['tag_id', 'tag_name', 'tag_slug', 'tag_language', 'tag_games_count']].drop_duplicates()
-            unique_tags.columns = ['id', 'name', 'slug', 'language', 'games_count']
-            unique_tags.to_sql('tags', conn, if_exists='replace', index=False)
-            print(f"✓ tags: {len(unique_tags)} records")
-            
-        except Exception as e:
-            print(f"ERROR loading lookup tables: {e}")
-        finally:
-            conn.close()
+        # Load tags (from game_tags, get unique tags). The same tag can be seen with
+        # different games_count snapshots; the last one wins
+        self.load_table(bulk, 'tags', FULL_LOAD_CONFLICTS['tags'])
+        count = bulk.conn.execute("SELECT COUNT(*) FROM tags").fetchone()[0]
+        print(f"✓ tags: {count} records")
     
-    def load_main_games_table(self):
+    def load_main_games_table(self, bulk):
         """Load the main games table"""
-        conn = sqlite3.connect(self.db_path)
-        
-        try:
-            games_df = pd.read_csv(self.csv_dir / 'games.csv')
-            
-            # Handle NaN values - replace with None for SQL
-            games_df = games_df.where(pd.notnull(games_df), None)
-            
-            games_df.to_sql('games', conn, if_exists='replace', index=False)
-            print(f"✓ games: {len(games_df)} records")
-            
-        except Exception as e:
-            print(f"ERROR loading games table: {e}")
-        finally:
-            conn.close()
+        # A game crawled twice keeps its most recent row
+        count = self.load_table(bulk, 'games', FULL_LOAD_CONFLICTS['games'])
+        print(f"✓ games: {count} records")
     
-    def load_junction_tables(self):
+    def load_junction_tables(self, bulk):
         """Load many-to-many relationship tables"""
+        for table in ['game_genres', 'game_platforms', 'game_stores', 'game_tags']:
+            count = self.load_table(bulk, table, FULL_LOAD_CONFLICTS[table])
+            print(f"✓ {table}: {count} records")
+    
+    def load_ratings_detail(self, bulk):
+        """Load detailed ratings breakdown"""
+        count = self.load_table(bulk, 'game_ratings_detail', FULL_LOAD_CONFLICTS['game_ratings_detail'])
+        print(f"✓ game_ratings_detail: {count} records")
+    
+    def stage_incoming(self, bulk, table):
+        """Copy one table's transformed rows into an unindexed temp table incoming_<table>"""
+        columns = ', '.join(table_columns(table))
+        bulk.conn.execute(f"DROP TABLE IF EXISTS temp.incoming_{table}")
+        bulk.conn.execute(f"CREATE TEMP TABLE incoming_{table} AS SELECT {columns} FROM main.{table} WHERE 0")
+        return self.load_table(bulk, table, into=f"temp.incoming_{table}")
+    
+    def upsert_games(self, bulk):
+        """Insert new games and update the ones whose values changed; returns (inserted, updated, unchanged)"""
+        conn = bulk.conn
+        existing = conn.execute(
+            "SELECT COUNT(DISTINCT id) FROM incoming_games WHERE id IN (SELECT id FROM main.games)"
+        ).fetchone()[0]
+        incoming = conn.execute("SELECT COUNT(DISTINCT id) FROM incoming_games").fetchone()[0]
+        
+        columns = ', '.join(GAME_COLUMNS)
+        value_columns = [column for column in GAME_COLUMNS if column != 'id']
+        assignments = ', '.join(f"{column} = excluded.{column}" for column in value_columns)
+        changed = ' OR '.join(f"games.{column} IS NOT excluded.{column}" for column in value_columns)
+        
+        before = conn.total_changes
+        # WHERE true keeps the parser from reading ON CONFLICT as a join constraint
+        conn.execute(f"""
+            INSERT INTO games ({columns}) SELECT {columns} FROM incoming_games WHERE true
+            ON CONFLICT(id) DO UPDATE SET {assignments} WHERE {changed}
+        """)
+        inserted = incoming - existing
+        updated = conn.total_changes - before - inserted
+        return inserted, updated, existing - updated
+    
+    def apply_child_rows(self, bulk, table):
+        """Make a child table match the incoming rows for the incoming games only; returns (added, removed)"""
+        conn = bulk.conn
+        keys = ', '.join(CHILD_KEYS[table])
+        columns = ', '.join(table_columns(table))
+        
+        before = conn.total_changes
+        # Rows of updated games that are no longer in the data
+        conn.execute(f"""
+            DELETE FROM main.{table}
+            WHERE game_id IN (SELECT id FROM incoming_games)
+              AND ({keys}) NOT IN (SELECT {keys} FROM incoming_{table})
+        """)
+        removed = conn.total_changes - before
+        
+        before = conn.total_changes
+        if table == 'game_ratings_detail':
+            # Rating rows also carry values that may have changed
+            conn.execute(f"""
+                INSERT INTO main.{table} ({columns}) SELECT {columns} FROM incoming_{table} WHERE true
+                ON CONFLICT(game_id, rating_id) DO UPDATE SET
+                    rating_title = excluded.rating_title,
+                    rating_count = excluded.rating_count,
+                    rating_percent = excluded.rating_percent
+                WHERE rating_title IS NOT excluded.rating_title
+                   OR rating_count IS NOT excluded.rating_count
+                   OR rating_percent IS NOT excluded.rating_percent
+            """)
+        else:
+            conn.execute(f"INSERT OR IGNORE INTO main.{table} ({columns}) SELECT {columns} FROM incoming_{table}")
+        return conn.total_changes - before, removed
+    
+    def run_incremental_load(self):
+        """Apply the transformed tables on top of the database without replacing it
+        
+        Games are upserted by id, and their genre/platform/store/tag/rating rows are
+        diffed so that only rows that actually changed are deleted or inserted.
+        Lookup tables only ever gain rows. Games missing from the input are left
+        alone, so a delta batch can be applied on its own.
+        """
+        print("Starting incremental database load...")
+        
         conn = sqlite3.connect(self.db_path)
+        bulk = BulkLoader(conn, self.batch_size)
         
         try:
-            # Load game_genres
-            game_genres_df = pd.read_csv(self.csv_dir / 'game_genres.csv')
-            game_genres_clean = game_genres_df[['game_id', 'genre_id']].dropna()
-            game_genres_clean.to_sql('game_genres', conn, if_exists='replace', index=False)
-            print(f"✓ game_genres: {len(game_genres_clean)} records")
-            
-            # Load game_platforms
-            game_platforms_df = pd.read_csv(self.csv_dir / 'game_platforms.csv')
-            game_platforms_clean = game_platforms_df[['game_id', 'platform_id']].dropna()
-            game_platforms_clean.to_sql('game_platforms', conn, if_exists='replace', index=False)
-            print(f"✓ game_platforms: {len(game_platforms_clean)} records")
-            
-            # Load game_stores
-            game_stores_df = pd.read_csv(self.csv_dir / 'game_stores.csv')
-            game_stores_clean = game_stores_df[['game_id', 'store_id']].dropna()
-            game_stores_clean.to_sql('game_stores', conn, if_exists='replace', index=False)
-            print(f"✓ game_stores: {len(game_stores_clean)} records")
-            
-            # Load game_tags
-            game_tags_df = pd.read_csv(self.csv_dir / 'game_tags.csv')
-            game_tags_clean = game_tags_df[['game_id', 'tag_id', 'tag_language']].dropna()
-            game_tags_clean.to_sql('game_tags', conn, if_exists='replace', index=False)
-            print(f"✓ game_tags: {len(game_tags_clean)} records")
-            
+            # One transaction: readers see either the old or the fully updated data.
+            # This writes to the live database, so it keeps SQLite's durable defaults
+            with bulk.transaction():
+                print("\n1. Appending new lookup values...")
+                with bulk.phase('lookup tables'):
+                    for table in LOOKUP_TABLES:
+                        before = conn.total_changes
+                        self.load_table(bulk, table, conflict='ignore')
+                        print(f"✓ {table}: {conn.total_changes - before} new records")
+                
+                print("\n2. Upserting games...")
+                with bulk.phase('stage incoming rows'):
+                    self.stage_incoming(bulk, 'games')
+                    for table in CHILD_KEYS:
+                        self.stage_incoming(bulk, table)
+                with bulk.phase('games'):
+                    # Search rows and rollup shares come from the stored games, so take the
+                    # incoming games out of both before their rows change
+                    remove_from_search_index(conn, "SELECT id FROM incoming_games")
+                    remove_aggregate_contributions(conn, "SELECT id FROM incoming_games")
+                    inserted, updated, unchanged = self.upsert_games(bulk)
+                print(f"✓ games: {inserted} inserted, {updated} updated, {unchanged} unchanged")
+                
+                print("\n3. Applying junction and ratings changes...")
+                with bulk.phase('child tables'):
+                    for table in CHILD_KEYS:
+                        added, removed = self.apply_child_rows(bulk, table)
+                        print(f"✓ {table}: {added} added/updated, {removed} removed")
+                
+                with bulk.phase('search index'):
+                    indexed = add_to_search_index(conn, "SELECT id FROM incoming_games")
+                print(f"✓ games_fts: {indexed} games re-indexed for search")
+                
+                with bulk.phase('aggregates'):
+                    add_aggregate_contributions(conn, "SELECT id FROM incoming_games")
+                print("✓ Summary tables updated")
+                
+                changed_games = [row[0] for row in conn.execute("SELECT id FROM incoming_games")]
         except Exception as e:
-            print(f"ERROR loading junction tables: {e}")
+            print(f"ERROR applying incremental load, no changes were made: {e}")
+            return False
         finally:
             conn.close()
+        
+        self.refresh_similarity_index(changed_games)
+        
+        print("\n=== LOAD TIMINGS ===")
+        print(bulk.timing_report())
+        
+        print("\n4. Verifying data integrity...")
+        self.verify_data_integrity()
+        
+        print("\n✅ Incremental load completed successfully!")
+        return True
     
-    def load_ratings_detail(self):
-        """Load detailed ratings breakdown"""
-        conn = sqlite3.connect(self.db_path)
+    def refresh_similarity_index(self, game_ids=None):
+        """Update the similarity index next to the database, if one was built
         
+        game_ids=None (after a full load) rebuilds it; otherwise only those games are re-indexed.
+        """
         try:
-            ratings_df = pd.read_csv(self.csv_dir / 'game_ratings_detail.csv')
-            ratings_clean = ratings_df.dropna()
-            ratings_clean.to_sql('game_ratings_detail', conn, if_exists='replace', index=False)
-            print(f"✓ game_ratings_detail: {len(ratings_clean)} records")
-            
+            status = update_similarity_index(self.db_path, game_ids)
         except Exception as e:
-            print(f"ERROR loading ratings detail: {e}")
-        finally:
-            conn.close()
+            print(f"⚠️ Similarity index not updated, rebuild it with similarity_index.py --build: {e}")
+            return
+        if status:
+            print(f"✓ {status}")
     
     def verify_data_integrity(self):
         """Verify that data was loaded correctly"""
@@ -161,28 +346,133 @@ class CSVToDatabaseLoader:
         
         conn.close()
     
-    def run_full_load(self):
-        """Run the complete CSV to database loading process"""
+    def load_target(self, staged):
+        """Database file a full load writes to: a staging copy, or the live file itself"""
+        if not staged:
+            return self.db_path
+        print(f"Building into a staging copy of {self.db_path.name}...")
+        return stage_database(self.db_path)
+    
+    def load_pragmas(self, staged):
+        """PRAGMAs for a full load: the fast, non-durable ones only when the target is a staging copy"""
+        return LOAD_PRAGMAS if staged else {}
+    
+    def publish(self, target, staged):
+        """Validate a staging build and swap it in; the live database is untouched on failure"""
+        if not staged:
+            return True
+        
+        problems = validate_database(target)
+        if problems:
+            for problem in problems:
+                print(f"✗ {problem}")
+            discard_staging(self.db_path)
+            print("ERROR: Build failed validation and was not published; the live database is unchanged")
+            return False
+        
+        publish_database(target, self.db_path)
+        print(f"✓ Published new build to {self.db_path}")
+        return True
+    
+    def run_full_load(self, defer_indexes=False, staged=True):
+        """Replace the database contents with the transformed tables in one transaction
+        
+        With defer_indexes the secondary indexes are dropped first and rebuilt in one
+        sorted pass after all rows are in, followed by ANALYZE. When staged, the load
+        goes into a copy of the database that replaces the live file once validated.
+        """
         print("Starting CSV to Database loading...")
         
-        # Load in correct order (due to foreign key constraints)
-        print("\n1. Loading lookup tables...")
-        self.load_lookup_tables()
+        target = self.load_target(staged)
+        conn = sqlite3.connect(target)
+        bulk = BulkLoader(conn, self.batch_size)
+        schema = GameDatabaseSchema(target)
         
-        print("\n2. Loading main games table...")
-        self.load_main_games_table()
+        try:
+            # Nothing becomes visible until the single commit at the end;
+            # any failure rolls the whole load back and leaves the schema untouched
+            with bulk.tuned(self.load_pragmas(staged)), bulk.transaction():
+                if defer_indexes:
+                    with bulk.phase('drop indexes'):
+                        schema.drop_indexes(conn.cursor())
+                
+                with bulk.phase('clear tables'):
+                    clear_load_tables(bulk)
+                
+                # Load in correct order (due to foreign key constraints)
+                print("\n1. Loading lookup tables...")
+                with bulk.phase('lookup tables'):
+                    self.load_lookup_tables(bulk)
+                
+                print("\n2. Loading main games table...")
+                with bulk.phase('games'):
+                    self.load_main_games_table(bulk)
+                
+                print("\n3. Loading junction tables...")
+                with bulk.phase('junction tables'):
+                    self.load_junction_tables(bulk)
+                
+                print("\n4. Loading ratings detail...")
+                with bulk.phase('ratings detail'):
+                    self.load_ratings_detail(bulk)
+                
+                with bulk.phase('search index'):
+                    indexed = rebuild_search_index(conn)
+                print(f"✓ games_fts: {indexed} games indexed for search")
+                
+                with bulk.phase('aggregates'):
+                    rebuild_aggregates(conn)
+                print("✓ Summary tables rebuilt")
+                
+                if defer_indexes:
+                    print("\nRebuilding indexes...")
+                    with bulk.phase('build indexes'):
+                        schema.create_indexes(conn.cursor())
+                    with bulk.phase('analyze'):
+                        conn.execute("ANALYZE")
+        except Exception as e:
+            print(f"ERROR loading database, no changes were made: {e}")
+            if staged:
+                discard_staging(self.db_path)
+            return False
+        finally:
+            conn.close()
         
-        print("\n3. Loading junction tables...")
-        self.load_junction_tables()
+        with bulk.phase('validate + publish'):
+            published = self.publish(target, staged)
         
-        print("\n4. Loading ratings detail...")
-        self.load_ratings_detail()
+        print("\n=== LOAD TIMINGS ===")
+        print(bulk.timing_report())
+        if not published:
+            return False
+        
+        self.refresh_similarity_index()
         
         print("\n5. Verifying data integrity...")
         self.verify_data_integrity()
         
         print("\n✅ Database loading completed successfully!")
+        return True
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load the transformed tables into the SQLite database")
+    parser.add_argument("--db", default="../db/games.db", help="SQLite database created by database_schema.py")
+    parser.add_argument("--input-dir", default="../data/transformed", help="Directory with the transformed tables")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per executemany() batch")
+    parser.add_argument("--defer-indexes", action="store_true",
+                        help="Drop secondary indexes during the load, rebuild them afterwards and run ANALYZE")
+    parser.add_argument("--in-place", action="store_true",
+                        help="Load straight into the live database instead of a validated staging copy")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Upsert games by id and apply only changed rows instead of replacing everything")
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
-    loader = CSVToDatabaseLoader()
-    loader.run_full_load()
\ No newline at end of file
+    args = parse_args()
+    loader = CSVToDatabaseLoader(args.db, args.input_dir, args.batch_size)
+    if args.incremental:
+        loader.run_incremental_load()
+    else:
+        loader.run_full_load(defer_indexes=args.defer_indexes, staged=not args.in_place)
@@ -0,0 +1,327 @@
+import os
+import time
+import queue
+import sqlite3
+import argparse
+import threading
+import statistics
+from pathlib import Path
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from game_search import search_games
+
+POOL_SIZE = 4
+CACHE_SIZE = 512  # Cached result sets
+CACHE_TTL = 300  # Seconds a cached result set may be served
+STATEMENT_CACHE = 64  # Prepared statements kept per connection
+POOL_TIMEOUT = 30  # Seconds to wait for a free connection
+
+GAME_COLUMNS = """
+    g.id, g.name, g.slug, g.released, g.rating, g.ratings_count, g.metacritic,
+    g.primary_genre, g.primary_platform
+"""
+
+TOP_RATED_SQL = f"""
+    SELECT {GAME_COLUMNS} FROM games g
+    WHERE g.ratings_count >= ?
+    ORDER BY g.rating DESC, g.ratings_count DESC
+    LIMIT ?
+"""
+
+# The unary + keeps the planner from driving these lookups off idx_games_ratings_count:
+# min_ratings is usually 0, which makes that index match every game
+BY_GENRE_SQL = f"""
+    SELECT {GAME_COLUMNS} FROM genres ge
+    JOIN game_genres gg ON gg.genre_id = ge.id
+    JOIN games g ON g.id = gg.game_id
+    WHERE (ge.slug = ? OR ge.name = ?) AND +g.ratings_count >= ?
+    ORDER BY g.rating DESC, g.ratings_count DESC
+    LIMIT ?
+"""
+
+BY_PLATFORM_SQL = f"""
+    SELECT {GAME_COLUMNS} FROM platforms p
+    JOIN game_platforms gp ON gp.platform_id = p.id
+    JOIN games g ON g.id = gp.game_id
+    WHERE (p.slug = ? OR p.name = ?) AND +g.ratings_count >= ?
+    ORDER BY g.rating DESC, g.ratings_count DESC
+    LIMIT ?
+"""
+
+BY_YEAR_SQL = f"""
+    SELECT {GAME_COLUMNS} FROM games g
+    WHERE g.release_year = ? AND +g.ratings_count >= ?
+    ORDER BY g.rating DESC, g.ratings_count DESC
+    LIMIT ?
+"""
+
+
+def database_generation(db_path):
+    """Identity of the current database build
+
+    Publishing a build renames a new file over the old one (new inode) and in-place
+    loads rewrite the file (new mtime/size), so any load changes this value.
+    """
+    stat = os.stat(db_path)
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class ResultCache:
+    """Thread-safe LRU cache whose entries also expire ttl seconds after being stored"""
+
+    def __init__(self, max_size=CACHE_SIZE, ttl=CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, count=True):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += count
+                return entry[1]
+            if entry is not None:
+                del self.entries[key]
+            self.misses += count
+            return None
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class PoolClosed(RuntimeError):
+    """The pool was closed, because a newer build was published, before a connection came free"""
+
+
+class ConnectionPool:
+    """Fixed set of read-only connections to one database file
+
+    Each connection keeps its own cache of prepared statements, so the service's
+    fixed set of queries is compiled once per connection, not once per call.
+    """
+
+    def __init__(self, db_path, size=POOL_SIZE):
+        self.db_path = Path(db_path)
+        self.closed = False
+        self.lock = threading.Lock()
+        self.idle = queue.Queue()
+        for _ in range(size):
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True,
+                                   check_same_thread=False, cached_statements=STATEMENT_CACHE)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA query_only = ON")
+            self.idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        if self.closed:
+            raise PoolClosed(f"connection pool for {self.db_path} is closed")
+        conn = self.idle.get(timeout=POOL_TIMEOUT)
+        if conn is None:
+            # close() wakes waiters with None; pass it on to the next one
+            self.idle.put(None)
+            raise PoolClosed(f"connection pool for {self.db_path} is closed")
+        try:
+            yield conn
+        finally:
+            with self.lock:
+                if self.closed:
+                    conn.close()
+                else:
+                    self.idle.put(conn)
+
+    def close(self):
+        """Close idle connections now and busy ones as soon as they are returned
+
+        Callers still waiting for a connection get PoolClosed instead of timing out.
+        """
+        with self.lock:
+            self.closed = True
+            while True:
+                try:
+                    conn = self.idle.get_nowait()
+                except queue.Empty:
+                    break
+                if conn is not None:
+                    conn.close()
+            self.idle.put(None)
+
+
+class QueryService:
+    """Thread-safe, cached lookups and search over games.db for dashboards and other readers
+
+    When a new build is published the service switches to it on the next call:
+    it opens a fresh pool on the new file and stops serving results cached from
+    the old one.
+    """
+
+    def __init__(self, db_path="../db/games.db", pool_size=POOL_SIZE, cache_size=CACHE_SIZE,
+                 cache_ttl=CACHE_TTL):
+        self.db_path = Path(db_path)
+        self.pool_size = pool_size
+        self.cache = ResultCache(cache_size, cache_ttl)
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.generation = database_generation(self.db_path)
+        self.pool = ConnectionPool(self.db_path, pool_size)
+
+    def _current_pool(self):
+        """Pool and generation for the build that is live right now"""
+        generation = database_generation(self.db_path)
+        if generation != self.generation:
+            with self.lock:
+                if generation != self.generation:
+                    old_pool = self.pool
+                    self.pool = ConnectionPool(self.db_path, self.pool_size)
+                    self.generation = generation
+                    self.cache.clear()
+                    old_pool.close()
+        return self.pool, self.generation
+
+    def cached(self, key, compute):
+        """Result of compute(conn) on a pooled connection, served from the cache when possible
+
+        compute must return rows (dicts or sqlite3.Row); callers get fresh dict copies.
+        """
+        while True:
+            pool, generation = self._current_pool()
+            try:
+                # The generation is part of the key, so a result computed on the previous
+                # build can never be served after a publish
+                rows = self._cached_on(pool, (generation,) + key, compute)
+            except PoolClosed:
+                # A newer build was published while this call waited; run it there
+                continue
+            return [dict(row) for row in rows]
+
+    def _cached_on(self, pool, key, compute):
+        rows = self.cache.get(key)
+        if rows is not None:
+            return rows
+        # Concurrent misses on one key wait for a single query instead of all running it
+        with self.key_lock(key):
+            rows = self.cache.get(key, count=False)
+            if rows is None:
+                with pool.connection() as conn:
+                    rows = tuple(compute(conn))
+                self.cache.put(key, rows)
+        return rows
+
+    def query(self, sql, params=()):
+        """Rows of a read-only query as dicts, served from the cache when possible"""
+        params = tuple(params)
+        return self.cached((sql, params), lambda conn: conn.execute(sql, params).fetchall())
+
+    @contextmanager
+    def key_lock(self, key):
+        """Hold the lock shared by every caller of key; it is dropped when the last one is done"""
+        with self.lock:
+            entry = self.pending.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.pending[key]
+
+    def top_rated(self, limit=20, min_ratings=50):
+        """Best-rated games with at least min_ratings user ratings"""
+        return self.query(TOP_RATED_SQL, (min_ratings, limit))
+
+    def by_genre(self, genre, limit=20, min_ratings=0):
+        """Best-rated games of a genre, given by name or slug"""
+        return self.query(BY_GENRE_SQL, (genre, genre, min_ratings, limit))
+
+    def by_platform(self, platform, limit=20, min_ratings=0):
+        """Best-rated games on a platform, given by name or slug"""
+        return self.query(BY_PLATFORM_SQL, (platform, platform, min_ratings, limit))
+
+    def by_year(self, year, limit=20, min_ratings=0):
+        """Best-rated games released in a year"""
+        return self.query(BY_YEAR_SQL, (year, min_ratings, limit))
+
+    def search(self, text, limit=20, prefix=True):
+        """Ranked full-text search (see game_search.search_games)"""
+        return self.cached(('search', text, limit, prefix),
+                           lambda conn: search_games(conn, text, limit, prefix))
+
+    def cache_stats(self):
+        return {'hits': self.cache.hits, 'misses': self.cache.misses, 'entries': len(self.cache.entries)}
+
+    def close(self):
+        self.pool.close()
+
+
+def run_benchmark(service, users, requests_per_user):
+    """Latency of a mixed dashboard workload issued by concurrent users"""
+    with service.pool.connection() as conn:
+        genres = [row[0] for row in conn.execute("SELECT slug FROM genres ORDER BY id LIMIT 10")]
+        platforms = [row[0] for row in conn.execute("SELECT slug FROM platforms ORDER BY id LIMIT 10")]
+        years = [row[0] for row in conn.execute(
+            "SELECT DISTINCT release_year FROM games WHERE release_year IS NOT NULL ORDER BY 1 DESC LIMIT 10")]
+
+    calls = [lambda: service.top_rated()]
+    calls += [lambda genre=genre: service.by_genre(genre) for genre in genres]
+    calls += [lambda platform=platform: service.by_platform(platform) for platform in platforms]
+    calls += [lambda year=year: service.by_year(year) for year in years]
+
+    def user(seed):
+        timings = []
+        for i in range(requests_per_user):
+            start = time.perf_counter()
+            calls[(seed * 7 + i) % len(calls)]()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    # First pass starts from an empty cache, as right after a publish
+    print(f"\n=== {users} USERS x {requests_per_user} REQUESTS ===")
+    for label in ('cold cache', 'warm cache'):
+        with ThreadPoolExecutor(max_workers=users) as executor:
+            timings = sorted(t for result in executor.map(user, range(users)) for t in result)
+        print(f"{label}: p50 {statistics.median(timings):.3f} ms | "
+              f"p99 {timings[int(len(timings) * 0.99) - 1]:.3f} ms | max {timings[-1]:.3f} ms")
+    print(f"Cache: {service.cache_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cached, pooled read-only queries over the games database")
+    parser.add_argument("--db", default="../db/games.db", help="SQLite database to read")
+    parser.add_argument("--genre", help="Best-rated games of a genre (name or slug)")
+    parser.add_argument("--platform", help="Best-rated games on a platform (name or slug)")
+    parser.add_argument("--year", type=int, help="Best-rated games released in a year")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum number of games")
+    parser.add_argument("--benchmark", type=int, metavar="USERS", help="Measure latency with this many concurrent users")
+    args = parser.parse_args()
+
+    service = QueryService(args.db)
+    if args.benchmark:
+        run_benchmark(service, args.benchmark, 200)
+    else:
+        if args.genre:
+            games = service.by_genre(args.genre, args.limit)
+        elif args.platform:
+            games = service.by_platform(args.platform, args.limit)
+        elif args.year:
+            games = service.by_year(args.year, args.limit)
+        else:
+            games = service.top_rated(args.limit)
+        for game in games:
+            print(f"- {game['name']} ({game['released']}) | Rating: {game['rating']} | {game['primary_genre']}")
+    service.close()
@@ -0,0 +1,179 @@
+import io
+import os
+import gzip
+import json
+import tempfile
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip is always available
+    zstandard = None
+
+# Compression name -> file suffix of a raw segment
+SEGMENT_SUFFIXES = {
+    'gzip': '.ndjson.gz',
+    'zstd': '.ndjson.zst',
+    None: '.ndjson'
+}
+
+
+def segment_path(directory, stem, compression='gzip'):
+    """Path of a raw segment file for the given compression"""
+    if compression not in SEGMENT_SUFFIXES:
+        raise ValueError(f"Unknown compression: {compression}")
+    return Path(directory) / f"{stem}{SEGMENT_SUFFIXES[compression]}"
+
+
+def compression_for(path):
+    """Work out a raw file's compression from its name"""
+    name = Path(path).name
+    if name.endswith('.gz'):
+        return 'gzip'
+    if name.endswith('.zst'):
+        return 'zstd'
+    return None
+
+
+class RawSegmentWriter:
+    """Stream records into one compressed NDJSON segment (one game per line)
+
+    Lines go to a hidden temp file that is renamed into place on close(), so
+    readers never see a half-written segment.
+    """
+
+    def __init__(self, path, compression='gzip', level=None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.compression = compression
+        self.records = 0
+        self.raw_bytes = 0
+
+        fd, self._tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        self._raw_file = os.fdopen(fd, 'wb')
+
+        if compression == 'gzip':
+            self._stream = gzip.GzipFile(fileobj=self._raw_file, mode='wb', compresslevel=level or 6)
+        elif compression == 'zstd':
+            if zstandard is None:
+                self._raw_file.close()
+                os.remove(self._tmp_path)
+                raise ImportError("zstd compression needs the 'zstandard' package (pip install zstandard)")
+            self._stream = zstandard.ZstdCompressor(level=level or 3).stream_writer(self._raw_file, closefd=False)
+        elif compression is None:
+            self._stream = self._raw_file
+        else:
+            self._raw_file.close()
+            os.remove(self._tmp_path)
+            raise ValueError(f"Unknown compression: {compression}")
+
+    def write(self, record):
+        """Append one record and return its encoded line"""
+        line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        self._stream.write(line)
+        self.records += 1
+        self.raw_bytes += len(line)
+        return line
+
+    def write_many(self, records):
+        """Append several records and return their encoded lines joined together"""
+        return b''.join(self.write(record) for record in records)
+
+    def close(self):
+        """Finish the segment and move it into place"""
+        if self._stream is not self._raw_file:
+            self._stream.close()
+        self._raw_file.flush()
+        os.fsync(self._raw_file.fileno())
+        self._raw_file.close()
+        # mkstemp creates files as 0600; give segments normal data file permissions
+        os.chmod(self._tmp_path, 0o644)
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def abort(self):
+        """Throw away everything written so far"""
+        try:
+            if self._stream is not self._raw_file:
+                self._stream.close()
+            self._raw_file.close()
+        finally:
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def open_segment(path):
+    """Open a raw segment for streaming text reads"""
+    compression = compression_for(path)
+    if compression == 'gzip':
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError(f"Reading {Path(path).name} needs the 'zstandard' package (pip install zstandard)")
+        raw_file = open(path, 'rb')
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw_file, closefd=True), encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def iter_segment(path):
+    """Yield the records of one NDJSON segment without loading the whole file"""
+    with open_segment(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def is_segment(path):
+    return any(Path(path).name.endswith(suffix) for suffix in SEGMENT_SUFFIXES.values())
+
+
+def raw_files(raw_dir):
+    """All raw inputs in a directory: NDJSON segments plus legacy JSON pages"""
+    raw_dir = Path(raw_dir)
+    files = set(raw_dir.glob("*.json"))
+    for suffix in SEGMENT_SUFFIXES.values():
+        files.update(raw_dir.glob(f"*{suffix}"))
+    return sorted(files)
+
+
+def iter_file_games(path):
+    """Yield the games stored in one raw file, whatever its format
+
+    Legacy pages are whole API responses; games live under their 'results' key.
+    """
+    if is_segment(path):
+        yield from iter_segment(path)
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if 'results' not in data:
+        raise ValueError("No 'results' key found")
+    yield from data['results']
+
+
+def iter_raw_games(raw_dir):
+    """Yield every game from every raw file in a directory, each game id once
+
+    A game can sit in two files, e.g. when a page was crawled again before the
+    stale file was pruned; the first copy in file order wins.
+    """
+    seen = set()
+    for path in raw_files(raw_dir):
+        for game in iter_file_games(path):
+            game_id = game.get('id')
+            if game_id is not None:
+                if game_id in seen:
+                    continue
+                seen.add(game_id)
+            yield game
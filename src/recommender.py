@@ -0,0 +1,288 @@
+import json
+import time
+import sqlite3
+import argparse
+import numpy as np
+import scipy.sparse as sp
+from pathlib import Path
+
+MODEL_PATH = Path("../db/recommender.npz")
+
+# Linked-entity features: name -> (junction table, feature column, feature names, block weight).
+# Each block is TF-IDF weighted, so a rare tag says more about a game than "Singleplayer".
+LINK_FEATURES = {
+    'genre': ('game_genres', 'genre_id', "SELECT id, name FROM genres", 1.0),
+    'tag': ('game_tags', 'tag_id', "SELECT id, MIN(name) FROM tags GROUP BY id", 1.0),
+    'platform': ('game_platforms', 'platform_id', "SELECT id, name FROM platforms", 0.5)
+}
+
+# Numeric features: games column -> (bin width, value transform, block weight). Values are
+# one-hot binned, so games are similar when their values are close, not when both are large.
+NUMERIC_FEATURES = {
+    'rating': (0.5, None, 0.25),
+    'release_year': (5, None, 0.25),
+    'ratings_count': (1, np.log10, 0.25),
+    'metacritic': (10, None, 0.25)
+}
+
+
+def idf_weights(games, document_frequency):
+    """Smoothed inverse document frequency of features found in document_frequency games each"""
+    return np.log((1 + games) / (1 + np.asarray(document_frequency, dtype=float))) + 1
+
+
+def normalize_rows(matrix):
+    """Scale every row to unit L2 norm (empty rows stay empty)"""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sp.diags(1 / norms) @ matrix
+
+
+def lookup(keys, values):
+    """Positions of values in the sorted array keys, and which values were found"""
+    positions = np.searchsorted(keys, values)
+    positions[positions == len(keys)] = 0
+    found = keys[positions] == values if len(keys) else np.zeros(len(values), dtype=bool)
+    return positions, found
+
+
+def pair_matrix(game_ids, pairs, feature_ids):
+    """Binary CSR matrix from (game_id, feature_id) pairs; unknown games and features are ignored"""
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    rows, known_games = lookup(game_ids, pairs[:, 0])
+    columns, known_features = lookup(feature_ids, pairs[:, 1])
+    known = known_games & known_features
+    matrix = sp.csr_matrix((np.ones(known.sum()), (rows[known], columns[known])),
+                           shape=(len(game_ids), len(feature_ids)))
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+
+def selected(sql, game_ids, id_column, id_range=None):
+    """sql restricted to a list of games or an inclusive (first, last) id range; returns (sql, params)"""
+    if id_range is not None:
+        return f"{sql} WHERE {id_column} BETWEEN ? AND ?", tuple(id_range)
+    if game_ids is None:
+        return sql, ()
+    return f"{sql} WHERE {id_column} IN (SELECT value FROM json_each(?))", (json.dumps(list(game_ids)),)
+
+
+class FeatureSpace:
+    """Vocabulary and weights that turn games into feature rows
+
+    fit() learns the features and IDF weights from every game; transform() then
+    maps any set of games into that fixed space, so rows for games added later
+    line up with the rows of an existing model. New tags, genres or platforms are
+    only picked up by the next fit().
+    """
+
+    def __init__(self, link_features, numeric_bins, feature_names):
+        self.link_features = link_features  # block -> (feature ids, idf weights)
+        self.numeric_bins = numeric_bins  # games column -> bin ids
+        self.feature_names = list(feature_names)
+
+    @classmethod
+    def fit(cls, conn):
+        """Learn the vocabulary with aggregate queries, without holding every game in memory"""
+        link_features, numeric_bins, names = {}, {}, []
+        games = conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+        for block, (table, column, names_sql, _) in LINK_FEATURES.items():
+            labels = dict(conn.execute(names_sql).fetchall())
+            frequencies = np.array(conn.execute(f"""
+                SELECT l.{column}, COUNT(DISTINCT l.game_id) FROM {table} l
+                JOIN games g ON g.id = l.game_id
+                GROUP BY l.{column} ORDER BY l.{column}
+            """).fetchall(), dtype=np.int64).reshape(-1, 2)
+            feature_ids = frequencies[:, 0]
+            link_features[block] = (feature_ids, idf_weights(games, frequencies[:, 1]))
+            names += [f"{block}:{labels.get(feature_id, feature_id)}" for feature_id in feature_ids]
+
+        for column, (width, transform, _) in NUMERIC_FEATURES.items():
+            distinct = np.array([row[0] for row in conn.execute(
+                f"SELECT DISTINCT {column} FROM games WHERE {column} IS NOT NULL")], dtype=float)
+            _, bins = cls.binned(distinct, width, transform)
+            numeric_bins[column] = np.unique(bins)
+            label = (lambda b: f"10^{b * width}") if transform is np.log10 else (lambda b: f"{b * width}+")
+            names += [f"{column}:{label(bin_id)}" for bin_id in numeric_bins[column]]
+
+        return cls(link_features, numeric_bins, names)
+
+    @staticmethod
+    def numeric_values(conn, game_ids, id_range=None):
+        sql, params = selected(f"SELECT id, {', '.join(NUMERIC_FEATURES)} FROM games", game_ids, 'id', id_range)
+        games = conn.execute(f"{sql} ORDER BY id", params).fetchall()
+        ids = np.array([row[0] for row in games], dtype=np.int64)
+        values = np.array([row[1:] for row in games], dtype=float).reshape(len(games), len(NUMERIC_FEATURES))
+        return ids, values
+
+    @staticmethod
+    def binned(column_values, width, transform):
+        """(rows with a value, bin of each value); missing and zero values get no bin"""
+        present = ~np.isnan(column_values) & (column_values > 0)
+        values = column_values[present]
+        if transform is not None:
+            values = transform(values)
+        return np.flatnonzero(present), np.floor(values / width).astype(np.int64)
+
+    def transform(self, conn, game_ids=None, id_range=None):
+        """(sorted game ids, unit-length CSR feature rows) for the given games
+
+        Games are a list of ids, an inclusive (first, last) id range, or None for all games.
+        """
+        ids, values = self.numeric_values(conn, game_ids, id_range)
+        blocks = []
+
+        for block, (table, column, _, weight) in LINK_FEATURES.items():
+            feature_ids, idf = self.link_features[block]
+            sql, params = selected(f"SELECT DISTINCT game_id, {column} FROM {table}", game_ids, 'game_id', id_range)
+            pairs = conn.execute(sql, params).fetchall()
+            matrix = pair_matrix(ids, pairs, feature_ids) @ sp.diags(idf)
+            blocks.append(np.sqrt(weight) * normalize_rows(matrix))
+
+        for position, (column, (width, transform, weight)) in enumerate(NUMERIC_FEATURES.items()):
+            bin_ids = self.numeric_bins[column]
+            rows, bins = self.binned(values[:, position], width, transform)
+            columns, known = lookup(bin_ids, bins)
+            matrix = sp.csr_matrix((np.ones(known.sum()), (rows[known], columns[known])),
+                                   shape=(len(ids), len(bin_ids)))
+            blocks.append(np.sqrt(weight) * matrix)
+
+        return ids, normalize_rows(sp.hstack(blocks, format='csr')).astype(np.float32)
+
+    def arrays(self):
+        """Arrays to store with a model (see from_arrays)"""
+        arrays = {'feature_names': np.asarray(self.feature_names)}
+        for block, (feature_ids, idf) in self.link_features.items():
+            arrays[f"space_{block}_ids"] = feature_ids
+            arrays[f"space_{block}_idf"] = idf
+        for column, bin_ids in self.numeric_bins.items():
+            arrays[f"space_{column}_bins"] = bin_ids
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        link_features = {block: (arrays[f"space_{block}_ids"], arrays[f"space_{block}_idf"])
+                         for block in LINK_FEATURES}
+        numeric_bins = {column: arrays[f"space_{column}_bins"] for column in NUMERIC_FEATURES}
+        return cls(link_features, numeric_bins, arrays['feature_names'])
+
+
+class ContentRecommender:
+    """Content-based "more like this" over a sparse game x feature matrix
+
+    Rows are unit length, so the dot product of two rows is their cosine similarity
+    and one sparse matrix-vector product scores every game against a query.
+    """
+
+    def __init__(self, game_ids, matrix, space):
+        self.game_ids = np.asarray(game_ids, dtype=np.int64)
+        self.matrix = matrix.tocsr()
+        self.space = space
+        self.feature_names = np.asarray(space.feature_names)
+        # Column-major copy: scoring only touches the columns the query game has
+        self.by_feature = self.matrix.tocsc()
+
+    @classmethod
+    def build(cls, db_path="../db/games.db"):
+        """Feature matrix for every game, straight from the database"""
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            space = FeatureSpace.fit(conn)
+            game_ids, matrix = space.transform(conn)
+        finally:
+            conn.close()
+        return cls(game_ids, matrix, space)
+
+    def save(self, path=MODEL_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez(f, game_ids=self.game_ids, data=self.matrix.data, indices=self.matrix.indices,
+                     indptr=self.matrix.indptr, shape=np.array(self.matrix.shape), **self.space.arrays())
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        with np.load(path) as model:
+            matrix = sp.csr_matrix((model['data'], model['indices'], model['indptr']),
+                                   shape=tuple(model['shape']))
+            return cls(model['game_ids'], matrix, FeatureSpace.from_arrays(model))
+
+    def row(self, game_id):
+        position = np.searchsorted(self.game_ids, game_id)
+        if position == len(self.game_ids) or self.game_ids[position] != game_id:
+            raise KeyError(f"game {game_id} is not in the model")
+        return position
+
+    def top_k(self, query, k, exclude):
+        """(game_id, score) pairs of the k rows most similar to a sparse query row"""
+        scores = self.by_feature[:, query.indices] @ query.data
+        scores[exclude] = -np.inf
+        k = min(k, len(scores) - len(exclude))
+        if k <= 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.lexsort((self.game_ids[best], -scores[best]))]
+        return [(int(self.game_ids[i]), float(scores[i])) for i in best if scores[i] > 0]
+
+    def similar(self, game_id, k=10):
+        """Games most like one game"""
+        position = self.row(game_id)
+        return self.top_k(self.matrix[position], k, [position])
+
+    def more_like(self, game_ids, k=10):
+        """Games most like a set of games (e.g. a user's favorites), the games themselves excluded"""
+        positions = [self.row(game_id) for game_id in game_ids]
+        query = normalize_rows(sp.csr_matrix(self.matrix[positions].sum(axis=0)))
+        return self.top_k(query, k, positions)
+
+    def shared_features(self, game_id, other_id, n=5):
+        """Features that contribute most to two games' similarity"""
+        overlap = self.matrix[self.row(game_id)].multiply(self.matrix[self.row(other_id)]).tocoo()
+        order = np.argsort(-overlap.data)[:n]
+        return [str(self.feature_names[overlap.col[i]]) for i in order]
+
+
+def game_names(db_path, game_ids):
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        placeholders = ', '.join('?' for _ in game_ids)
+        return dict(conn.execute(f"SELECT id, name FROM games WHERE id IN ({placeholders})",
+                                 list(game_ids)).fetchall())
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Content-based game recommendations")
+    parser.add_argument("game_ids", nargs="*", type=int, help="Games to find similar games for")
+    parser.add_argument("--db", default="../db/games.db", help="SQLite database to read")
+    parser.add_argument("--model", default=str(MODEL_PATH), help="Saved model file")
+    parser.add_argument("--build", action="store_true", help="Rebuild the model from the database first")
+    parser.add_argument("--k", type=int, default=10, help="Number of recommendations")
+    args = parser.parse_args()
+
+    if args.build or not Path(args.model).exists():
+        start = time.perf_counter()
+        recommender = ContentRecommender.build(args.db)
+        recommender.save(args.model)
+        print(f"✓ Model built in {time.perf_counter() - start:.1f}s: {recommender.matrix.shape[0]:,} games x "
+              f"{recommender.matrix.shape[1]:,} features ({recommender.matrix.nnz:,} non-zeros) -> {args.model}")
+    else:
+        recommender = ContentRecommender.load(args.model)
+
+    if args.game_ids:
+        start = time.perf_counter()
+        if len(args.game_ids) == 1:
+            results = recommender.similar(args.game_ids[0], args.k)
+        else:
+            results = recommender.more_like(args.game_ids, args.k)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        names = game_names(args.db, args.game_ids + [game_id for game_id, _ in results])
+        print(f"\n=== MORE LIKE {', '.join(names.get(game_id, str(game_id)) for game_id in args.game_ids)} "
+              f"({elapsed:.1f} ms) ===")
+        for game_id, score in results:
+            shared = ', '.join(recommender.shared_features(args.game_ids[0], game_id, 3))
+            print(f"- {names.get(game_id, game_id)} | similarity {score:.3f} | {shared}")
@@ -0,0 +1,257 @@
+import time
+import sqlite3
+import argparse
+import numpy as np
+import scipy.sparse as sp
+from pathlib import Path
+
+from recommender import FeatureSpace, ContentRecommender
+
+INDEX_NAME = "similarity_index.npz"  # Kept next to the database it was built from
+PROBES = 16  # Clusters searched per query; more probes -> higher recall, slower queries
+KMEANS_ITERATIONS = 10
+SEED = 42
+
+
+def index_path(db_path):
+    return Path(db_path).with_name(INDEX_NAME)
+
+
+def default_clusters(games):
+    """About sqrt(N) clusters keeps both the centroid scan and each probed list small"""
+    return max(1, int(np.sqrt(games)))
+
+
+def spherical_kmeans(matrix, clusters, iterations=KMEANS_ITERATIONS, seed=SEED):
+    """Unit-length centroids of unit-length sparse rows, by cosine similarity"""
+    rng = np.random.default_rng(seed)
+    rows = matrix.shape[0]
+    clusters = min(clusters, rows)
+    centroids = matrix[rng.choice(rows, clusters, replace=False)].toarray()
+
+    for _ in range(iterations):
+        assignment = np.asarray((matrix @ centroids.T).argmax(axis=1)).ravel()
+        members = sp.csr_matrix((np.ones(rows), (assignment, np.arange(rows))), shape=(clusters, rows))
+        sums = np.asarray((members @ matrix).todense())
+        # Clusters that lost every member restart from a random game
+        empty = np.flatnonzero(np.asarray(members.sum(axis=1)).ravel() == 0)
+        if len(empty):
+            sums[empty] = matrix[rng.choice(rows, len(empty), replace=False)].toarray()
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        centroids = sums / norms
+    return centroids.astype(np.float32)
+
+
+class SimilarityIndex:
+    """Inverted-file (IVF) index over game feature rows for approximate cosine top-k
+
+    Games are grouped around k-means centroids, and each cluster keeps its own
+    sparse block of rows. A query scores the centroids, then ranks exactly only
+    the games in its `probes` closest clusters instead of the whole catalogue.
+    New or changed games are assigned to their closest centroid as they arrive;
+    the centroids themselves only move on a rebuild.
+    """
+
+    def __init__(self, space, centroids):
+        self.space = space
+        self.centroids = centroids
+        self.lists = [sp.csr_matrix((0, centroids.shape[1]), dtype=np.float32) for _ in range(len(centroids))]
+        self.list_ids = [np.zeros(0, dtype=np.int64) for _ in range(len(centroids))]
+        self.cluster_of = {}  # game id -> cluster holding its current row
+
+    def assign(self, matrix):
+        return np.asarray((matrix @ self.centroids.T).argmax(axis=1)).ravel()
+
+    def add(self, game_ids, matrix):
+        """Insert games, or move games already in the index to their new rows"""
+        game_ids = np.asarray(game_ids, dtype=np.int64)
+        matrix = matrix.astype(np.float32).tocsr()
+
+        replaced = [game_id for game_id in game_ids.tolist() if game_id in self.cluster_of]
+        for cluster in {self.cluster_of[game_id] for game_id in replaced}:
+            keep = ~np.isin(self.list_ids[cluster], replaced)
+            self.lists[cluster] = self.lists[cluster][np.flatnonzero(keep)]
+            self.list_ids[cluster] = self.list_ids[cluster][keep]
+
+        assignment = self.assign(matrix)
+        for cluster in np.unique(assignment).tolist():
+            rows = np.flatnonzero(assignment == cluster)
+            self.lists[cluster] = sp.vstack([self.lists[cluster], matrix[rows]], format='csr')
+            self.list_ids[cluster] = np.concatenate([self.list_ids[cluster], game_ids[rows]])
+        self.cluster_of.update(zip(game_ids.tolist(), assignment.tolist()))
+        return len(game_ids) - len(replaced), len(replaced)
+
+    def query(self, vector, k=10, probes=PROBES, exclude_game_id=None):
+        """Approximate (game_id, score) top-k for a unit-length sparse row"""
+        dense = vector.toarray().ravel()
+        centroid_scores = self.centroids @ dense
+        probes = min(probes, len(self.centroids))
+        nearest = np.argpartition(-centroid_scores, probes - 1)[:probes]
+
+        scores = np.concatenate([self.lists[cluster] @ dense for cluster in nearest])
+        ids = np.concatenate([self.list_ids[cluster] for cluster in nearest])
+        if exclude_game_id is not None:
+            scores[ids == exclude_game_id] = -np.inf
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.lexsort((ids[best], -scores[best]))]
+        return [(int(ids[i]), float(scores[i])) for i in best if scores[i] > 0]
+
+    def vector(self, game_id):
+        cluster = self.cluster_of.get(game_id)
+        if cluster is None:
+            raise KeyError(f"game {game_id} is not in the index")
+        position = np.flatnonzero(self.list_ids[cluster] == game_id)[0]
+        return self.lists[cluster][position]
+
+    def similar(self, game_id, k=10, probes=PROBES):
+        """Games most like one game in the index"""
+        return self.query(self.vector(game_id), k, probes, exclude_game_id=game_id)
+
+    def candidates(self, game_id, probes=PROBES):
+        """Games a query for game_id ranks exactly"""
+        centroid_scores = self.centroids @ self.vector(game_id).toarray().ravel()
+        nearest = np.argsort(-centroid_scores)[:probes]
+        return sum(len(self.list_ids[cluster]) for cluster in nearest)
+
+    def __len__(self):
+        return len(self.cluster_of)
+
+    @classmethod
+    def from_recommender(cls, recommender, clusters=None):
+        clusters = clusters or default_clusters(len(recommender.game_ids))
+        index = cls(recommender.space, spherical_kmeans(recommender.matrix, clusters))
+        index.add(recommender.game_ids, recommender.matrix)
+        return index
+
+    @classmethod
+    def build(cls, db_path="../db/games.db", clusters=None):
+        """Index every game of a database in a freshly fitted feature space"""
+        return cls.from_recommender(ContentRecommender.build(db_path), clusters)
+
+    def update_from_database(self, db_path, game_ids):
+        """Add or re-assign the given games from their current rows in the database"""
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            ids, matrix = self.space.transform(conn, game_ids)
+        finally:
+            conn.close()
+        return self.add(ids, matrix)
+
+    def save(self, path):
+        path = Path(path)
+        matrix = sp.vstack(self.lists, format='csr')
+        offsets = np.cumsum([0] + [len(ids) for ids in self.list_ids])
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, centroids=self.centroids, offsets=offsets, game_ids=np.concatenate(self.list_ids),
+                     data=matrix.data, indices=matrix.indices, indptr=matrix.indptr,
+                     shape=np.array(matrix.shape), **self.space.arrays())
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as saved:
+            matrix = sp.csr_matrix((saved['data'], saved['indices'], saved['indptr']),
+                                   shape=tuple(saved['shape']))
+            index = cls(FeatureSpace.from_arrays(saved), saved['centroids'])
+            offsets, game_ids = saved['offsets'], saved['game_ids']
+        for cluster, (start, end) in enumerate(zip(offsets[:-1], offsets[1:])):
+            index.lists[cluster] = matrix[start:end]
+            index.list_ids[cluster] = game_ids[start:end]
+            index.cluster_of.update(dict.fromkeys(game_ids[start:end].tolist(), cluster))
+        return index
+
+
+def update_similarity_index(db_path, game_ids=None):
+    """Bring the database's similarity index (if one was built) up to date after a load
+
+    game_ids=None rebuilds it from scratch; otherwise only those games are added or re-assigned.
+    Returns a status line, or None when the database has no index.
+    """
+    path = index_path(db_path)
+    if not path.exists():
+        return None
+    if game_ids is None:
+        index = SimilarityIndex.build(db_path)
+        index.save(path)
+        return f"similarity index rebuilt: {len(index):,} games"
+    index = SimilarityIndex.load(path)
+    added, replaced = index.update_from_database(db_path, game_ids)
+    index.save(path)
+    return f"similarity index: {added} games added, {replaced} re-assigned"
+
+
+def run_benchmark(db_path, queries, k, cluster_counts, probe_counts):
+    """Recall@k and latency of the index against exact sparse search"""
+    exact = ContentRecommender.build(db_path)
+    rng = np.random.default_rng(SEED)
+    sample = rng.choice(exact.game_ids, size=min(queries, len(exact.game_ids)), replace=False).tolist()
+
+    truth, exact_ms = {}, []
+    for game_id in sample:
+        start = time.perf_counter()
+        truth[game_id] = exact.similar(game_id, k)
+        exact_ms.append((time.perf_counter() - start) * 1000)
+
+    print(f"\n=== RECALL@{k} VS LATENCY ({len(sample)} queries, {len(exact.game_ids):,} games) ===")
+    print(f"exact search: {np.median(exact_ms):.2f} ms median, {np.percentile(exact_ms, 99):.2f} ms p99")
+    print(f"{'clusters':>8} {'probes':>6} {'build s':>8} {'recall':>7} {'scanned':>8} {'ms':>6} {'p99 ms':>7}")
+    for clusters in cluster_counts:
+        start = time.perf_counter()
+        index = SimilarityIndex.from_recommender(exact, clusters)
+        build_seconds = time.perf_counter() - start
+
+        for probes in probe_counts:
+            recalls, latencies, scanned = [], [], []
+            for game_id in sample:
+                start = time.perf_counter()
+                found = index.similar(game_id, k, probes)
+                latencies.append((time.perf_counter() - start) * 1000)
+                scanned.append(index.candidates(game_id, probes))
+                # Ties are common (games with the same features), so any game scoring
+                # at least the exact k-th score counts as a hit
+                expected = truth[game_id]
+                if expected:
+                    threshold = expected[-1][1] - 1e-6
+                    hits = sum(score >= threshold for _, score in found)
+                    recalls.append(min(hits, len(expected)) / len(expected))
+            print(f"{clusters:>8} {probes:>6} {build_seconds:>8.1f} {np.mean(recalls):>7.3f} "
+                  f"{np.median(scanned):>8,.0f} {np.median(latencies):>6.2f} {np.percentile(latencies, 99):>7.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Approximate nearest-neighbour index for game similarity")
+    parser.add_argument("game_ids", nargs="*", type=int, help="Games to find similar games for")
+    parser.add_argument("--db", default="../db/games.db", help="SQLite database to read")
+    parser.add_argument("--build", action="store_true", help="(Re)build the index next to the database")
+    parser.add_argument("--clusters", type=int, help="k-means clusters (default: sqrt of the game count)")
+    parser.add_argument("--probes", type=int, default=PROBES, help="Clusters searched per query")
+    parser.add_argument("--k", type=int, default=10, help="Number of similar games")
+    parser.add_argument("--benchmark", type=int, metavar="QUERIES", help="Compare recall and latency with exact search")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        games = sqlite3.connect(args.db).execute("SELECT COUNT(*) FROM games").fetchone()[0]
+        base = args.clusters or default_clusters(games)
+        run_benchmark(args.db, args.benchmark, args.k, [base // 2, base, base * 2], [1, 4, 8, 16, 32])
+    else:
+        path = index_path(args.db)
+        if args.build or not path.exists():
+            start = time.perf_counter()
+            index = SimilarityIndex.build(args.db, args.clusters)
+            index.save(path)
+            print(f"✓ Indexed {len(index):,} games in {len(index.centroids)} clusters "
+                  f"({time.perf_counter() - start:.1f}s) -> {path}")
+        else:
+            index = SimilarityIndex.load(path)
+
+        for game_id in args.game_ids:
+            start = time.perf_counter()
+            results = index.similar(game_id, args.k, args.probes)
+            print(f"\n=== SIMILAR TO {game_id} ({(time.perf_counter() - start) * 1000:.2f} ms) ===")
+            for other_id, score in results:
+                print(f"- {other_id} | similarity {score:.3f}")
@@ -0,0 +1,175 @@
+import sys
+import time
+import sqlite3
+import argparse
+from pathlib import Path
+
+from table_io import TABLE_SUFFIXES, TableWriter
+from bulk_loader import BulkLoader, BATCH_SIZE
+from database_schema import GameDatabaseSchema
+from db_publish import discard_staging
+from game_search import rebuild_search_index
+from aggregates import rebuild_aggregates
+from load_csv_to_db import (CSVToDatabaseLoader, TABLE_SOURCES, FULL_LOAD_CONFLICTS,
+                            source_rows, insert_source_rows, clear_load_tables)
+
+sys.path.append(str(Path(__file__).resolve().parent / "transform"))
+from transform_games import (GameDataToCSV, OUTPUT_COLUMNS, CHUNK_SIZE, RATING_BINS, POPULARITY_BINS,
+                             bins_with_thresholds)
+
+
+class RawToDatabaseLoader(CSVToDatabaseLoader):
+    """Stream raw games through GameDataToCSV's row builders straight into the database
+
+    Nothing is written to disk between the raw files and SQLite. Transformed
+    table files can still be exported as a side output of the same pass.
+    """
+
+    def __init__(self, raw_dir="../data/raw", db_path="../db/games.db", export_dir=None, export_format='csv',
+                 chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE, rating_bins=RATING_BINS,
+                 popularity_bins=POPULARITY_BINS):
+        self.raw_dir = Path(raw_dir)
+        self.export_dir = Path(export_dir) if export_dir else None
+        self.export_format = export_format
+        self.chunk_size = chunk_size
+        # Exported tables, if any, are where the inherited table readers look
+        super().__init__(db_path, self.export_dir, batch_size)
+        self.transformer = GameDataToCSV(raw_dir, self.export_dir, rating_bins=rating_bins,
+                                         popularity_bins=popularity_bins, output_format=export_format)
+
+    def check_paths(self):
+        print(f"Looking for database at: {self.db_path.absolute()}")
+        print(f"Reading raw files from: {self.raw_dir.absolute()}")
+
+        if not self.db_path.exists():
+            print("ERROR: Database not found. Run database_schema.py first.")
+            return
+
+        print("✓ All paths found")
+
+    def run_full_load(self, defer_indexes=False, staged=True):
+        """Replace the database contents with the raw games in one streaming pass and one transaction"""
+        print("Starting raw to database streaming load...")
+
+        target = self.load_target(staged)
+        conn = sqlite3.connect(target)
+        bulk = BulkLoader(conn, self.batch_size)
+        schema = GameDatabaseSchema(target)
+        counts = dict.fromkeys(TABLE_SOURCES, 0)
+        writers = {}
+
+        try:
+            if self.export_dir:
+                for name, columns in OUTPUT_COLUMNS.items():
+                    writers[name] = TableWriter(self.export_dir, name, columns, self.export_format)
+
+            with bulk.tuned(self.load_pragmas(staged)), bulk.transaction():
+                if defer_indexes:
+                    with bulk.phase('drop indexes'):
+                        schema.drop_indexes(conn.cursor())
+
+                with bulk.phase('clear tables'):
+                    clear_load_tables(bulk)
+
+                transform_seconds = insert_seconds = 0.0
+                start = time.perf_counter()
+                for tables in self.transformer.iter_table_chunks(self.chunk_size):
+                    chunk_start = time.perf_counter()
+                    transform_seconds += chunk_start - start
+
+                    for name, chunk_df in tables.items():
+                        if name in writers:
+                            writers[name].append(chunk_df)
+
+                    # TABLE_SOURCES lists lookups first, then games, then their child rows
+                    for table, (source, _) in TABLE_SOURCES.items():
+                        counts[table] += insert_source_rows(bulk, table, source_rows(table, tables[source]),
+                                                            FULL_LOAD_CONFLICTS[table])
+
+                    start = time.perf_counter()
+                    insert_seconds += start - chunk_start
+                bulk.timings.append(('transform', transform_seconds))
+                bulk.timings.append(('insert', insert_seconds))
+
+                if counts['games'] == 0:
+                    raise ValueError("No games found in the raw files")
+                # Tag rows were upserted per chunk; report the distinct tags that ended up stored
+                counts['tags'] = conn.execute("SELECT COUNT(*) FROM tags").fetchone()[0]
+
+                with bulk.phase('search index'):
+                    counts['games_fts'] = rebuild_search_index(conn)
+                with bulk.phase('aggregates'):
+                    rebuild_aggregates(conn)
+
+                if defer_indexes:
+                    print("\nRebuilding indexes...")
+                    with bulk.phase('build indexes'):
+                        schema.create_indexes(conn.cursor())
+                    with bulk.phase('analyze'):
+                        conn.execute("ANALYZE")
+        except Exception as e:
+            print(f"ERROR loading database, no changes were made: {e}")
+            if staged:
+                discard_staging(self.db_path)
+            return False
+        finally:
+            for writer in writers.values():
+                writer.close()
+            conn.close()
+
+        with bulk.phase('validate + publish'):
+            published = self.publish(target, staged)
+
+        for table, count in counts.items():
+            print(f"✓ {table}: {count} records")
+        if self.export_dir:
+            print(f"✓ Transformed tables exported to {self.export_dir}")
+
+        print("\n=== LOAD TIMINGS ===")
+        print(bulk.timing_report())
+        if not published:
+            return False
+
+        self.refresh_similarity_index()
+
+        print("\nVerifying data integrity...")
+        self.verify_data_integrity()
+
+        print("\n✅ Database loading completed successfully!")
+        return True
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load raw games straight into the SQLite database")
+    parser.add_argument("--raw-dir", default="../data/raw", help="Raw pages or NDJSON segments")
+    parser.add_argument("--db", default="../db/games.db", help="SQLite database created by database_schema.py")
+    parser.add_argument("--export-dir", default=None,
+                        help="Also write the transformed tables here (off by default)")
+    parser.add_argument("--export-format", choices=list(TABLE_SUFFIXES), default='csv',
+                        help="Format of the exported tables")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Games transformed per chunk")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per executemany() batch")
+    parser.add_argument("--rating-thresholds", default=None,
+                        help="Minimum ratings for Excellent,Great,Good,Average (default 4.5,4.0,3.5,3.0)")
+    parser.add_argument("--popularity-thresholds", default=None,
+                        help="Minimum ratings_count for Very Popular,Popular,Moderately Popular (default 10000,1000,100)")
+    parser.add_argument("--defer-indexes", action="store_true",
+                        help="Drop secondary indexes during the load, rebuild them afterwards and run ANALYZE")
+    parser.add_argument("--in-place", action="store_true",
+                        help="Load straight into the live database instead of a validated staging copy")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    loader = RawToDatabaseLoader(
+        args.raw_dir,
+        args.db,
+        export_dir=args.export_dir,
+        export_format=args.export_format,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        rating_bins=bins_with_thresholds(RATING_BINS, args.rating_thresholds),
+        popularity_bins=bins_with_thresholds(POPULARITY_BINS, args.popularity_thresholds)
+    )
+    loader.run_full_load(defer_indexes=args.defer_indexes, staged=not args.in_place)
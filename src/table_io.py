@@ -0,0 +1,187 @@
+import pandas as pd
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional, CSV always works
+    pa = None
+    pc = None
+    pq = None
+
+# Output format -> file suffix of a transformed table
+TABLE_SUFFIXES = {
+    'csv': '.csv',
+    'parquet': '.parquet'
+}
+
+FILTER_CHUNK_ROWS = 100000  # Rows read at a time when copying a table minus some games
+
+# Typed columns for the columnar format. CSV keeps pandas' default inference so
+# existing CSV consumers see exactly the same files as before.
+COLUMN_DTYPES = {
+    'id': 'Int64', 'name': 'string', 'slug': 'string', 'released': 'string',
+    'rating': 'Float64', 'rating_top': 'Int64', 'ratings_count': 'Int64', 'metacritic': 'Int64',
+    'playtime': 'Int64', 'suggestions_count': 'Int64', 'updated': 'string', 'background_image': 'string',
+    'reviews_count': 'Int64', 'added': 'Int64', 'tba': 'boolean',
+    'release_year': 'Int64', 'release_month': 'Int64', 'release_day': 'Int64',
+    'rating_category': 'string', 'popularity_category': 'string',
+    'esrb_rating': 'string', 'esrb_rating_slug': 'string',
+    'genres_count': 'Int64', 'platforms_count': 'Int64', 'stores_count': 'Int64',
+    'primary_genre': 'string', 'primary_genre_slug': 'string',
+    'primary_platform': 'string', 'primary_platform_slug': 'string',
+    'game_id': 'Int64',
+    'genre_id': 'Int64', 'genre_name': 'string', 'genre_slug': 'string',
+    'platform_id': 'Int64', 'platform_name': 'string', 'platform_slug': 'string',
+    'store_id': 'Int64', 'store_name': 'string', 'store_slug': 'string',
+    'rating_id': 'Int64', 'rating_title': 'string', 'rating_count': 'Int64', 'rating_percent': 'Float64',
+    'tag_id': 'Int64', 'tag_name': 'string', 'tag_slug': 'string', 'tag_language': 'string',
+    'tag_games_count': 'Int64'
+}
+
+
+def require_pyarrow():
+    if pq is None:
+        raise ImportError("Parquet tables need the 'pyarrow' package (pip install pyarrow)")
+
+
+def table_path(directory, name, fmt='csv'):
+    if fmt not in TABLE_SUFFIXES:
+        raise ValueError(f"Unknown table format: {fmt}")
+    return Path(directory) / f"{name}{TABLE_SUFFIXES[fmt]}"
+
+
+def remove_other_formats(directory, name, fmt):
+    """Delete the table's file in every other format, so readers never pick up a stale copy"""
+    for other in TABLE_SUFFIXES:
+        if other != fmt:
+            table_path(directory, name, other).unlink(missing_ok=True)
+
+
+def find_table(directory, name):
+    """Path of a transformed table in whichever format exists, preferring Parquet
+
+    Writers remove the other format's file, so normally only one exists.
+    """
+    for fmt in ('parquet', 'csv'):
+        path = table_path(directory, name, fmt)
+        if path.exists():
+            return path
+    return None
+
+
+def typed(df, columns):
+    """Cast a frame to the columnar dtypes, adding any missing columns as nulls"""
+    df = df.reindex(columns=columns)
+    return df.astype({column: COLUMN_DTYPES.get(column, 'object') for column in columns})
+
+
+def read_table(directory, name, columns=None):
+    """Read a transformed table; Parquet reads only the requested columns from disk"""
+    path = find_table(directory, name)
+    if path is None:
+        raise FileNotFoundError(f"No {name}.parquet or {name}.csv in {directory}")
+
+    if path.suffix == '.parquet':
+        require_pyarrow()
+        return pd.read_parquet(path, columns=columns, dtype_backend='numpy_nullable')
+    return pd.read_csv(path, usecols=columns)
+
+
+def table_row_count(path):
+    """Row count of a table file; Parquet answers from its footer without reading data"""
+    path = Path(path)
+    if path.suffix == '.parquet':
+        require_pyarrow()
+        return pq.ParquetFile(path).metadata.num_rows
+    return len(pd.read_csv(path))
+
+
+class TableWriter:
+    """Append DataFrame chunks to one transformed table in CSV or Parquet"""
+
+    def __init__(self, directory, name, columns, fmt='csv'):
+        self.directory = directory
+        self.name = name
+        self.path = table_path(directory, name, fmt)
+        self.columns = columns
+        self.fmt = fmt
+        self.rows = 0
+        self._parquet_writer = None
+
+        if fmt == 'csv':
+            # Header first, so an empty table still has one
+            pd.DataFrame(columns=columns).to_csv(self.path, index=False, encoding='utf-8')
+        else:
+            require_pyarrow()
+            schema = pa.Schema.from_pandas(typed(pd.DataFrame(), columns), preserve_index=False)
+            self._parquet_writer = pq.ParquetWriter(self.path, schema, compression='zstd')
+
+    def append(self, df):
+        if df.empty:
+            return
+        if self.fmt == 'csv':
+            df.to_csv(self.path, mode='a', header=False, index=False, encoding='utf-8', columns=self.columns)
+        else:
+            table = pa.Table.from_pandas(typed(df, self.columns), schema=self._parquet_writer.schema,
+                                         preserve_index=False)
+            self._parquet_writer.write_table(table)
+        self.rows += len(df)
+
+    def append_file(self, path, skip_ids=None):
+        """Append every row of another table file of the same format, in bounded memory
+
+        Rows whose first column (the game id) is in skip_ids are left out.
+        """
+        path = Path(path)
+        if skip_ids:
+            self.append_filtered(path, skip_ids)
+        elif self.fmt == 'csv':
+            # Copy byte for byte, skipping the part's header line
+            with open(self.path, 'a', encoding='utf-8', newline='') as out:
+                with open(path, 'r', encoding='utf-8', newline='') as part:
+                    part.readline()
+                    for line in part:
+                        out.write(line)
+                        self.rows += 1
+        else:
+            for batch in pq.ParquetFile(path).iter_batches():
+                self._parquet_writer.write_batch(batch)
+                self.rows += batch.num_rows
+
+    def append_filtered(self, path, skip_ids):
+        key = self.columns[0]
+        if self.fmt == 'csv':
+            # Every field as the exact text on disk, so kept rows are written back unchanged
+            skip = {str(game_id) for game_id in skip_ids}
+            for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=FILTER_CHUNK_ROWS):
+                kept = chunk[~chunk[key].isin(skip)]
+                kept.to_csv(self.path, mode='a', header=False, index=False, encoding='utf-8', columns=self.columns)
+                self.rows += len(kept)
+        else:
+            skip = pa.array(sorted(skip_ids), type=pa.int64())
+            for batch in pq.ParquetFile(path).iter_batches():
+                kept = batch.filter(pc.invert(pc.is_in(batch.column(key), value_set=skip)))
+                self._parquet_writer.write_batch(kept)
+                self.rows += kept.num_rows
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        remove_other_formats(self.directory, self.name, self.fmt)
+        return self.path
+
+
+def write_table(df, directory, name, fmt='csv'):
+    """Write a whole DataFrame as one transformed table"""
+    if fmt == 'csv':
+        path = table_path(directory, name, fmt)
+        df.to_csv(path, index=False, encoding='utf-8')
+        remove_other_formats(directory, name, fmt)
+        return path
+
+    writer = TableWriter(directory, name, list(df.columns), fmt)
+    writer.append(df)
+    return writer.close()
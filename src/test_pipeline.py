@@ -1,11 +1,26 @@
+import io
 import subprocess
 import sqlite3
-import json
-import pandas as pd
+import shutil
+import tempfile
+import threading
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import sys
 import time
 
+from raw_store import raw_files, iter_file_games, RawSegmentWriter
+from table_io import find_table, table_row_count, read_table
+
+sys.path.append(str(Path(__file__).resolve().parent / "transform"))
+from transform_games import GameDataToCSV, OUTPUT_COLUMNS
+from database_schema import GameDatabaseSchema, AGGREGATE_TABLES
+from load_csv_to_db import CSVToDatabaseLoader, LOAD_TABLES, table_columns
+from db_publish import stage_database, publish_database, validate_database
+from game_clusters import GameClusterer
+from query_service import QueryService
+
 class PipelineTester:
     def __init__(self):
         self.project_root = Path("../")
@@ -18,7 +33,13 @@ class PipelineTester:
             'transform': False,
             'database_create': False,
             'database_load': False,
-            'data_integrity': False
+            'data_integrity': False,
+            'parallel_transform': False,
+            'incremental_transform': False,
+            'incremental_load': False,
+            'reload_after_clustering': False,
+            'query_cache_publish': False,
+            'query_single_flight': False
         }
     
     def test_data_fetch(self):
@@ -29,27 +50,26 @@ class PipelineTester:
             print("❌ Raw data directory not found")
             return False
         
-        json_files = list(self.raw_data_dir.glob("*.json"))
-        if not json_files:
-            print("❌ No JSON files found in raw data directory")
+        input_files = raw_files(self.raw_data_dir)
+        if not input_files:
+            print("❌ No raw files found in raw data directory")
             return False
         
         total_games = 0
         valid_files = 0
         
-        for json_file in json_files:
+        for raw_file in input_files:
             try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if 'results' in data and len(data['results']) > 0:
-                        games_count = len(data['results'])
-                        total_games += games_count
-                        valid_files += 1
-                        print(f"✓ {json_file.name}: {games_count} games")
-                    else:
-                        print(f"⚠️  {json_file.name}: No valid results")
+                # Count records as they stream past instead of parsing whole documents
+                games_count = sum(1 for _ in iter_file_games(raw_file))
+                if games_count > 0:
+                    total_games += games_count
+                    valid_files += 1
+                    print(f"✓ {raw_file.name}: {games_count} games")
+                else:
+                    print(f"⚠️  {raw_file.name}: No valid results")
             except Exception as e:
-                print(f"❌ {json_file.name}: Error - {e}")
+                print(f"❌ {raw_file.name}: Error - {e}")
         
         if valid_files > 0 and total_games > 0:
             print(f"✅ Data fetch test PASSED: {valid_files} files, {total_games} total games")
@@ -60,41 +80,41 @@ class PipelineTester:
             return False
     
     def test_data_transform(self):
-        """Test CSV transformation"""
+        """Test transformation output (CSV or Parquet tables)"""
         print("\n=== Testing Data Transform ===")
         
         if not self.transformed_data_dir.exists():
             print("❌ Transformed data directory not found")
             return False
         
-        required_files = [
-            'games.csv',
-            'game_genres.csv', 
-            'game_platforms.csv',
-            'game_stores.csv',
-            'game_tags.csv',
-            'game_ratings_detail.csv',
-            'genres_lookup.csv',
-            'platforms_lookup.csv',
-            'stores_lookup.csv'
+        required_tables = [
+            'games',
+            'game_genres', 
+            'game_platforms',
+            'game_stores',
+            'game_tags',
+            'game_ratings_detail',
+            'genres_lookup',
+            'platforms_lookup',
+            'stores_lookup'
         ]
         
         missing_files = []
         file_stats = {}
         
-        for filename in required_files:
-            filepath = self.transformed_data_dir / filename
-            if filepath.exists():
+        for table in required_tables:
+            filepath = find_table(self.transformed_data_dir, table)
+            if filepath is not None:
                 try:
-                    df = pd.read_csv(filepath)
-                    file_stats[filename] = len(df)
-                    print(f"✓ {filename}: {len(df)} records")
+                    row_count = table_row_count(filepath)
+                    file_stats[filepath.name] = row_count
+                    print(f"✓ {filepath.name}: {row_count} records")
                 except Exception as e:
-                    print(f"❌ {filename}: Error reading - {e}")
-                    missing_files.append(filename)
+                    print(f"❌ {filepath.name}: Error reading - {e}")
+                    missing_files.append(filepath.name)
             else:
-                print(f"❌ {filename}: File not found")
-                missing_files.append(filename)
+                print(f"❌ {table}: File not found (.csv or .parquet)")
+                missing_files.append(table)
         
         if not missing_files:
             print("✅ Data transform test PASSED")
@@ -263,6 +283,325 @@ class PipelineTester:
             print(f"❌ Data integrity test FAILED: {e}")
             return False
     
+    def build_fixture_raw_dir(self, directory, files=3, duplicates=2):
+        """Copy a few raw files and add a stale re-crawl of some of their games, sorted last"""
+        fixture_dir = Path(directory) / "raw"
+        fixture_dir.mkdir(parents=True)
+        input_files = raw_files(self.raw_data_dir)[:files]
+        for raw_file in input_files:
+            shutil.copy(raw_file, fixture_dir / raw_file.name)
+        
+        # The same games with different contents: only the first copy may reach the tables
+        stale_games = list(iter_file_games(input_files[0]))[:duplicates]
+        for game in stale_games:
+            game['name'] = f"{game.get('name')} (stale copy)"
+            game['genres'] = [{'id': 999999, 'name': 'Stale Genre', 'slug': 'stale-genre'}]
+        with RawSegmentWriter(fixture_dir / "zz_stale_copy.ndjson", compression=None) as writer:
+            writer.write_many(stale_games)
+        return fixture_dir
+    
+    def transformed_tables(self, directory):
+        """Every transformed table as CSV text, to compare the output of two runs"""
+        return {name: read_table(directory, name).to_csv(index=False) for name in OUTPUT_COLUMNS}
+    
+    def compare_transforms(self, expected, actual, label):
+        mismatched = [name for name in OUTPUT_COLUMNS if expected[name] != actual[name]]
+        if mismatched:
+            print(f"❌ {label} differs from the serial transform in: {', '.join(mismatched)}")
+            return False
+        print(f"✓ {label}: all {len(OUTPUT_COLUMNS)} tables identical to the serial transform")
+        return True
+    
+    def test_parallel_transform(self):
+        """Shards transformed in worker processes must merge into exactly the serial output"""
+        print("\n=== Testing Parallel Transform ===")
+        
+        if not raw_files(self.raw_data_dir):
+            print("❌ No raw files to transform")
+            return False
+        
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                raw_dir = self.build_fixture_raw_dir(tmp)
+                # Transform progress is noise here; only the comparison is reported
+                with redirect_stdout(io.StringIO()):
+                    GameDataToCSV(raw_dir, Path(tmp) / "serial").run_transformation()
+                    GameDataToCSV(raw_dir, Path(tmp) / "parallel").run_parallel_transformation(workers=2)
+                serial = self.transformed_tables(Path(tmp) / "serial")
+                parallel = self.transformed_tables(Path(tmp) / "parallel")
+            
+            if self.compare_transforms(serial, parallel, "parallel transform (2 workers)"):
+                print("✅ Parallel transform test PASSED")
+                self.test_results['parallel_transform'] = True
+                return True
+            print("❌ Parallel transform test FAILED")
+            return False
+        
+        except Exception as e:
+            print(f"❌ Parallel transform test FAILED: {e}")
+            return False
+    
+    def test_incremental_transform(self):
+        """An incremental transform after new raw files arrive must equal a serial transform of them all"""
+        print("\n=== Testing Incremental Transform ===")
+        
+        input_files = raw_files(self.raw_data_dir)
+        if len(input_files) < 4:
+            print("❌ Need at least 4 raw files to test incremental transforms")
+            return False
+        
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                raw_dir = self.build_fixture_raw_dir(tmp)
+                incremental = GameDataToCSV(raw_dir, Path(tmp) / "incremental")
+                with redirect_stdout(io.StringIO()):
+                    incremental.run_incremental_transformation(workers=2)
+                    # A later crawl adds a file; only that one is transformed again
+                    shutil.copy(input_files[3], raw_dir / input_files[3].name)
+                    incremental.run_incremental_transformation(workers=2)
+                    GameDataToCSV(raw_dir, Path(tmp) / "serial").run_transformation()
+                serial = self.transformed_tables(Path(tmp) / "serial")
+                merged = self.transformed_tables(Path(tmp) / "incremental")
+            
+            if self.compare_transforms(serial, merged, "incremental transform (2 runs)"):
+                print("✅ Incremental transform test PASSED")
+                self.test_results['incremental_transform'] = True
+                return True
+            print("❌ Incremental transform test FAILED")
+            return False
+        
+        except Exception as e:
+            print(f"❌ Incremental transform test FAILED: {e}")
+            return False
+    
+    def write_raw_dir(self, directory, input_files, recrawled_games=()):
+        """A raw directory with copies of some raw files plus a re-crawl sorted first"""
+        directory = Path(directory)
+        directory.mkdir(parents=True)
+        for raw_file in input_files:
+            shutil.copy(raw_file, directory / raw_file.name)
+        if recrawled_games:
+            with RawSegmentWriter(directory / "aa_recrawl.ndjson", compression=None) as writer:
+                writer.write_many(recrawled_games)
+        return directory
+    
+    def database_rows(self, db_path, tables):
+        """Every row of some tables in a stable order, floats rounded so summed columns compare"""
+        conn = sqlite3.connect(db_path)
+        rows = {}
+        for table in tables:
+            # Loaded tables are compared on the loaded columns, not on surrogate row ids
+            columns = ', '.join(table_columns(table)) if table in LOAD_TABLES else '*'
+            rows[table] = [
+                tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+                for row in conn.execute(f"SELECT {columns} FROM {table}")
+            ]
+            rows[table].sort(key=repr)
+        conn.close()
+        return rows
+    
+    def test_incremental_load(self):
+        """A delta batch applied with an incremental load must leave the same data as a full rebuild"""
+        print("\n=== Testing Incremental Load ===")
+        
+        input_files = raw_files(self.raw_data_dir)
+        if len(input_files) < 3:
+            print("❌ Need at least 3 raw files to test incremental loads")
+            return False
+        
+        # Some already-loaded games come back with new values and fewer genres
+        recrawled = list(iter_file_games(input_files[0]))[:5]
+        for game in recrawled:
+            game['name'] = f"{game.get('name')} (updated)"
+            game['rating'] = round((game.get('rating') or 0) / 2, 2)
+            game['genres'] = (game.get('genres') or [])[:1]
+        
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                tmp = Path(tmp)
+                batches = {
+                    'base': self.write_raw_dir(tmp / "base_raw", input_files[:2]),
+                    'delta': self.write_raw_dir(tmp / "delta_raw", input_files[2:3], recrawled),
+                    'full': self.write_raw_dir(tmp / "full_raw", input_files[:3], recrawled)
+                }
+                with redirect_stdout(io.StringIO()):
+                    for name, raw_dir in batches.items():
+                        GameDataToCSV(raw_dir, tmp / name).run_transformation()
+                    for db_name in ['incremental.db', 'full.db']:
+                        GameDatabaseSchema(tmp / db_name).create_schema()
+                    loaded = all([
+                        CSVToDatabaseLoader(tmp / "incremental.db", tmp / "base").run_full_load(),
+                        CSVToDatabaseLoader(tmp / "incremental.db", tmp / "delta").run_incremental_load(),
+                        CSVToDatabaseLoader(tmp / "full.db", tmp / "full").run_full_load()
+                    ])
+                if not loaded:
+                    print("❌ One of the loads failed")
+                    return False
+                
+                tables = LOAD_TABLES + list(AGGREGATE_TABLES)
+                incremental = self.database_rows(tmp / "incremental.db", tables)
+                rebuilt = self.database_rows(tmp / "full.db", tables)
+            
+            mismatched = [table for table in tables if incremental[table] != rebuilt[table]]
+            if mismatched:
+                print(f"❌ Incremental load differs from a full rebuild in: {', '.join(mismatched)}")
+                print("❌ Incremental load test FAILED")
+                return False
+            
+            print(f"✓ base + delta batch: all {len(tables)} tables identical to a full rebuild")
+            print("✅ Incremental load test PASSED")
+            self.test_results['incremental_load'] = True
+            return True
+        
+        except Exception as e:
+            print(f"❌ Incremental load test FAILED: {e}")
+            return False
+    
+    def test_reload_after_clustering(self):
+        """A full load of a smaller catalogue must still pass validation after games were clustered"""
+        print("\n=== Testing Reload After Clustering ===")
+        
+        input_files = raw_files(self.raw_data_dir)
+        if len(input_files) < 2:
+            print("❌ Need at least 2 raw files to test a smaller reload")
+            return False
+        
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                tmp = Path(tmp)
+                db_path = tmp / "games.db"
+                catalogues = {
+                    'large': self.write_raw_dir(tmp / "large_raw", input_files[:3]),
+                    'small': self.write_raw_dir(tmp / "small_raw", input_files[:1])
+                }
+                with redirect_stdout(io.StringIO()):
+                    for name, raw_dir in catalogues.items():
+                        GameDataToCSV(raw_dir, tmp / name).run_transformation()
+                    GameDatabaseSchema(db_path).create_schema()
+                    loaded = CSVToDatabaseLoader(db_path, tmp / "large").run_full_load()
+                    clustered = loaded and GameClusterer(db_path, clusters=5).run()
+                    # Staged loads only publish a build that passes validate_database()
+                    reloaded = clustered and CSVToDatabaseLoader(db_path, tmp / "small").run_full_load()
+                    problems = validate_database(db_path)
+                
+                conn = sqlite3.connect(db_path)
+                leftover = conn.execute("SELECT COUNT(*) FROM game_clusters").fetchone()[0]
+                conn.close()
+            
+            if not clustered:
+                print("❌ Could not load and cluster the larger catalogue")
+                return False
+            if not reloaded or problems or leftover:
+                for problem in problems:
+                    print(f"✗ {problem}")
+                print(f"❌ Reload after clustering test FAILED ({leftover} stale cluster assignments)")
+                return False
+            
+            print("✓ Smaller catalogue published over a clustered database; validation passed")
+            print("✅ Reload after clustering test PASSED")
+            self.test_results['reload_after_clustering'] = True
+            return True
+        
+        except Exception as e:
+            print(f"❌ Reload after clustering test FAILED: {e}")
+            return False
+    
+    def test_query_cache_publish(self):
+        """Results cached from one build must not be served once a new build is published"""
+        print("\n=== Testing Query Cache Across Publish ===")
+        
+        sql = "SELECT name FROM games ORDER BY id LIMIT 1"
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                db_path = Path(tmp) / "games.db"
+                shutil.copy(self.db_path, db_path)
+                service = QueryService(db_path)
+                try:
+                    before = service.query(sql)[0]['name']
+                    service.query(sql)
+                    hits = service.cache_stats()['hits']
+                    
+                    staging = stage_database(db_path)
+                    conn = sqlite3.connect(staging)
+                    conn.execute("""
+                        UPDATE games SET name = name || ' (new build)'
+                        WHERE id = (SELECT MIN(id) FROM games)
+                    """)
+                    conn.commit()
+                    conn.close()
+                    publish_database(staging, db_path)
+                    
+                    after = service.query(sql)[0]['name']
+                finally:
+                    service.close()
+            
+            if hits != 1:
+                print(f"❌ Repeated query was not served from the cache ({hits} hits)")
+                return False
+            if after != f"{before} (new build)":
+                print(f"❌ Cached result from the old build served after publish: {after!r}")
+                return False
+            
+            print("✓ Repeated query served from the cache")
+            print("✓ New build's data returned right after publish")
+            print("✅ Query cache publish test PASSED")
+            self.test_results['query_cache_publish'] = True
+            return True
+        
+        except Exception as e:
+            print(f"❌ Query cache publish test FAILED: {e}")
+            return False
+    
+    def test_query_single_flight(self):
+        """Concurrent misses on one key must run its query one at a time, even when a query fails"""
+        print("\n=== Testing Query Single-Flight ===")
+        
+        service = QueryService(self.db_path)
+        counter_lock = threading.Lock()
+        stats = {'calls': 0, 'running': 0, 'peak': 0}
+        
+        def compute(conn):
+            with counter_lock:
+                stats['calls'] += 1
+                stats['running'] += 1
+                stats['peak'] = max(stats['peak'], stats['running'])
+                first = stats['calls'] == 1
+            try:
+                time.sleep(0.2)
+                if first:
+                    raise RuntimeError("first query failed")
+                return conn.execute("SELECT COUNT(*) AS games FROM games").fetchall()
+            finally:
+                with counter_lock:
+                    stats['running'] -= 1
+        
+        def caller():
+            try:
+                return service.cached(('single-flight probe',), compute)
+            except RuntimeError:
+                return None
+        
+        try:
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                first_wave = [executor.submit(caller) for _ in range(8)]
+                # By now the first query has failed and one of its waiters is retrying;
+                # new callers must queue behind that retry instead of starting their own
+                time.sleep(0.3)
+                second_wave = [executor.submit(caller) for _ in range(8)]
+                results = [future.result() for future in first_wave + second_wave]
+            answered = sum(result is not None for result in results)
+        finally:
+            service.close()
+        
+        print(f"✓ {len(results)} callers: {stats['calls']} queries run, at most {stats['peak']} at once")
+        if stats['calls'] != 2 or stats['peak'] != 1 or answered != len(results) - 1 or service.pending:
+            print("❌ Query single-flight test FAILED")
+            return False
+        
+        print("✅ Query single-flight test PASSED")
+        self.test_results['query_single_flight'] = True
+        return True
+    
     def run_performance_tests(self):
         """Test query performance"""
         print("\n=== Testing Query Performance ===")
@@ -331,6 +670,12 @@ class PipelineTester:
         self.test_database_schema()
         self.test_database_loading()
         self.test_data_integrity()
+        self.test_parallel_transform()
+        self.test_incremental_transform()
+        self.test_incremental_load()
+        self.test_reload_after_clustering()
+        self.test_query_cache_publish()
+        self.test_query_single_flight()
         self.run_performance_tests()
         
         # Generate final report
@@ -1,39 +1,93 @@
-import pandas as pd
+import os
+import sys
 import json
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from datetime import datetime
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from raw_store import raw_files, iter_file_games
+from table_io import TABLE_SUFFIXES, TableWriter, read_table, write_table
+
+CHUNK_SIZE = 5000  # Games buffered per flush in streaming mode
+SHARDS_PER_WORKER = 4  # More shards than workers evens out raw files of different sizes
+PARTITIONS_DIR = '_partitions'  # Per-raw-file output tables kept for incremental runs
+
+# Category bins as (minimum value, label), checked from the top; values below every
+# threshold (or missing) get the last label. Labels must match the CHECK constraints
+# on games.rating_category / games.popularity_category.
+RATING_BINS = [(4.5, 'Excellent'), (4.0, 'Great'), (3.5, 'Good'), (3.0, 'Average'), (float('-inf'), 'Poor')]
+POPULARITY_BINS = [(10000, 'Very Popular'), (1000, 'Popular'), (100, 'Moderately Popular'), (float('-inf'), 'Niche')]
+
+# Columns of every output table, so streaming mode can write headers/schemas up front
+OUTPUT_COLUMNS = {
+    'games': [
+        'id', 'name', 'slug', 'released', 'rating', 'rating_top', 'ratings_count', 'metacritic',
+        'playtime', 'suggestions_count', 'updated', 'background_image', 'reviews_count', 'added', 'tba',
+        'release_year', 'release_month', 'release_day', 'rating_category', 'popularity_category',
+        'esrb_rating', 'esrb_rating_slug', 'genres_count', 'platforms_count', 'stores_count',
+        'primary_genre', 'primary_genre_slug', 'primary_platform', 'primary_platform_slug'
+    ],
+    'game_genres': ['game_id', 'genre_id', 'genre_name', 'genre_slug'],
+    'game_platforms': ['game_id', 'platform_id', 'platform_name', 'platform_slug'],
+    'game_stores': ['game_id', 'store_id', 'store_name', 'store_slug'],
+    'game_ratings_detail': ['game_id', 'rating_id', 'rating_title', 'rating_count', 'rating_percent'],
+    'game_tags': ['game_id', 'tag_id', 'tag_name', 'tag_slug', 'tag_language', 'tag_games_count'],
+    'genres_lookup': ['genre_id', 'genre_name', 'genre_slug'],
+    'platforms_lookup': ['platform_id', 'platform_name', 'platform_slug'],
+    'stores_lookup': ['store_id', 'store_name', 'store_slug']
+}
+
+# Junction table -> lookup table deduplicated from it
+LOOKUP_TABLES = {
+    'game_genres': 'genres_lookup',
+    'game_platforms': 'platforms_lookup',
+    'game_stores': 'stores_lookup'
+}
 
 class GameDataToCSV:
-    def __init__(self):
-        self.raw_data_dir = Path("../../data/raw")
-        self.transformed_data_dir = Path("../../data/transformed")
-        self.transformed_data_dir.mkdir(parents=True, exist_ok=True)
+    def __init__(self, raw_data_dir="../../data/raw", transformed_data_dir="../../data/transformed",
+                 rating_bins=RATING_BINS, popularity_bins=POPULARITY_BINS, output_format='csv'):
+        if output_format not in TABLE_SUFFIXES:
+            raise ValueError(f"Unknown output format: {output_format}")
+        self.raw_data_dir = Path(raw_data_dir)
+        self.output_format = output_format
+        self.rating_bins = rating_bins
+        self.popularity_bins = popularity_bins
+        # None when the rows are consumed directly (e.g. streamed into the database)
+        self.transformed_data_dir = Path(transformed_data_dir) if transformed_data_dir else None
+        if self.transformed_data_dir:
+            self.transformed_data_dir.mkdir(parents=True, exist_ok=True)
+        # Raw files that could not be read to the end; their games were only partly used
+        self.failed_files = []
         
     def load_raw_data(self):
-        """Load all JSON files from raw data directory"""
+        """Load all raw files (NDJSON segments or legacy JSON pages) from raw data directory"""
         all_games = []
         
-        # Look for all JSON files in raw data directory
-        json_files = list(self.raw_data_dir.glob("*.json"))
+        # Look for all raw files in raw data directory
+        input_files = raw_files(self.raw_data_dir)
         
-        if not json_files:
-            print(f"ERROR: No JSON files found in {self.raw_data_dir}")
+        if not input_files:
+            print(f"ERROR: No raw files found in {self.raw_data_dir}")
             return all_games
         
-        print(f"Found {len(json_files)} JSON files")
+        print(f"Found {len(input_files)} raw files")
         
-        for json_file in json_files:
+        seen_ids = set()
+        for raw_file in input_files:
             try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if 'results' in data:
-                        games_count = len(data['results'])
-                        all_games.extend(data['results'])
-                        print(f"✓ {json_file.name}: {games_count} games")
-                    else:
-                        print(f"✗ {json_file.name}: No 'results' key found")
+                file_games = list(iter_file_games(raw_file))
+                unique_games = [game for game in file_games if self.first_copy(game, seen_ids)]
+                all_games.extend(unique_games)
+                duplicates = len(file_games) - len(unique_games)
+                print(f"✓ {raw_file.name}: {len(unique_games)} games{self.duplicates_note(duplicates)}")
             except Exception as e:
-                print(f"✗ {json_file.name}: ERROR - {e}")
+                print(f"✗ {raw_file.name}: ERROR - {e}")
         
         if not all_games:
             print("ERROR: No games loaded from any file")
@@ -42,190 +96,221 @@ class GameDataToCSV:
         
         return all_games
     
+    def iter_raw_games(self, input_files=None):
+        """Yield games one at a time from every raw file, never holding more than one record"""
+        if input_files is None:
+            input_files = raw_files(self.raw_data_dir)
+        
+        if not input_files:
+            print(f"ERROR: No raw files found in {self.raw_data_dir}")
+            return
+        
+        print(f"Found {len(input_files)} raw files")
+        
+        seen_ids = set()
+        for raw_file in input_files:
+            games_count = 0
+            duplicates = 0
+            try:
+                for game in iter_file_games(raw_file):
+                    if not self.first_copy(game, seen_ids):
+                        duplicates += 1
+                        continue
+                    games_count += 1
+                    yield game
+                print(f"✓ {raw_file.name}: {games_count} games{self.duplicates_note(duplicates)}")
+            except Exception as e:
+                print(f"✗ {raw_file.name}: ERROR after {games_count} games - {e}")
+                self.failed_files.append(raw_file.name)
+    
+    @staticmethod
+    def first_copy(game, seen_ids):
+        """False for a game id that was already read, e.g. from a stale segment of an earlier crawl"""
+        game_id = game.get('id')
+        if game_id is None:
+            return True
+        if game_id in seen_ids:
+            return False
+        seen_ids.add(game_id)
+        return True
+    
+    @staticmethod
+    def duplicates_note(duplicates):
+        return f" ({duplicates} duplicates skipped)" if duplicates else ""
+    
+    def build_game_record(self, game):
+        """Build the games-table row for one raw game, minus the columns add_derived_columns computes"""
+        # Basic game info
+        game_record = {
+            'id': game.get('id'),
+            'name': game.get('name'),
+            'slug': game.get('slug'),
+            'released': game.get('released'),
+            'rating': game.get('rating'),
+            'rating_top': game.get('rating_top'),
+            'ratings_count': game.get('ratings_count'),
+            'metacritic': game.get('metacritic'),
+            'playtime': game.get('playtime'),
+            'suggestions_count': game.get('suggestions_count'),
+            'updated': game.get('updated'),
+            'background_image': game.get('background_image'),
+            'reviews_count': game.get('reviews_count'),
+            'added': game.get('added'),
+            'tba': game.get('tba')
+        }
+        
+        # ESRB rating
+        if game.get('esrb_rating'):
+            game_record['esrb_rating'] = game['esrb_rating'].get('name')
+            game_record['esrb_rating_slug'] = game['esrb_rating'].get('slug')
+        else:
+            game_record['esrb_rating'] = None
+            game_record['esrb_rating_slug'] = None
+        
+        # Count genres and platforms
+        game_record['genres_count'] = len(game.get('genres', []))
+        game_record['platforms_count'] = len(game.get('platforms', []))
+        game_record['stores_count'] = len(game.get('stores', []))
+        
+        # Extract first genre and platform (most common)
+        if game.get('genres'):
+            game_record['primary_genre'] = game['genres'][0]['name']
+            game_record['primary_genre_slug'] = game['genres'][0]['slug']
+        else:
+            game_record['primary_genre'] = None
+            game_record['primary_genre_slug'] = None
+        
+        if game.get('platforms'):
+            game_record['primary_platform'] = game['platforms'][0]['platform']['name']
+            game_record['primary_platform_slug'] = game['platforms'][0]['platform']['slug']
+        else:
+            game_record['primary_platform'] = None
+            game_record['primary_platform_slug'] = None
+        
+        return game_record
+    
+    def genre_rows(self, game):
+        """Genre relationships of one game"""
+        game_id = game.get('id')
+        return [{
+            'game_id': game_id,
+            'genre_id': genre.get('id'),
+            'genre_name': genre.get('name'),
+            'genre_slug': genre.get('slug')
+        } for genre in game.get('genres', [])]
+    
+    def platform_rows(self, game):
+        """Platform relationships of one game"""
+        game_id = game.get('id')
+        rows = []
+        for platform_data in game.get('platforms', []):
+            platform = platform_data.get('platform', {})
+            rows.append({
+                'game_id': game_id,
+                'platform_id': platform.get('id'),
+                'platform_name': platform.get('name'),
+                'platform_slug': platform.get('slug')
+            })
+        return rows
+    
+    def store_rows(self, game):
+        """Store relationships of one game"""
+        game_id = game.get('id')
+        rows = []
+        for store_data in game.get('stores', []):
+            store = store_data.get('store', {})
+            rows.append({
+                'game_id': game_id,
+                'store_id': store.get('id'),
+                'store_name': store.get('name'),
+                'store_slug': store.get('slug')
+            })
+        return rows
+    
+    def rating_rows(self, game):
+        """Ratings breakdown of one game"""
+        game_id = game.get('id')
+        return [{
+            'game_id': game_id,
+            'rating_id': rating.get('id'),
+            'rating_title': rating.get('title'),
+            'rating_count': rating.get('count'),
+            'rating_percent': rating.get('percent')
+        } for rating in game.get('ratings', [])]
+    
+    def tag_rows(self, game):
+        """Top tags of one game"""
+        game_id = game.get('id')
+        # Get top 10 tags to avoid too much data
+        return [{
+            'game_id': game_id,
+            'tag_id': tag.get('id'),
+            'tag_name': tag.get('name'),
+            'tag_slug': tag.get('slug'),
+            'tag_language': tag.get('language'),
+            'tag_games_count': tag.get('games_count')
+        } for tag in game.get('tags', [])[:10]]
+    
+    def add_derived_columns(self, games_df):
+        """Compute release date parts and rating/popularity categories for a whole batch of games at once"""
+        if games_df.empty:
+            return pd.DataFrame(columns=OUTPUT_COLUMNS['games'])
+        
+        # Invalid or missing dates become NaT, like the per-row strptime fallback used to
+        release_dates = pd.to_datetime(games_df['released'], format='%Y-%m-%d', errors='coerce')
+        games_df['release_year'] = release_dates.dt.year
+        games_df['release_month'] = release_dates.dt.month
+        games_df['release_day'] = release_dates.dt.day
+        
+        games_df['rating_category'] = self.categorize(games_df['rating'], self.rating_bins)
+        games_df['popularity_category'] = self.categorize(games_df['ratings_count'], self.popularity_bins)
+        
+        return games_df[OUTPUT_COLUMNS['games']]
+    
+    @staticmethod
+    def categorize(values, bins):
+        """Label each value with the first (threshold, label) bin it reaches; misses get the last label"""
+        values = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+        conditions = [values >= threshold for threshold, _ in bins]
+        labels = [label for _, label in bins]
+        return np.select(conditions, labels, default=labels[-1])
+    
     def transform_main_games_data(self, raw_games):
         """Transform main game information"""
-        games_data = []
-        
-        for game in raw_games:
-            # Basic game info
-            game_record = {
-                'id': game.get('id'),
-                'name': game.get('name'),
-                'slug': game.get('slug'),
-                'released': game.get('released'),
-                'rating': game.get('rating'),
-                'rating_top': game.get('rating_top'),
-                'ratings_count': game.get('ratings_count'),
-                'metacritic': game.get('metacritic'),
-                'playtime': game.get('playtime'),
-                'suggestions_count': game.get('suggestions_count'),
-                'updated': game.get('updated'),
-                'background_image': game.get('background_image'),
-                'reviews_count': game.get('reviews_count'),
-                'added': game.get('added'),
-                'tba': game.get('tba')
-            }
-            
-            # Extract release year and month
-            if game.get('released'):
-                try:
-                    release_date = datetime.strptime(game['released'], '%Y-%m-%d')
-                    game_record['release_year'] = release_date.year
-                    game_record['release_month'] = release_date.month
-                    game_record['release_day'] = release_date.day
-                except ValueError:
-                    game_record['release_year'] = None
-                    game_record['release_month'] = None
-                    game_record['release_day'] = None
-            else:
-                game_record['release_year'] = None
-                game_record['release_month'] = None
-                game_record['release_day'] = None
-            
-            # Rating categories
-            rating = game.get('rating', 0)
-            if rating >= 4.5:
-                game_record['rating_category'] = 'Excellent'
-            elif rating >= 4.0:
-                game_record['rating_category'] = 'Great'
-            elif rating >= 3.5:
-                game_record['rating_category'] = 'Good'
-            elif rating >= 3.0:
-                game_record['rating_category'] = 'Average'
-            else:
-                game_record['rating_category'] = 'Poor'
-            
-            # Popularity based on ratings_count
-            ratings_count = game.get('ratings_count', 0)
-            if ratings_count >= 10000:
-                game_record['popularity_category'] = 'Very Popular'
-            elif ratings_count >= 1000:
-                game_record['popularity_category'] = 'Popular'
-            elif ratings_count >= 100:
-                game_record['popularity_category'] = 'Moderately Popular'
-            else:
-                game_record['popularity_category'] = 'Niche'
-            
-            # ESRB rating
-            if game.get('esrb_rating'):
-                game_record['esrb_rating'] = game['esrb_rating'].get('name')
-                game_record['esrb_rating_slug'] = game['esrb_rating'].get('slug')
-            else:
-                game_record['esrb_rating'] = None
-                game_record['esrb_rating_slug'] = None
-            
-            # Count genres and platforms
-            game_record['genres_count'] = len(game.get('genres', []))
-            game_record['platforms_count'] = len(game.get('platforms', []))
-            game_record['stores_count'] = len(game.get('stores', []))
-            
-            # Extract first genre and platform (most common)
-            if game.get('genres'):
-                game_record['primary_genre'] = game['genres'][0]['name']
-                game_record['primary_genre_slug'] = game['genres'][0]['slug']
-            else:
-                game_record['primary_genre'] = None
-                game_record['primary_genre_slug'] = None
-            
-            if game.get('platforms'):
-                game_record['primary_platform'] = game['platforms'][0]['platform']['name']
-                game_record['primary_platform_slug'] = game['platforms'][0]['platform']['slug']
-            else:
-                game_record['primary_platform'] = None
-                game_record['primary_platform_slug'] = None
-            
-            games_data.append(game_record)
-        
-        return pd.DataFrame(games_data)
+        return self.add_derived_columns(pd.DataFrame([self.build_game_record(game) for game in raw_games]))
     
     def extract_genres(self, raw_games):
         """Extract all genres with game relationships"""
-        genre_game_relationships = []
-        
-        for game in raw_games:
-            game_id = game.get('id')
-            for genre in game.get('genres', []):
-                genre_game_relationships.append({
-                    'game_id': game_id,
-                    'genre_id': genre.get('id'),
-                    'genre_name': genre.get('name'),
-                    'genre_slug': genre.get('slug')
-                })
-        
-        return pd.DataFrame(genre_game_relationships)
+        return pd.DataFrame([row for game in raw_games for row in self.genre_rows(game)])
     
     def extract_platforms(self, raw_games):
         """Extract all platforms with game relationships"""
-        platform_game_relationships = []
-        
-        for game in raw_games:
-            game_id = game.get('id')
-            for platform_data in game.get('platforms', []):
-                platform = platform_data.get('platform', {})
-                platform_game_relationships.append({
-                    'game_id': game_id,
-                    'platform_id': platform.get('id'),
-                    'platform_name': platform.get('name'),
-                    'platform_slug': platform.get('slug')
-                })
-        
-        return pd.DataFrame(platform_game_relationships)
+        return pd.DataFrame([row for game in raw_games for row in self.platform_rows(game)])
     
     def extract_stores(self, raw_games):
         """Extract all stores with game relationships"""
-        store_game_relationships = []
-        
-        for game in raw_games:
-            game_id = game.get('id')
-            for store_data in game.get('stores', []):
-                store = store_data.get('store', {})
-                store_game_relationships.append({
-                    'game_id': game_id,
-                    'store_id': store.get('id'),
-                    'store_name': store.get('name'),
-                    'store_slug': store.get('slug')
-                })
-        
-        return pd.DataFrame(store_game_relationships)
+        return pd.DataFrame([row for game in raw_games for row in self.store_rows(game)])
     
     def extract_ratings_breakdown(self, raw_games):
         """Extract detailed ratings breakdown"""
-        ratings_data = []
-        
-        for game in raw_games:
-            game_id = game.get('id')
-            for rating in game.get('ratings', []):
-                ratings_data.append({
-                    'game_id': game_id,
-                    'rating_id': rating.get('id'),
-                    'rating_title': rating.get('title'),
-                    'rating_count': rating.get('count'),
-                    'rating_percent': rating.get('percent')
-                })
-        
-        return pd.DataFrame(ratings_data)
+        return pd.DataFrame([row for game in raw_games for row in self.rating_rows(game)])
     
     def extract_tags(self, raw_games):
         """Extract top tags for each game"""
-        tag_game_relationships = []
-        
-        for game in raw_games:
-            game_id = game.get('id')
-            # Get top 10 tags to avoid too much data
-            for tag in game.get('tags', [])[:10]:
-                tag_game_relationships.append({
-                    'game_id': game_id,
-                    'tag_id': tag.get('id'),
-                    'tag_name': tag.get('name'),
-                    'tag_slug': tag.get('slug'),
-                    'tag_language': tag.get('language'),
-                    'tag_games_count': tag.get('games_count')
-                })
-        
-        return pd.DataFrame(tag_game_relationships)
+        return pd.DataFrame([row for game in raw_games for row in self.tag_rows(game)])
+    
+    def table_name(self, name):
+        return f"{name}{TABLE_SUFFIXES[self.output_format]}"
+    
+    def save_table(self, df, name):
+        """Write one complete output table in the configured format"""
+        if self.output_format != 'csv':
+            df = df.reindex(columns=OUTPUT_COLUMNS[name])
+        write_table(df, self.transformed_data_dir, name, self.output_format)
+        print(f"✓ {self.table_name(name)}: {len(df)} records")
     
     def run_transformation(self):
-        """Run the complete transformation to CSV"""
+        """Run the complete transformation to CSV (or Parquet)"""
         print("Starting transformation...")
         
         # Load raw data
@@ -238,41 +323,32 @@ class GameDataToCSV:
         try:
             # Transform data
             games_df = self.transform_main_games_data(raw_games)
-            games_df.to_csv(self.transformed_data_dir / 'games.csv', index=False, encoding='utf-8')
-            print(f"✓ games.csv: {len(games_df)} records")
+            self.save_table(games_df, 'games')
             
             genres_df = self.extract_genres(raw_games)
-            genres_df.to_csv(self.transformed_data_dir / 'game_genres.csv', index=False, encoding='utf-8')
-            print(f"✓ game_genres.csv: {len(genres_df)} records")
+            self.save_table(genres_df, 'game_genres')
             
             platforms_df = self.extract_platforms(raw_games)
-            platforms_df.to_csv(self.transformed_data_dir / 'game_platforms.csv', index=False, encoding='utf-8')
-            print(f"✓ game_platforms.csv: {len(platforms_df)} records")
+            self.save_table(platforms_df, 'game_platforms')
             
             stores_df = self.extract_stores(raw_games)
-            stores_df.to_csv(self.transformed_data_dir / 'game_stores.csv', index=False, encoding='utf-8')
-            print(f"✓ game_stores.csv: {len(stores_df)} records")
+            self.save_table(stores_df, 'game_stores')
             
             ratings_df = self.extract_ratings_breakdown(raw_games)
-            ratings_df.to_csv(self.transformed_data_dir / 'game_ratings_detail.csv', index=False, encoding='utf-8')
-            print(f"✓ game_ratings_detail.csv: {len(ratings_df)} records")
+            self.save_table(ratings_df, 'game_ratings_detail')
             
             tags_df = self.extract_tags(raw_games)
-            tags_df.to_csv(self.transformed_data_dir / 'game_tags.csv', index=False, encoding='utf-8')
-            print(f"✓ game_tags.csv: {len(tags_df)} records")
+            self.save_table(tags_df, 'game_tags')
             
             # Create unique lookup tables
             unique_genres = genres_df[['genre_id', 'genre_name', 'genre_slug']].drop_duplicates()
-            unique_genres.to_csv(self.transformed_data_dir / 'genres_lookup.csv', index=False, encoding='utf-8')
-            print(f"✓ genres_lookup.csv: {len(unique_genres)} records")
+            self.save_table(unique_genres, 'genres_lookup')
             
             unique_platforms = platforms_df[['platform_id', 'platform_name', 'platform_slug']].drop_duplicates()
-            unique_platforms.to_csv(self.transformed_data_dir / 'platforms_lookup.csv', index=False, encoding='utf-8')
-            print(f"✓ platforms_lookup.csv: {len(unique_platforms)} records")
+            self.save_table(unique_platforms, 'platforms_lookup')
             
             unique_stores = stores_df[['store_id', 'store_name', 'store_slug']].drop_duplicates()
-            unique_stores.to_csv(self.transformed_data_dir / 'stores_lookup.csv', index=False, encoding='utf-8')
-            print(f"✓ stores_lookup.csv: {len(unique_stores)} records")
+            self.save_table(unique_stores, 'stores_lookup')
             
             print(f"SUCCESS: All files saved to {self.transformed_data_dir}")
             
@@ -289,6 +365,369 @@ class GameDataToCSV:
             print(f"ERROR during transformation: {e}")
             return None
 
+    def row_builders(self):
+        """Output table -> function turning one raw game into that table's rows"""
+        return {
+            'games': lambda game: [self.build_game_record(game)],
+            'game_genres': self.genre_rows,
+            'game_platforms': self.platform_rows,
+            'game_stores': self.store_rows,
+            'game_ratings_detail': self.rating_rows,
+            'game_tags': self.tag_rows
+        }
+    
+    def iter_table_chunks(self, chunk_size=CHUNK_SIZE, input_files=None):
+        """Stream raw games and yield {output table: DataFrame} for every `chunk_size` games
+        
+        Lookup tables only get rows for keys not seen in an earlier chunk.
+        """
+        builders = self.row_builders()
+        buffers = {name: [] for name in OUTPUT_COLUMNS}
+        # Only the distinct lookup keys are kept in memory
+        seen_lookups = {lookup_name: set() for lookup_name in LOOKUP_TABLES.values()}
+        
+        def chunk_tables():
+            tables = {}
+            for name, rows in buffers.items():
+                if name == 'games' and rows:
+                    tables[name] = self.add_derived_columns(pd.DataFrame(rows))
+                else:
+                    tables[name] = pd.DataFrame(rows, columns=OUTPUT_COLUMNS[name])
+                rows.clear()
+            return tables
+        
+        # Each game is fanned out to every output table as it streams past
+        games_in_chunk = 0
+        for game in self.iter_raw_games(input_files):
+            for name, build_rows in builders.items():
+                rows = build_rows(game)
+                buffers[name].extend(rows)
+                
+                lookup_name = LOOKUP_TABLES.get(name)
+                if lookup_name:
+                    columns = OUTPUT_COLUMNS[lookup_name]
+                    for row in rows:
+                        key = tuple(row[column] for column in columns)
+                        if key not in seen_lookups[lookup_name]:
+                            seen_lookups[lookup_name].add(key)
+                            buffers[lookup_name].append(dict(zip(columns, key)))
+            
+            games_in_chunk += 1
+            if games_in_chunk >= chunk_size:
+                yield chunk_tables()
+                games_in_chunk = 0
+        if games_in_chunk:
+            yield chunk_tables()
+    
+    def run_streaming_transformation(self, chunk_size=CHUNK_SIZE, input_files=None):
+        """Single-pass transformation with flat memory use, flushing rows every `chunk_size` games"""
+        print("Starting streaming transformation...")
+        
+        writers = {}
+        try:
+            for name, columns in OUTPUT_COLUMNS.items():
+                writers[name] = TableWriter(self.transformed_data_dir, name, columns, self.output_format)
+            
+            for tables in self.iter_table_chunks(chunk_size, input_files):
+                for name, chunk_df in tables.items():
+                    writers[name].append(chunk_df)
+            
+        except Exception as e:
+            print(f"ERROR during transformation: {e}")
+            return None
+        finally:
+            for writer in writers.values():
+                writer.close()
+        
+        counts = {name: writer.rows for name, writer in writers.items()}
+        if counts['games'] == 0:
+            print("ERROR: No data to transform")
+            return None
+        
+        for name, count in counts.items():
+            print(f"✓ {self.table_name(name)}: {count} records")
+        print(f"SUCCESS: All files saved to {self.transformed_data_dir}")
+        
+        return counts
+
+    def run_parallel_transformation(self, workers=None, chunk_size=CHUNK_SIZE):
+        """Transform shards of raw files in worker processes, then merge their partial tables"""
+        workers = workers or os.cpu_count() or 1
+        input_files = raw_files(self.raw_data_dir)
+        
+        if not input_files:
+            print(f"ERROR: No raw files found in {self.raw_data_dir}")
+            return None
+        
+        # Contiguous shards keep the merged rows in the same order as a serial run
+        shard_count = min(len(input_files), workers * SHARDS_PER_WORKER)
+        shard_size = -(-len(input_files) // shard_count)
+        shards = [input_files[i:i + shard_size] for i in range(0, len(input_files), shard_size)]
+        parts_dir = self.transformed_data_dir / '_parts'
+        shutil.rmtree(parts_dir, ignore_errors=True)
+        
+        print(f"Starting parallel transformation: {len(input_files)} raw files, "
+              f"{len(shards)} shards, {workers} workers...")
+        
+        jobs = [self.shard_job(parts_dir / f'part_{i:04d}', shard, chunk_size) for i, shard in enumerate(shards)]
+        try:
+            part_counts = [counts for _, counts, _ in self.run_shard_jobs(jobs, workers)]
+        except Exception as e:
+            print(f"ERROR during transformation: {e}")
+            return None
+        
+        part_dirs = [job[1] for job, counts in zip(jobs, part_counts) if counts]
+        if not part_dirs:
+            print("ERROR: No data to transform")
+            return None
+        
+        try:
+            counts = self.merge_partial_tables(part_dirs)
+        except Exception as e:
+            print(f"ERROR merging partial tables: {e}")
+            return None
+        finally:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+        
+        for name, count in counts.items():
+            print(f"✓ {self.table_name(name)}: {count} records")
+        print(f"SUCCESS: All files saved to {self.transformed_data_dir}")
+        
+        return counts
+    
+    def shard_job(self, part_dir, input_files, chunk_size):
+        """Arguments for _transform_shard"""
+        return (self.raw_data_dir, part_dir, input_files, chunk_size,
+                self.rating_bins, self.popularity_bins, self.output_format)
+    
+    def run_shard_jobs(self, jobs, workers):
+        """Yield (job, counts, failed raw file names) in job order, in worker processes unless workers is 1"""
+        if workers == 1:
+            for job in jobs:
+                yield (job,) + _transform_shard(job)
+            return
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for job, (counts, failed_files) in zip(jobs, executor.map(_transform_shard, jobs)):
+                yield job, counts, failed_files
+    
+    def settings_fingerprint(self):
+        """Everything besides the raw bytes that changes what a partition contains"""
+        return json.dumps({
+            'format': self.output_format,
+            'rating_bins': self.rating_bins,
+            'popularity_bins': self.popularity_bins
+        })
+    
+    def load_partition_manifest(self, manifest_path):
+        if manifest_path.exists():
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"✗ Could not read {manifest_path}: {e} - rebuilding every partition")
+        return {'settings': None, 'files': {}}
+    
+    def save_partition_manifest(self, manifest_path, manifest):
+        tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, manifest_path)
+    
+    def run_incremental_transformation(self, workers=1, chunk_size=CHUNK_SIZE):
+        """Re-transform only raw files that were added or changed since the last run, then re-merge"""
+        partitions_dir = self.transformed_data_dir / PARTITIONS_DIR
+        partitions_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = partitions_dir / 'manifest.json'
+        
+        manifest = self.load_partition_manifest(manifest_path)
+        if manifest.get('settings') != self.settings_fingerprint():
+            if manifest['files']:
+                print("Transform settings changed - rebuilding every partition")
+            manifest = {'settings': self.settings_fingerprint(), 'files': {}}
+        entries = manifest['files']
+        
+        input_files = raw_files(self.raw_data_dir)
+        if not input_files:
+            print(f"ERROR: No raw files found in {self.raw_data_dir}")
+            return None
+        
+        current = {raw_file.name: raw_file for raw_file in input_files}
+        removed = [name for name in entries if name not in current]
+        changed = []
+        
+        for name, raw_file in current.items():
+            stat = raw_file.stat()
+            entry = entries.get(name)
+            if entry and not entry.get('failed') and (partitions_dir / entry['partition']).exists():
+                # Same size and mtime: trust the recorded hash instead of re-reading the file
+                if entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                    continue
+                if entry['sha256'] == hash_file(raw_file):
+                    entry['mtime_ns'] = stat.st_mtime_ns
+                    continue
+            changed.append(raw_file)
+        
+        print(f"Starting incremental transformation: {len(current) - len(changed)} raw files unchanged, "
+              f"{len(changed)} to transform, {len(removed)} removed")
+        
+        if not changed and not removed and all(
+                (self.transformed_data_dir / self.table_name(name)).exists() for name in OUTPUT_COLUMNS):
+            self.save_partition_manifest(manifest_path, manifest)
+            print("Nothing changed - outputs are up to date")
+            return {}
+        
+        # Each file is transformed into a temp partition that replaces the old one when done
+        jobs = [self.shard_job(partitions_dir / f'{partition_name(raw_file.name)}.tmp', [raw_file], chunk_size)
+                for raw_file in changed]
+        try:
+            for job, counts, failed_files in self.run_shard_jobs(jobs, workers):
+                raw_file = job[2][0]
+                partition = partitions_dir / partition_name(raw_file.name)
+                shutil.rmtree(partition, ignore_errors=True)
+                os.replace(job[1], partition)
+                
+                stat = raw_file.stat()
+                entries[raw_file.name] = {
+                    'sha256': hash_file(raw_file),
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'partition': partition.name,
+                    'games': (counts or {}).get('games', 0),
+                    # A file that could not be read to the end is transformed again next run
+                    'failed': bool(failed_files) or counts is None
+                }
+                if entries[raw_file.name]['failed']:
+                    print(f"⚠️  {raw_file.name} was not fully transformed; it will be retried on the next run")
+                self.save_partition_manifest(manifest_path, manifest)
+        except Exception as e:
+            print(f"ERROR during transformation: {e}")
+            return None
+        
+        for name in removed:
+            shutil.rmtree(partitions_dir / entries.pop(name)['partition'], ignore_errors=True)
+        self.save_partition_manifest(manifest_path, manifest)
+        
+        part_dirs = [partitions_dir / entries[name]['partition'] for name in sorted(current)]
+        try:
+            counts = self.merge_partial_tables(part_dirs)
+        except Exception as e:
+            print(f"ERROR merging partial tables: {e}")
+            return None
+        
+        for name, count in counts.items():
+            print(f"✓ {self.table_name(name)}: {count} records")
+        print(f"SUCCESS: All files saved to {self.transformed_data_dir}")
+        
+        return counts
+    
+    def merge_partial_tables(self, part_dirs):
+        """Concatenate per-shard tables and dedupe games and lookup tables across shards
+        
+        Part directories must be in raw-file order. A game found in several parts
+        keeps the copy from the first one, as a serial run would: later parts lose
+        its games row and all of its child rows.
+        """
+        counts = {}
+        lookup_names = set(LOOKUP_TABLES.values())
+        
+        seen_ids = set()
+        skip_ids = []
+        for part_dir in part_dirs:
+            ids = set(read_table(part_dir, 'games', columns=['id'])['id'].dropna().astype('int64').tolist())
+            skip_ids.append(ids & seen_ids)
+            seen_ids |= ids
+        duplicates = sum(len(ids) for ids in skip_ids)
+        if duplicates:
+            print(f"Skipping {duplicates} games already found in an earlier raw file")
+        
+        for name, columns in OUTPUT_COLUMNS.items():
+            if name in lookup_names:
+                continue
+            # Fact tables are appended part by part in shard order
+            writer = TableWriter(self.transformed_data_dir, name, columns, self.output_format)
+            try:
+                for part_dir, skip in zip(part_dirs, skip_ids):
+                    writer.append_file(part_dir / self.table_name(name), skip)
+            finally:
+                writer.close()
+            counts[name] = writer.rows
+        
+        for junction, name in LOOKUP_TABLES.items():
+            if duplicates:
+                # Rebuilt from the kept rows, so a skipped copy cannot add a lookup entry
+                merged = read_table(self.transformed_data_dir, junction, columns=OUTPUT_COLUMNS[name])
+            else:
+                # Lookups are tiny; the same genre shows up in every shard
+                merged = pd.concat([read_table(part_dir, name) for part_dir in part_dirs], ignore_index=True)
+            merged = merged.drop_duplicates()
+            write_table(merged, self.transformed_data_dir, name, self.output_format)
+            counts[name] = len(merged)
+        
+        return counts
+
+
+def bins_with_thresholds(bins, thresholds):
+    """Replace the thresholds of a bin list, e.g. from "4.5,4.0,3.5,3.0" on the command line"""
+    if not thresholds:
+        return bins
+    values = sorted((float(value) for value in thresholds.split(',')), reverse=True)
+    if len(values) != len(bins) - 1:
+        raise ValueError(f"Expected {len(bins) - 1} thresholds for {[label for _, label in bins]}")
+    return [(value, label) for value, (_, label) in zip(values, bins)] + [bins[-1]]
+
+
+def hash_file(path):
+    """sha256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def partition_name(raw_file_name):
+    return raw_file_name.replace('.', '_')
+
+
+def _transform_shard(job):
+    """Worker process entry point: stream one shard of raw files into its own partial tables"""
+    raw_data_dir, part_dir, input_files, chunk_size, rating_bins, popularity_bins, output_format = job
+    transformer = GameDataToCSV(raw_data_dir, part_dir, rating_bins, popularity_bins, output_format)
+    counts = transformer.run_streaming_transformation(chunk_size, input_files=input_files)
+    return counts, transformer.failed_files
+
 if __name__ == "__main__":
-    transformer = GameDataToCSV()
-    transformer.run_transformation()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Transform raw RAWG pages into CSV or Parquet tables")
+    parser.add_argument("--raw-dir", default="../../data/raw", help="Raw pages (or a delta batch's raw/ directory)")
+    parser.add_argument("--output-dir", default="../../data/transformed", help="Where the tables are written")
+    parser.add_argument("--format", choices=list(TABLE_SUFFIXES), default='csv',
+                        help="Output format; parquet keeps column types and needs pyarrow")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Single pass with flat memory use, flushing rows in chunks")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Games per flush in streaming mode")
+    parser.add_argument("--rating-thresholds", default=None,
+                        help="Minimum ratings for Excellent,Great,Good,Average (default 4.5,4.0,3.5,3.0)")
+    parser.add_argument("--popularity-thresholds", default=None,
+                        help="Minimum ratings_count for Very Popular,Popular,Moderately Popular (default 10000,1000,100)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only re-transform raw files that changed since the last incremental run")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Transform shards of raw files in this many processes (0 = one per core)")
+    args = parser.parse_args()
+
+    transformer = GameDataToCSV(
+        args.raw_dir,
+        args.output_dir,
+        rating_bins=bins_with_thresholds(RATING_BINS, args.rating_thresholds),
+        popularity_bins=bins_with_thresholds(POPULARITY_BINS, args.popularity_thresholds),
+        output_format=args.format
+    )
+    if args.incremental:
+        transformer.run_incremental_transformation(args.workers or os.cpu_count() or 1, args.chunk_size)
+    elif args.workers != 1:
+        transformer.run_parallel_transformation(args.workers or None, args.chunk_size)
+    elif args.streaming:
+        transformer.run_streaming_transformation(args.chunk_size)
+    else:
+        transformer.run_transformation()
\ No newline at end of file